@@ -1,21 +1,42 @@
+import time
+_STARTED = time.perf_counter()
+
 from dotenv import load_dotenv
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify, g, stream_with_context
+from werkzeug.utils import secure_filename
 import os
+import json
 import logging
+import multiprocessing
+import threading
+from functools import partial
 
-from utils.video_processing.video_to_audio import download_audio_from_youtube, split_audio_to_chunks
+from utils.video_processing.video_to_audio import download_audio_from_youtube, remove_download
+from utils.video_processing.vad_segmenter import MAX_SEGMENT_SECONDS, split_audio_to_speech_segments
+from utils.video_processing.checkpoint import TranscriptionJournal, input_fingerprint
 from utils.video_processing.audio_to_text import (
+    extract_youtube_video_id,
     get_youtube_transcript,
     save_youtube_transcript,
-    transcribe_audio_to_text,
-    cleanup_temp
+    segments_path_for,
+    transcribe_audio_to_text
 )
-from utils.text_preprocessing.translator import translate_to_eng
-from utils.text_preprocessing.cleaner import clean_and_save_transcript
-from utils.text_preprocessing.chunker import chunk_and_save
-from utils.text_preprocessing.vectorizer import vectorize_chunks
+from utils.text_preprocessing.cleaner import read_blocks
+from utils.text_preprocessing.streaming_pipeline import StreamingTextPipeline
 from utils.llm_features.summarizer import generate_summary
 from utils.llm_features.notes_generator import generate_detailed_notes
+from utils.job_workspace import create_job_workspace, get_job_workspace
+from utils.job_queue import JobCancelled, QueueFull, job_scheduler
+from utils.video_processing.model_registry import whisper_registry
+from utils.model_manager import PREWARM, model_manager
+from utils.result_cache import result_cache
+from utils.transcript_cache import (
+    CACHE_ROOT,
+    transcript_cache,
+    youtube_cache_key,
+    upload_cache_key,
+    save_and_hash_upload
+)
 
 load_dotenv()
 
@@ -24,10 +45,63 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
+# Whisper model used for the fallback transcription (part of the cache key)
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "tiny")
+
+# Per-video transcription journals and downloads kept for resuming failed jobs
+CHECKPOINT_ROOT = os.path.join(CACHE_ROOT, "checkpoints")
+
 # Create necessary directories
 os.makedirs("data/uploads", exist_ok=True)
 os.makedirs("data/transcripts", exist_ok=True)
 
+
+def _request_job_id():
+    """Job ID sent by the client in the query string, form or JSON body."""
+    job_id = request.args.get('job_id') or request.form.get('job_id')
+    if not job_id and request.is_json:
+        job_id = (request.get_json(silent=True) or {}).get('job_id')
+    return job_id
+
+
+def resolve_workspace():
+    """
+    Workspace of the job named in the request, or None when no job ID was sent
+    (legacy single-video paths under data/transcripts are used in that case).
+    """
+    job_id = _request_job_id()
+    if not job_id:
+        return None
+    return get_job_workspace(job_id)
+
+
+# Seconds each endpoint took to serve its first request
+first_request_seconds = {}
+
+
+@app.before_request
+def _start_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def _record_first_request(response):
+    endpoint = request.endpoint or request.path
+    if endpoint not in first_request_seconds and hasattr(g, 'request_started'):
+        first_request_seconds[endpoint] = round(time.perf_counter() - g.request_started, 3)
+        logger.info(f"First request to {endpoint} took {first_request_seconds[endpoint]:.3f}s")
+    return response
+
+
+def prewarm_models():
+    """Load the models named in MODEL_PREWARM in background threads"""
+    names = [name.strip() for name in PREWARM.split(",") if name.strip()]
+    if "whisper" in names:
+        names.remove("whisper")
+        threading.Thread(target=whisper_registry.get, args=(WHISPER_MODEL,), daemon=True).start()
+    if names:
+        model_manager.prewarm(names)
+
 # ------------------- ROUTES -------------------
 
 @app.route('/transcript')
@@ -57,108 +131,354 @@ def home():
 
 @app.route('/process', methods=['POST'])
 def process_video():
-    """Handles both YouTube link and uploaded video file."""
+    """
+    Handles both YouTube link and uploaded video file.
+    Queues the work as a job and returns its ID at once (HTTP 202);
+    HTTP 429 when the job queue is full.
+    """
     youtube_url = request.form.get('video_url')
     file = request.files.get('video_file')
 
+    if not youtube_url and not file:
+        return jsonify({'status': 'error', 'message': 'No video or URL provided.'}), 400
+
+    workspace = None
     try:
-        transcript_path = None
+        # Every job gets its own artifact directory under data/jobs/<job_id>
+        workspace = create_job_workspace()
+        print(f"[INFO] Created job {workspace.job_id}")
 
-        # === Case 1: YouTube URL provided ===
+        # Content-addressed cache key: YouTube video ID or upload SHA-256 + model
+        cache_key = None
+        upload_path = None
         if youtube_url:
-            print("[INFO] YouTube URL received, attempting transcript fetch...")
-            text = get_youtube_transcript(youtube_url)
+            video_id = extract_youtube_video_id(youtube_url)
+            if video_id:
+                cache_key = youtube_cache_key(video_id, WHISPER_MODEL)
+        else:
+            # The upload stream only lives as long as this request
+            print("[INFO] Uploaded video file received, saving...")
+            filename = secure_filename(file.filename) or "uploaded_video"
+            upload_path = os.path.join(workspace.uploads_dir, filename)
+            cache_key = upload_cache_key(save_and_hash_upload(file.stream, upload_path), WHISPER_MODEL)
+
+        cached = transcript_cache.restore(cache_key, workspace) if cache_key else None
+        source = youtube_url or file.filename
+
+        # === Case 0: Same video processed before ===
+        if cached:
+            print("[INFO] Transcript found in cache, skipping transcription...")
+            workspace.remove_uploads()
+            # A complete cache hit already has every downstream artifact
+            steps = [] if cached.get("complete") else [("nlp", partial(nlp_stage, workspace=workspace, cache_key=cache_key))]
 
-            if text:
-                # Captions available then save directly
-                transcript_path = save_youtube_transcript(text)
-            else:
-                # No captions then fallback to Whisper
-                print("[INFO] Captions not available, using Whisper fallback...")
-                audio_path = download_audio_from_youtube(youtube_url)
-                chunks = split_audio_to_chunks(audio_path)
-                transcript_path = transcribe_audio_to_text(chunks)
-                cleanup_temp()
+        # === Case 1: YouTube URL provided ===
+        elif youtube_url:
+            steps = [
+                ("download", partial(download_stage, workspace=workspace, youtube_url=youtube_url, cache_key=cache_key)),
+                ("transcribe", partial(transcribe_stage, workspace=workspace, cache_key=cache_key, source=source)),
+                ("nlp", partial(nlp_stage, workspace=workspace, cache_key=cache_key)),
+            ]
 
         # === Case 2: Uploaded video file ===
-        elif file:
-            print("[INFO] Uploaded video file received, processing...")
-            upload_dir = "data/uploads"
-            os.makedirs(upload_dir, exist_ok=True)
-            upload_path = os.path.join(upload_dir, file.filename)
-            file.save(upload_path)
-
-            chunks = split_audio_to_chunks(upload_path)
-            transcript_path = transcribe_audio_to_text(chunks)
-            cleanup_temp()
-
         else:
-            return jsonify({'status': 'error', 'message': 'No video or URL provided.'}), 400
-
-        # Start background processing immediately after transcript is ready
-        import threading
-        background_thread = threading.Thread(
-            target=background_processing, 
-            args=(transcript_path,)
-        )
-        background_thread.daemon = True
-        background_thread.start()
-
-        # Return success immediately with transcript info
-        if os.path.exists(transcript_path):
-            with open(transcript_path, 'r', encoding='utf-8') as f:
+            steps = [
+                ("transcribe", partial(transcribe_stage, workspace=workspace, cache_key=cache_key,
+                                       source=source, media_path=upload_path)),
+                ("nlp", partial(nlp_stage, workspace=workspace, cache_key=cache_key)),
+            ]
+
+        try:
+            # Source media is only needed until transcription; don't keep it once the job is over
+            job = job_scheduler.submit(workspace.job_id, steps, data={'transcript_ready': bool(cached)},
+                                       on_finish=[workspace.remove_uploads])
+        except QueueFull:
+            workspace.remove()
+            response = jsonify({'status': 'error', 'message': 'Server is busy processing other videos. Please try again shortly.'})
+            response.headers['Retry-After'] = '30'
+            return response, 429
+
+        result = {
+            'status': 'success',
+            'job_id': workspace.job_id,
+            'cached': bool(cached),
+            'transcript_ready': job.data['transcript_ready'],
+            'job': job.to_dict(),
+            'message': 'Video queued for processing.'
+        }
+        if result['transcript_ready']:
+            with open(workspace.transcript_path, 'r', encoding='utf-8') as f:
                 transcript_content = f.read()
-            
-            return jsonify({
-                'status': 'success',
-                'transcript_ready': True,
-                'transcript_path': transcript_path,
-                'message': 'Video processed successfully!',
-                'transcript_preview': transcript_content[:500] + "..." if len(transcript_content) > 500 else transcript_content
-            })
-        else:
-            return jsonify({'status': 'error', 'message': 'Transcript generation failed'}), 500
+            result['transcript_path'] = workspace.transcript_path
+            result['message'] = 'Video processed successfully!'
+            result['transcript_preview'] = transcript_content[:500] + "..." if len(transcript_content) > 500 else transcript_content
+        return jsonify(result), 202
 
     except Exception as e:
         print(f"[ERROR] Processing failed: {e}")
+        if workspace and not job_scheduler.get(workspace.job_id):
+            workspace.remove()
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
-def background_processing(transcript_path):
-    """Run translation, cleaning, chunking and vectorization in background"""
-    try:
-        print("[BACKGROUND] Starting background processing...")
-        
-        # Translation
-        print("[BACKGROUND] Translating to English...")
-        output_path = translate_to_eng(transcript_path)
-
-        # Cleaning english text
-        print("[BACKGROUND] Cleaning transcript...")
-        cleaned_path = clean_and_save_transcript(output_path)
 
-        # Chunk cleaned transcript
-        print("[BACKGROUND] Chunking transcript...")
-        chunks_dir = chunk_and_save(cleaned_path)
+# ------------------- JOB STAGES -------------------
+
+def download_stage(job, workspace, youtube_url, cache_key=None):
+    """YouTube captions when available (no transcription needed), else the audio track"""
+    print("[INFO] YouTube URL received, attempting transcript fetch...")
+    text = get_youtube_transcript(youtube_url)
+    if text:
+        # Captions available then save directly
+        save_youtube_transcript(text, output_path=workspace.transcript_path)
+        if cache_key:
+            transcript_cache.store(cache_key, workspace, source=youtube_url, transcript_only=True)
+        job.data['transcript_ready'] = True
+        job.emit("transcript_ready", source="captions")
+        job.skip("transcribe")
+        return
+
+    # No captions then fallback to Whisper
+    print("[INFO] Captions not available, using Whisper fallback...")
+    job.raise_if_cancelled()
+    # Kept by video until transcription succeeds, so a retried job skips the download
+    if cache_key and claim_checkpoint(job, cache_key):
+        outname = checkpoint_path(cache_key, ".m4a")
+    else:
+        outname = workspace.audio_download_path()
+    job.data['audio_path'] = download_audio_from_youtube(youtube_url, outname=outname)
+
+
+def checkpoint_path(cache_key, suffix):
+    """Per-video resume state (journal, downloaded audio) that outlives the job workspace"""
+    return os.path.join(CHECKPOINT_ROOT, cache_key + suffix)
+
+
+# cache key -> ID of the job currently using that video's checkpoint files
+_checkpoint_owners = {}
+_checkpoint_owners_lock = threading.Lock()
+
+
+def claim_checkpoint(job, cache_key):
+    """
+    True if the job may use the checkpoint files of cache_key; held until
+    the job finishes. A second job of the same video gets False and works
+    in its own workspace (without resuming), so two jobs never download
+    into or append to the same files, or delete them under each other.
+    """
+    with _checkpoint_owners_lock:
+        owner = _checkpoint_owners.setdefault(cache_key, job.job_id)
+    if owner != job.job_id:
+        print(f"[INFO] Job {owner} is using the checkpoint of this video; job {job.job_id} starts fresh")
+        return False
+    if job.context.get('checkpoint') != cache_key:
+        job.context['checkpoint'] = cache_key
+
+        def release():
+            with _checkpoint_owners_lock:
+                if _checkpoint_owners.get(cache_key) == job.job_id:
+                    del _checkpoint_owners[cache_key]
+        job.on_finish(release)
+    return True
+
+
+def start_text_pipeline(job, workspace, wait=True):
+    """
+    Translate/clean/chunk/embed stages that consume the transcript while it
+    is produced. Waits for one of the limited pipeline slots, or with
+    wait=False returns None when none is free.
+    """
+    from utils.llm_features.qna import qna_engine
+
+    def on_event(event_type, **fields):
+        job.emit(event_type, **fields)
+        if event_type == "index_published":
+            # Answers given about an older snapshot of the chunks are stale now
+            qna_engine.invalidate(workspace.chunks_dir)
+            job.data['qna_ready'] = True
+
+    pipeline = StreamingTextPipeline(workspace.transcripts_dir, workspace.chunks_dir,
+                                     segments_path=segments_path_for(workspace.transcript_path),
+                                     on_event=on_event)
+    if not pipeline.start(wait=wait, check=job.raise_if_cancelled):
+        return None
+    # Don't leave stage threads waiting for input if the job ends another way
+    job.on_finish(pipeline.abort)
+    return pipeline
+
+
+def transcribe_stage(job, workspace, cache_key=None, source=None, media_path=None):
+    """Voice-activity segmentation and Whisper transcription, streamed into the text pipeline"""
+    print(f"[INFO] Transcribing job {workspace.job_id}...")
+    media_path = media_path or job.data['audio_path']
+    chunks = split_audio_to_speech_segments(media_path)
+    job.raise_if_cancelled()
+
+    # Segments finished by an earlier attempt on the same media are not transcribed again
+    journal = None
+    if cache_key and claim_checkpoint(job, cache_key):
+        fingerprint = input_fingerprint(media_path, model=WHISPER_MODEL, max_segment_secs=MAX_SEGMENT_SECONDS)
+        journal = TranscriptionJournal(checkpoint_path(cache_key, ".journal.jsonl"), fingerprint)
+
+    # NLP starts on the first segments instead of waiting for the whole video, if a
+    # pipeline slot is free; otherwise the nlp stage processes the finished transcript
+    pipeline = start_text_pipeline(job, workspace, wait=False)
+    if pipeline:
+        job.context['pipeline'] = pipeline
+    started = False
+
+    def on_progress(done, total, index, error):
+        job.emit("progress", done=done, total=total, chunk=index, error=error)
+        job.raise_if_cancelled()
+
+    def on_segment(index, text, error, span):
+        nonlocal started
+        if text and pipeline:
+            # Same "\n" separators as the transcript file
+            pipeline.feed(("\n" if started else "") + text)
+            started = True
 
-        # Vectorize chunks
-        print("[BACKGROUND] Vectorizing chunks...")
-        vectorized_path = vectorize_chunks(chunks_dir)
+    try:
+        transcribe_audio_to_text(chunks, model_name=WHISPER_MODEL, output_path=workspace.transcript_path,
+                                 on_progress=on_progress, on_segment=on_segment, journal=journal)
+    except BaseException as e:
+        job.context.pop('pipeline', None)
+        if pipeline:
+            pipeline.abort(e)
+        raise
+    if pipeline:
+        # Let it drain (and free its slot) while the job waits for an nlp worker
+        pipeline.close()
+    if cache_key:
+        # The pipeline may still be writing; the rest is cached once it has finished
+        transcript_cache.store(cache_key, workspace, source=source, transcript_only=True)
+    if journal:
+        # The transcript is safe in the cache; resume state is no longer needed
+        journal.remove()
+        if media_path == os.path.abspath(checkpoint_path(cache_key, ".m4a")):
+            remove_download(media_path)
+    # The nlp stage may wait for a worker; the media isn't needed any more
+    workspace.remove_uploads()
+    job.data['transcript_ready'] = True
+    job.emit("transcript_ready", source="whisper")
+
+
+def nlp_stage(job, workspace, cache_key=None):
+    """Finish translation, cleaning, chunking and vectorization of the transcript"""
+    background_processing(workspace.transcript_path, workspace, cache_key, job=job,
+                          pipeline=job.context.pop('pipeline', None))
+
+
+def background_processing(transcript_path, workspace, cache_key=None, job=None, pipeline=None):
+    """
+    Run translation, cleaning, chunking and vectorization as one streaming
+    pipeline; with pipeline (already fed by transcription) only wait for
+    it to drain. Errors propagate to the job.
+    """
+    try:
+        print(f"[BACKGROUND] Starting background processing for job {workspace.job_id}...")
+
+        check = job.raise_if_cancelled if job else None
+        if pipeline is None:
+            # Captions or a cached transcript: stream the file through
+            pipeline = (start_text_pipeline(job, workspace) if job else
+                        StreamingTextPipeline(workspace.transcripts_dir, workspace.chunks_dir,
+                                              segments_path=segments_path_for(transcript_path)).start())
+            try:
+                for block in read_blocks(transcript_path):
+                    pipeline.feed(block)
+            except BaseException as e:
+                pipeline.abort(e)
+        chunks_dir = pipeline.finish(check)
+
+        # Answers given about older chunks of this job are stale now
+        from utils.llm_features.qna import qna_engine
+        qna_engine.invalidate(chunks_dir)
+
+        # Keep the downstream artifacts so a repeat of this video is instant
+        if cache_key:
+            transcript_cache.store(cache_key, workspace)
 
         print("[BACKGROUND] All processing completed successfully!")
         
+    except JobCancelled:
+        raise
     except Exception as e:
         print(f"[BACKGROUND ERROR] Background processing failed: {e}")
+        raise
+
+
+@app.route('/jobs')
+def jobs_stats():
+    """Job queue depth, running stages and outcome counters"""
+    return jsonify(job_scheduler.stats())
+
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Status of a queued, running or recently finished job"""
+    status = job_scheduler.status(job_id)
+    if status is None:
+        return jsonify({'status': 'error', 'message': f'Unknown job ID: {job_id}'}), 404
+    return jsonify(status)
+
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """
+    Server-sent events stream of a job's progress: a "status" snapshot,
+    then stage_started/stage_finished, step, progress (transcribed chunks),
+    transcript_ready and finally completed, failed or cancelled.
+    Reconnecting clients resume after their Last-Event-ID.
+    """
+    job = job_scheduler.get(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': f'Unknown job ID: {job_id}'}), 404
+    try:
+        after = int(request.headers.get('Last-Event-ID') or request.args.get('after') or 0)
+    except ValueError:
+        after = 0
+
+    def stream():
+        # Snapshot first so a late subscriber knows where the job stands
+        yield f"event: status\ndata: {json.dumps(job.to_dict())}\n\n"
+        for event in job_scheduler.iter_events(job_id, after=after):
+            if event is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"id: {event['seq']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+    return Response(stream_with_context(stream()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Cancel a queued or running job"""
+    if job_scheduler.status(job_id) is None:
+        return jsonify({'status': 'error', 'message': f'Unknown job ID: {job_id}'}), 404
+    if not job_scheduler.cancel(job_id):
+        return jsonify({'status': 'error', 'message': 'Job already finished', 'job': job_scheduler.status(job_id)}), 409
+    return jsonify({'status': 'success', 'job': job_scheduler.status(job_id)})
 
 @app.route('/check_processing_status')
 def check_processing_status():
     """Check if background processing is complete"""
     try:
+        workspace = resolve_workspace()
+
         # Check if all required files exist
-        required_files = [
-            "data/transcripts/transcript_english.txt",
-            "data/transcripts/cleaned_transcript.txt",
-            "data/chunks/chunk_0.txt"  # Check if at least one chunk exists
-        ]
+        if workspace:
+            required_files = [
+                workspace.english_path,
+                workspace.cleaned_path,
+                workspace.embeddings_path
+            ]
+        else:
+            required_files = [
+                "data/transcripts/transcript_english.txt",
+                "data/transcripts/transcript_cleaned.txt",
+                "data/text chunks/chunks.jsonl"  # Check that chunks were written
+            ]
         
         status = "processing"
         completed_files = []
@@ -173,13 +493,25 @@ def check_processing_status():
             status = "partial"
         else:
             status = "processing"
+
+        # A failed or cancelled job will never produce the missing files
+        job = job_scheduler.status(workspace.job_id) if workspace else None
+        if job and job['status'] in ("failed", "cancelled") and status != "completed":
+            status = job['status']
+        # Embeddings are published part-way; the files are final once the job is done
+        elif job and job['status'] != "completed" and status == "completed":
+            status = "partial"
             
         return jsonify({
             'status': status,
             'completed_files': completed_files,
-            'total_files': len(required_files)
+            'total_files': len(required_files),
+            'qna_ready': os.path.exists(required_files[-1]),
+            'job': job
         })
         
+    except (ValueError, FileNotFoundError) as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 404
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)})
 
@@ -188,16 +520,18 @@ def summarize_video():
     try:
         logger.info("Starting summary generation using preprocessed chunks")
         
+        workspace = resolve_workspace()
+
         # Generate summary using preprocessed chunks
         from utils.llm_features.summarizer import generate_summary
-        summary = generate_summary()
+        summary = generate_summary(workspace.cleaned_path if workspace else None)
         
         word_count = len(summary.split())
         logger.info(f"Summary generated: {word_count} words")
         
         # Save summary to file
-        summary_path = "data/transcripts/summary.txt"
-        os.makedirs("data/transcripts", exist_ok=True)
+        summary_path = workspace.summary_path if workspace else "data/transcripts/summary.txt"
+        os.makedirs(os.path.dirname(summary_path), exist_ok=True)
         with open(summary_path, "w", encoding="utf-8") as f:
             f.write(summary)
         
@@ -207,6 +541,8 @@ def summarize_video():
             "word_count": word_count
         })
         
+    except (ValueError, FileNotFoundError) as e:
+        return jsonify({"error": str(e)}), 404
     except Exception as e:
         logger.error(f"Error in summarize_video route: {str(e)}")
         return jsonify({"error": str(e)}), 500
@@ -216,16 +552,18 @@ def generate_notes():
     try:
         logger.info("Starting detailed notes generation using preprocessed chunks")
         
+        workspace = resolve_workspace()
+
         # Generate detailed notes using preprocessed chunks
         from utils.llm_features.notes_generator import generate_detailed_notes
-        notes = generate_detailed_notes()
+        notes = generate_detailed_notes(workspace.cleaned_path if workspace else None)
         
         word_count = len(notes.split())
         logger.info(f"Detailed notes generated: {word_count} words")
         
         # Save notes to file
-        notes_path = "data/transcripts/detailed_notes.txt"
-        os.makedirs("data/transcripts", exist_ok=True)
+        notes_path = workspace.notes_path if workspace else "data/transcripts/detailed_notes.txt"
+        os.makedirs(os.path.dirname(notes_path), exist_ok=True)
         with open(notes_path, "w", encoding="utf-8") as f:
             f.write(notes)
         
@@ -236,35 +574,69 @@ def generate_notes():
             "message": "Detailed notes generated successfully"
         })
         
+    except (ValueError, FileNotFoundError) as e:
+        return jsonify({"error": str(e)}), 404
     except Exception as e:
         logger.error(f"Error in generate_notes route: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-        # Cleaning english text
-        print("[BACKGROUND] Cleaning transcript...")
-        cleaned_path = clean_and_save_transcript(output_path)
 
-        # Chunk cleaned transcript
-        print("[BACKGROUND] Chunking transcript...")
-        chunks_dir = chunk_and_save(cleaned_path)
+@app.route('/ask', methods=['POST'])
+def ask_question():
+    """Answer a question about the video from its vectorized chunks"""
+    try:
+        data = request.get_json(silent=True) or {}
+        question = (data.get('question') or '').strip()
+        if not question:
+            return jsonify({"error": "No question provided"}), 400
 
-        # Vectorize chunks
-        print("[BACKGROUND] Vectorizing chunks...")
-        vectorized_path = vectorize_chunks(chunks_dir)
+        workspace = resolve_workspace()
 
-        print("[BACKGROUND] All processing completed successfully!")
-        
+        from utils.llm_features.qna import answer_question
+        result = answer_question(question, workspace.chunks_dir if workspace else None,
+                                 top_k=int(data.get('top_k') or 5))
+
+        return jsonify({
+            "status": "success",
+            "answer": result["answer"],
+            "chunks": result["chunks"],
+            "cached": result["cached"]
+        })
+
+    except (ValueError, FileNotFoundError) as e:
+        return jsonify({"error": str(e)}), 404
     except Exception as e:
-        print(f"[BACKGROUND ERROR] Background processing failed: {e}")
+        logger.error(f"Error in ask route: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/ask_cache_stats')
+def ask_cache_stats():
+    """Hit/miss counters and size of the semantic answer cache"""
+    from utils.llm_features.answer_cache import answer_cache
+    return jsonify(answer_cache.stats())
+
+
+@app.route('/model_stats')
+def model_stats():
+    """Resident models, their load times, result cache, startup and first-request latency"""
+    return jsonify({
+        "whisper": whisper_registry.stats(),
+        "models": model_manager.stats(),
+        "results": result_cache.stats(),
+        "startup_seconds": STARTUP_SECONDS,
+        "first_request_seconds": dict(first_request_seconds)
+    })
 
 
 @app.route('/get_transcript')
 def get_transcript():
     """Serve transcript data"""
     try:
+        workspace = resolve_workspace()
+
         # Check for original transcript
-        transcript_path = "data/transcripts/transcript.txt"
-        english_path = "data/transcripts/transcript_english.txt"
+        transcript_path = workspace.transcript_path if workspace else "data/transcripts/transcript.txt"
+        english_path = workspace.english_path if workspace else "data/transcripts/transcript_english.txt"
         
         if os.path.exists(transcript_path):
             with open(transcript_path, 'r', encoding='utf-8') as f:
@@ -288,6 +660,8 @@ def get_transcript():
                 'message': 'No transcript found. Please process a video first.'
             })
             
+    except (ValueError, FileNotFoundError) as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 404
     except Exception as e:
         logger.error(f"Error getting transcript: {str(e)}")
         return jsonify({'status': 'error', 'message': str(e)})
@@ -299,9 +673,11 @@ def translate_transcript():
         data = request.get_json()
         transcript = data.get('transcript', '')
         
+        workspace = resolve_workspace()
+
         # Your translation logic here
         # For now, we'll just return the English version if it exists
-        english_path = "data/transcripts/transcript_english.txt"
+        english_path = workspace.english_path if workspace else "data/transcripts/transcript_english.txt"
         
         if os.path.exists(english_path):
             with open(english_path, 'r', encoding='utf-8') as f:
@@ -317,11 +693,22 @@ def translate_transcript():
                 'message': 'English translation not available'
             })
             
+    except (ValueError, FileNotFoundError) as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 404
     except Exception as e:
         logger.error(f"Translation error: {str(e)}")
         return jsonify({'status': 'error', 'message': str(e)})
     
 
+# Import and setup time; models load lazily (or pre-warm in the background)
+STARTUP_SECONDS = round(time.perf_counter() - _STARTED, 3)
+logger.info(f"App ready in {STARTUP_SECONDS:.2f}s")
+# Only in the serving process: not in the debug reloader's watcher, and not in the
+# spawned Whisper workers, which import this module as __mp_main__
+if (multiprocessing.parent_process() is None
+        and (__name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true')):
+    prewarm_models()
+
 # ------------------- MAIN -------------------
 if __name__ == '__main__':
     app.run(debug=True)
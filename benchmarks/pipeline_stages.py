@@ -0,0 +1,472 @@
+# benchmarks/pipeline_stages.py
+# Usage: python -m benchmarks.pipeline_stages [--stages clean_and_save_transcript ...]
+#        [--words 1000 10000 100000 1000000] [--audio-minutes 1 10 30] [--repeat 3]
+#        [--baseline benchmarks/pipeline_baseline.json] [--save-baseline] [--tolerance 0.2]
+# Times each pipeline stage on synthetic inputs (sine/noise audio, generated
+# transcripts) with deterministic stub models, so it runs offline on CPU.
+# Records wall time, peak RSS and throughput per stage and size, compares
+# them with a JSON baseline and flags regressions and failed cases (exit status 1).
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import random
+import re
+import tempfile
+import time
+import wave
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from types import SimpleNamespace
+
+import numpy as np
+
+BASELINE_PATH = os.path.join("benchmarks", "pipeline_baseline.json")
+SAMPLE_RATE = 16000
+WINDOW_SECONDS = 30
+STUB_EMBEDDING_DIM = 384
+# Differences below these are noise, however large in percent
+MIN_REGRESSION_SECONDS = 0.05
+MIN_REGRESSION_MB = 16
+
+_TOKEN_RE = re.compile(r"\S+")
+
+ENGLISH_WORDS = (
+    "the a of and to in is that this we it for on with as are be by what how why "
+    "important key main because therefore function model data learning network value "
+    "equation example gradient derivative matrix vector probability theorem proof "
+    "algorithm layer training error result lecture topic next step first second"
+).split()
+SPANISH_WORDS = (
+    "el la de que y en los se del las un por con una para es al lo como más pero "
+    "función modelo datos aprendizaje red valor ecuación ejemplo derivada matriz "
+    "vector probabilidad teorema prueba algoritmo capa error resultado clase tema"
+).split()
+
+
+# ---------- synthetic inputs ----------
+
+def synthetic_audio(seconds, sample_rate=SAMPLE_RATE, seed=0):
+    """Tone bursts of 2-6 s separated by short pauses, over light noise (speech-like on/off pattern)."""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * sample_rate)
+    audio = 0.01 * rng.standard_normal(n)
+    pos = 0
+    while pos < n:
+        length = int(rng.uniform(2, 6) * sample_rate)
+        t = np.arange(min(length, n - pos)) / sample_rate
+        audio[pos:pos + len(t)] += 0.3 * np.sin(2 * np.pi * rng.uniform(120, 300) * t)
+        pos += length + int(rng.uniform(0.3, 1.2) * sample_rate)
+    return audio.astype(np.float32)
+
+
+def write_wav(path, audio, sample_rate=SAMPLE_RATE):
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes((np.clip(audio, -1, 1) * 32767).astype("<i2").tobytes())
+    return path
+
+
+def synthetic_transcript(words, vocabulary=ENGLISH_WORDS, seed=0):
+    """
+    Sentences of 6-24 words with the noise the cleaner removes: a timestamp
+    every few sentences, stray symbols and doubled spaces.
+    """
+    rng = random.Random(seed)
+    parts, written, sentence = [], 0, 0
+    while written < words:
+        length = min(rng.randint(6, 24), words - written)
+        text = " ".join(rng.choice(vocabulary) for _ in range(length))
+        sentence += 1
+        if sentence % 5 == 0:
+            parts.append(f"[{sentence // 3600:02d}:{sentence // 60 % 60:02d}:{sentence % 60:02d}]")
+        if sentence % 11 == 0:
+            parts.append("(१२:३४) ")  # Devanagari digits are timestamps too
+        if sentence % 7 == 0:
+            text += "  ♪ ~"
+        parts.append(text[0].upper() + text[1:] + (". " if sentence % 9 else "? "))
+        written += length
+    return "".join(parts)
+
+
+def write_transcript(workdir, words, vocabulary=ENGLISH_WORDS, name="transcript.txt"):
+    path = os.path.join(workdir, name)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(synthetic_transcript(words, vocabulary))
+    return path
+
+
+# ---------- stub models ----------
+
+def _word_index(word):
+    return zlib.crc32(word.encode("utf-8"))
+
+
+class StubWhisperModel:
+    """Emits a word per ~0.4 s of audio above the noise floor; cost grows with the audio length."""
+
+    def __init__(self, model_name="stub"):
+        self.name = model_name
+
+    def transcribe(self, audio, **kwargs):
+        audio = np.asarray(audio, dtype=np.float32)
+        frame = SAMPLE_RATE * 2 // 5
+        frames = audio[:len(audio) // frame * frame].reshape(-1, frame)
+        energies = np.sqrt(np.mean(frames * frames, axis=1)) if len(frames) else np.zeros(0)
+        words = [ENGLISH_WORDS[int(e * 1e4) % len(ENGLISH_WORDS)] for e in energies if e > 0.05]
+        return {"text": " ".join(words) + "." if words else ""}
+
+
+class StubTokenizer:
+    """Whitespace tokenizer with the call signature the token chunker uses."""
+
+    def __call__(self, texts, add_special_tokens=False, return_offsets_mapping=True):
+        return {"offset_mapping": [[m.span() for m in _TOKEN_RE.finditer(text)] for text in texts]}
+
+    def num_special_tokens_to_add(self):
+        return 2
+
+
+class StubTranslationBackend:
+    """Tags every piece instead of translating it; never fails."""
+
+    name = "stub"
+    max_chars = 4000
+
+    def translate_batch(self, texts, dest="en"):
+        return [f"[{dest}] {text}" for text in texts]
+
+
+class StubSummarizationPipeline:
+    """Every n-th word of the input, up to max_length words; counts its calls."""
+
+    def __init__(self):
+        self.tokenizer = StubTokenizer()
+        self.model = SimpleNamespace(name_or_path="stub-summarizer")
+        self.calls = 0
+
+    def __call__(self, inputs, max_length=150, min_length=0, **kwargs):
+        self.calls += 1
+        outputs = []
+        for text in [inputs] if isinstance(inputs, str) else inputs:
+            words = text.split()
+            step = max(1, len(words) // max(1, max_length))
+            outputs.append({"summary_text": " ".join(words[::step][:max_length])})
+        return outputs
+
+
+class StubSentenceEncoder:
+    """Hashed bag-of-words vectors, so equal texts always get equal embeddings."""
+
+    max_seq_length = 256
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=True, **kwargs):
+        vectors = np.zeros((len(texts), STUB_EMBEDDING_DIM), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.split():
+                vectors[row, _word_index(word) % STUB_EMBEDDING_DIM] += 1
+        if normalize_embeddings:
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors
+
+
+def _use_stub_whisper():
+    from utils.video_processing import model_registry
+    model_registry.whisper_registry = model_registry.WhisperModelRegistry(loader=StubWhisperModel)
+
+
+def _use_stub_summarizer():
+    from utils.model_manager import model_manager
+    if not model_manager.is_loaded("summarization"):
+        pipeline = StubSummarizationPipeline()
+        model_manager.register("summarization", lambda: pipeline)
+    pipeline = model_manager.get("summarization")
+    pipeline.calls = 0
+    return pipeline
+
+
+def _use_fresh_caches(workdir):
+    """Result and chunk-summary caches in workdir, so every run computes from scratch."""
+    from utils.llm_features import map_reduce, notes_generator, summarizer
+    from utils.result_cache import ResultCache
+    results = ResultCache(os.path.join(workdir, "results"))
+    summarizer.result_cache = notes_generator.result_cache = results
+    map_reduce.summary_cache = map_reduce.SummaryCache(os.path.join(workdir, "chunk_summaries.jsonl"))
+
+
+# ---------- stages ----------
+# Each setup(size, workdir) prepares inputs (untimed) and returns the call to time.
+
+def _setup_split_audio(minutes, workdir):
+    from utils.video_processing.video_to_audio import split_audio_to_chunks
+    path = write_wav(os.path.join(workdir, "audio.wav"), synthetic_audio(minutes * 60))
+
+    def run():
+        if not sum(1 for _ in split_audio_to_chunks(path, chunk_secs=WINDOW_SECONDS)):
+            raise RuntimeError("no audio windows decoded")
+    return run
+
+
+def _setup_transcribe(minutes, workdir):
+    _use_stub_whisper()
+    from utils.video_processing.audio_to_text import transcribe_audio_to_text
+    audio = synthetic_audio(minutes * 60)
+    step = WINDOW_SECONDS * SAMPLE_RATE
+    windows = [audio[i:i + step] for i in range(0, len(audio), step)]
+    output_path = os.path.join(workdir, "transcripts", "transcript.txt")
+    return lambda: transcribe_audio_to_text(windows, model_name="stub", output_path=output_path,
+                                            workers=1, batch_size=1)
+
+
+def _setup_translate(words, workdir):
+    from utils.text_preprocessing import translation_backends, translator
+    translation_backends._BACKENDS[StubTranslationBackend.name] = StubTranslationBackend
+    os.environ["TRANSLATION_BACKEND"] = StubTranslationBackend.name
+    translator.translation_cache = translator.TranslationCache(os.path.join(workdir, "translations.jsonl"))
+    path = write_transcript(workdir, words, SPANISH_WORDS)
+
+    def run():
+        if translator.translate_to_eng(path, output_dir=os.path.join(workdir, "out")) == path:
+            raise RuntimeError("translate_to_eng failed")
+    return run
+
+
+def _setup_clean(words, workdir):
+    from utils.text_preprocessing.cleaner import clean_and_save_transcript, clean_text, iter_clean_text
+    path = write_transcript(workdir, words)
+    # Streaming must not change the result wherever a block ends: feed a sample one character at a time
+    sample = synthetic_transcript(min(words, 2000))
+    if "".join(iter_clean_text(sample)) != clean_text(sample):
+        raise RuntimeError("iter_clean_text over small blocks differs from cleaning the whole text")
+
+    def run():
+        if not clean_and_save_transcript(path, output_dir=os.path.join(workdir, "out")):
+            raise RuntimeError("clean_and_save_transcript failed")
+    return run
+
+
+def _setup_chunk(words, workdir):
+    from utils.text_preprocessing.chunker import chunk_text
+    text = synthetic_transcript(words)
+    return lambda: chunk_text(text)
+
+
+def _setup_chunk_tokens(words, workdir):
+    from utils.text_preprocessing.chunker import chunk_text_tokens
+    text = synthetic_transcript(words)
+    return lambda: chunk_text_tokens(text, "embedding", tokenizer=StubTokenizer())
+
+
+def _setup_vectorize(words, workdir):
+    from utils.model_manager import model_manager
+    from utils.text_preprocessing.chunker import chunk_and_save
+    from utils.text_preprocessing.vectorizer import vectorize_chunks
+    encoder = StubSentenceEncoder()
+    model_manager.register("embedding", lambda: encoder)
+    chunks_dir = chunk_and_save(write_transcript(workdir, words), output_dir=os.path.join(workdir, "chunks"))
+
+    def run():
+        if not vectorize_chunks(chunks_dir):
+            raise RuntimeError("vectorize_chunks failed")
+    return run
+
+
+def _setup_summary(words, workdir):
+    pipeline = _use_stub_summarizer()
+    _use_fresh_caches(workdir)
+    from utils.llm_features.summarizer import generate_summary
+    path = write_transcript(workdir, words)
+
+    def run():
+        generate_summary(path)
+        if not pipeline.calls:
+            raise RuntimeError("generate_summary fell back without calling the model")
+    return run
+
+
+def _setup_notes(words, workdir):
+    pipeline = _use_stub_summarizer()
+    _use_fresh_caches(workdir)
+    from utils.llm_features.notes_generator import generate_detailed_notes
+    path = write_transcript(workdir, words)
+
+    def run():
+        generate_detailed_notes(path)
+        if words > 100 and not pipeline.calls:
+            raise RuntimeError("generate_detailed_notes fell back without calling the model")
+    return run
+
+
+# name -> (setup, input kind); audio sizes are minutes, text sizes words
+STAGES = {
+    "split_audio_to_chunks": (_setup_split_audio, "audio"),
+    "transcribe_audio_to_text": (_setup_transcribe, "audio"),
+    "translate_to_eng": (_setup_translate, "text"),
+    "clean_and_save_transcript": (_setup_clean, "text"),
+    "chunk_text": (_setup_chunk, "text"),
+    "chunk_text_tokens": (_setup_chunk_tokens, "text"),
+    "vectorize_chunks": (_setup_vectorize, "text"),
+    "generate_summary": (_setup_summary, "text"),
+    "generate_detailed_notes": (_setup_notes, "text"),
+}
+
+
+# ---------- measurement ----------
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB (None if unknown)."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes on Linux, bytes on macOS
+        return round(peak / (1024 * 1024 if platform.system() == "Darwin" else 1024), 1)
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return round(psutil.Process().memory_info().peak_wset / (1024 * 1024), 1)
+    except (ImportError, AttributeError):
+        return None
+
+
+def run_case(stage, size, repeat):
+    """
+    Runs in a fresh process, so peak RSS belongs to this stage alone.
+    Returns the best wall time of `repeat` runs, each on fresh inputs.
+    """
+    logging.disable(logging.INFO)
+    setup, _ = STAGES[stage]
+    timings = []
+    try:
+        for _ in range(repeat):
+            with tempfile.TemporaryDirectory(prefix="bench-") as workdir, \
+                    open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                cwd = os.getcwd()
+                os.chdir(workdir)  # stray relative writes (data/cache/...) stay in the temp dir
+                try:
+                    run = setup(size, workdir)
+                    start = time.perf_counter()
+                    run()
+                    timings.append(time.perf_counter() - start)
+                finally:
+                    os.chdir(cwd)
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+    return {"wall_s": round(min(timings), 4), "peak_rss_mb": peak_rss_mb()}
+
+
+def case_key(stage, size):
+    return f"{stage}@{size}{'min' if STAGES[stage][1] == 'audio' else 'w'}"
+
+
+def measure(stage, size, repeat):
+    # spawn: no state (loaded stubs, allocator high-water mark) leaks between cases
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        result = pool.submit(run_case, stage, size, repeat).result()
+    kind = STAGES[stage][1]
+    result.update(stage=stage, size=size, unit="audio_s/s" if kind == "audio" else "words/s")
+    if "wall_s" in result:
+        work = size * 60 if kind == "audio" else size
+        result["throughput"] = round(work / max(result["wall_s"], 1e-9), 1)
+    return result
+
+
+def compare(result, base, tolerance, rss_tolerance):
+    """Regression flags of result against its baseline entry."""
+    if "error" in result:
+        return ["error"]
+    if not base or "wall_s" not in base:
+        return ["new"]
+    flags = []
+    if (result["wall_s"] > base["wall_s"] * (1 + tolerance)
+            and result["wall_s"] - base["wall_s"] > MIN_REGRESSION_SECONDS):
+        flags.append("SLOWER")
+    if (result.get("peak_rss_mb") and base.get("peak_rss_mb")
+            and result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + rss_tolerance)
+            and result["peak_rss_mb"] - base["peak_rss_mb"] > MIN_REGRESSION_MB):
+        flags.append("MORE MEMORY")
+    return flags or ["ok"]
+
+
+def load_baseline(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_baseline(path, results, previous):
+    entries = dict(previous.get("results", {}))
+    entries.update({key: result for key, result in results.items() if "error" not in result})
+    baseline = {
+        "machine": {"platform": platform.platform(), "python": platform.python_version(),
+                    "cpus": os.cpu_count()},
+        "updated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": entries,
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline stage benchmarks with stub models")
+    parser.add_argument("--stages", nargs="+", choices=sorted(STAGES), default=list(STAGES))
+    parser.add_argument("--words", type=int, nargs="+", default=[1000, 10000, 100000, 1000000],
+                        help="synthetic transcript sizes")
+    parser.add_argument("--audio-minutes", type=int, nargs="+", default=[1, 10, 30],
+                        help="synthetic audio lengths")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case; the fastest counts")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed wall-time increase (0.2 = 20%%)")
+    parser.add_argument("--rss-tolerance", type=float, default=0.1, help="allowed peak RSS increase")
+    args = parser.parse_args()
+
+    previous = load_baseline(args.baseline)
+    base_results = previous.get("results", {})
+    print(f"{'stage':<28}{'size':>9}{'wall s':>10}{'throughput':>21}{'peak MB':>10}{'vs base':>9}  status")
+    results, regressions, failures = {}, 0, 0
+    for stage in args.stages:
+        sizes = args.audio_minutes if STAGES[stage][1] == "audio" else args.words
+        for size in sizes:
+            key = case_key(stage, size)
+            result = results[key] = measure(stage, size, max(1, args.repeat))
+            base = base_results.get(key)
+            flags = compare(result, base, args.tolerance, args.rss_tolerance)
+            regressions += any(flag.isupper() for flag in flags)
+            size_label = key.split("@")[1]
+            if "error" in result:
+                failures += 1
+                print(f"{stage:<28}{size_label:>9}  error: {result['error']}")
+                continue
+            change = (f"{(result['wall_s'] / base['wall_s'] - 1) * 100:>+8.0f}%"
+                      if base and base.get("wall_s") else f"{'-':>9}")
+            peak = f"{result['peak_rss_mb']:>10.0f}" if result["peak_rss_mb"] is not None else f"{'-':>10}"
+            print(f"{stage:<28}{size_label:>9}{result['wall_s']:>10.3f}"
+                  f"{result['throughput']:>11.0f} {result['unit']:<9}{peak}{change}  {', '.join(flags)}")
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results, previous)
+        print(f"Baseline saved to {args.baseline}"
+              + (f" without the {failures} failed case(s)" if failures else ""))
+    elif regressions:
+        print(f"{regressions} case(s) regressed against {args.baseline}")
+    if failures:
+        print(f"{failures} case(s) failed")
+    # A stage that crashes must fail the run, baseline update or not
+    if failures or (regressions and not args.save_baseline):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# benchmarks/qna_retrieval.py
+# Usage: python -m benchmarks.qna_retrieval [--chunks 100000] [--dim 384] [--queries 500] [--k 5]
+# Measures per-question top-k search latency (p50/p95) of the flat and IVF
+# Q&A indexes over synthetic unit embeddings, and the IVF recall against
+# the exact flat results.
+
+import argparse
+import time
+
+import numpy as np
+
+from utils.llm_features.qna import FlatIndex, IVFIndex, normalize_rows
+
+
+def synthetic_embeddings(count, dim, topics=256, seed=0):
+    """Unit vectors scattered around topic centers, like chunks of many lectures."""
+    rng = np.random.default_rng(seed)
+    centers = normalize_rows(rng.standard_normal((topics, dim)))
+    vectors = centers[rng.integers(topics, size=count)] + 0.6 * rng.standard_normal((count, dim)) / np.sqrt(dim)
+    return normalize_rows(vectors)
+
+
+def time_queries(index, queries, k, **kwargs):
+    """Latency of each question searched on its own (as the /ask route does), in ms."""
+    timings, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        ids, _ = index.search(query[None, :], k, **kwargs)
+        timings.append((time.perf_counter() - start) * 1000)
+        results.append(ids[0])
+    return np.array(timings), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Q&A retrieval latency")
+    parser.add_argument("--chunks", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, 32])
+    args = parser.parse_args()
+
+    vectors = synthetic_embeddings(args.chunks, args.dim)
+    queries = synthetic_embeddings(args.queries, args.dim, seed=1)
+
+    flat = FlatIndex(vectors)
+    flat.search(queries[:1], args.k)  # warm up BLAS outside the timings
+    flat_ms, exact = time_queries(flat, queries, args.k)
+
+    start = time.perf_counter()
+    ivf = IVFIndex(vectors)
+    build_s = time.perf_counter() - start
+
+    print(f"{args.chunks} chunks x {args.dim} dims, {args.queries} queries, k={args.k}")
+    print(f"{'index':>12}{'p50 ms':>10}{'p95 ms':>10}{'recall':>10}")
+    print(f"{'flat':>12}{np.percentile(flat_ms, 50):>10.2f}{np.percentile(flat_ms, 95):>10.2f}{1.0:>10.3f}")
+    for nprobe in args.nprobe:
+        ivf_ms, approx = time_queries(ivf, queries, args.k, nprobe=nprobe)
+        recall = np.mean([len(set(a) & set(b)) / len(a) for a, b in zip(exact, approx)])
+        print(f"{f'ivf/{nprobe}':>12}{np.percentile(ivf_ms, 50):>10.2f}{np.percentile(ivf_ms, 95):>10.2f}{recall:>10.3f}")
+    print(f"IVF build: {build_s:.1f}s ({ivf.nlist} lists)")
+
+
+if __name__ == "__main__":
+    main()
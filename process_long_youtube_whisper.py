@@ -2,87 +2,235 @@
 # Usage: python process_long_youtube_whisper.py
 # It will ask for a YouTube URL (or local filename).
 # Output: transcript_long.txt
+#
+# Batch mode (no prompts): python process_long_youtube_whisper.py --batch SOURCE [--output-dir DIR]
+# SOURCE is a playlist URL or a text file with one URL / local path per line.
+# Writes one transcript per video into DIR and prints a throughput report.
 
+import argparse
 import os
+import re
 import sys
 import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import yt_dlp
-from pydub import AudioSegment
-import whisper
-import math
+
+from utils.video_processing.checkpoint import TranscriptionJournal, input_fingerprint
+from utils.video_processing.parallel_transcriber import default_worker_count, transcribe_chunks_parallel
+from utils.video_processing.video_to_audio import (
+    audio_duration,
+    list_playlist,
+    record_download,
+    remove_download,
+    stream_audio_windows,
+    verified_download,
+)
+from utils.video_processing.vad_segmenter import split_audio_to_speech_segments
 
 # ---------- Configuration ----------
 CHUNK_SECONDS = 60          # chunk size in seconds (change to 30 or 120 if you want)
 MODEL_NAME = "base"         # choose "tiny","base","small","medium" depending on speed/accuracy
+WORKERS = None              # transcription processes (None = size to the CPU count)
+BATCH_SIZE = 8              # 30-second windows decoded together (1 = model.transcribe per chunk)
+USE_VAD = True              # cut on pauses and skip silence instead of fixed CHUNK_SECONDS cuts
 OUTPUT_TRANSCRIPT = "transcript_long.txt"
+JOURNAL_PATH = OUTPUT_TRANSCRIPT + ".journal.jsonl"  # per-chunk checkpoints; a rerun resumes from it
 TMP_DIR = "whisper_chunks"
 AUDIO_FILENAME = "downloaded_audio.m4a"  # audio downloaded from yt-dlp
+# Batch mode
+BATCH_OUTPUT_DIR = "transcripts"  # one transcript per video
+DOWNLOAD_WORKERS = 3        # concurrent yt-dlp downloads
+TRANSCRIBE_JOBS = 1         # videos transcribed at once (they share the WORKERS processes)
 # -----------------------------------
 
-def download_audio_from_youtube(url, outname=AUDIO_FILENAME):
+def download_audio_from_youtube(url, outname=AUDIO_FILENAME, quiet=False):
+    if verified_download(url, outname):
+        print("Reusing audio downloaded by an earlier run:", outname)
+        return os.path.abspath(outname)
     opts = {
         "format": "bestaudio/best",
         "outtmpl": outname,
-        "quiet": False,
+        "quiet": quiet,
         "no_warnings": True,
+        "overwrites": True,
     }
     try:
         with yt_dlp.YoutubeDL(opts) as ydl:
             print("Downloading audio from YouTube (may take a minute)...")
             ydl.download([url])
+        record_download(url, outname)
         print("Downloaded:", outname)
         return os.path.abspath(outname)
     except Exception as e:
         print("Download failed:", e)
         return None
 
-def split_audio_to_chunks(audio_path, chunk_secs=CHUNK_SECONDS, out_dir=TMP_DIR):
-    if not os.path.exists(out_dir):
-        os.makedirs(out_dir)
-    audio = AudioSegment.from_file(audio_path)
-    total_ms = len(audio)
-    chunk_ms = chunk_secs * 1000
-    chunks = []
-    num_chunks = math.ceil(total_ms / chunk_ms)
-    print(f"Total audio length: {total_ms/1000:.1f}s -> creating {num_chunks} chunks of {chunk_secs}s")
-    for i in range(0, total_ms, chunk_ms):
-        j = i // chunk_ms
-        chunk = audio[i:i+chunk_ms]
-        filename = os.path.join(out_dir, f"chunk_{j:04d}.wav")
-        chunk.export(filename, format="wav")
-        chunks.append(filename)
-    return chunks
-
-def transcribe_chunks_with_whisper(chunks, model_name=MODEL_NAME, output_path=OUTPUT_TRANSCRIPT):
-    print("Loading Whisper model:", model_name)
-    model = whisper.load_model(model_name)   # may download model first time
-    recognitions = []
-    for idx, chunk_file in enumerate(chunks, start=1):
-        print(f"Transcribing chunk {idx}/{len(chunks)} -> {chunk_file}")
-        # We use model.transcribe which handles audio file reading via ffmpeg
-        try:
-            res = model.transcribe(chunk_file)
-            text = res.get("text", "").strip()
-        except Exception as e:
-            print("Whisper error on chunk:", e)
-            text = ""
-        recognitions.append((chunk_file, text))
+def split_audio_to_chunks(audio_path, chunk_secs=CHUNK_SECONDS, use_vad=USE_VAD):
+    # Streams 16 kHz mono windows from an ffmpeg pipe; no chunk files are written
+    if use_vad:
+        print("Streaming audio as speech segments (silence is skipped)")
+        return split_audio_to_speech_segments(audio_path)
+    print(f"Streaming audio in chunks of {chunk_secs}s")
+    return stream_audio_windows(audio_path, window_secs=chunk_secs)
+
+def transcribe_chunks_with_whisper(chunks, model_name=MODEL_NAME, output_path=OUTPUT_TRANSCRIPT, workers=WORKERS,
+                                   chunk_secs=CHUNK_SECONDS, batch_size=BATCH_SIZE, journal=None):
+    print("Using Whisper model:", model_name)
+    # Chunks are spread over worker processes and come back in order;
+    # a failing chunk yields empty text instead of aborting the run.
+    # Each finished chunk is checkpointed in the journal; journaled ones are skipped
+    recognitions = transcribe_chunks_parallel(chunks, model_name=model_name, workers=workers, batch_size=batch_size,
+                                              journal=journal)
     # Combine and save
     with open(output_path, "w", encoding="utf-8") as f:
-        for i, (chunk_file, text) in enumerate(recognitions, start=1):
-            f.write(f"--- Chunk {i} ({os.path.basename(chunk_file)}) ---\n")
+        for idx, text, _, span in recognitions:
+            start, end = span or (idx * chunk_secs, (idx + 1) * chunk_secs)
+            f.write(f"--- Chunk {idx + 1} ({start:.1f}s-{end:.1f}s) ---\n")
             f.write(text + "\n\n")
-    print("All chunks transcribed. Saved combined transcript to:", output_path)
-    return output_path
+    # Failed chunks are not journaled, so a rerun transcribes just those again
+    failed = [idx for idx, _, error, _ in recognitions if error]
+    if failed:
+        print(f"{len(failed)} of {len(recognitions)} chunks failed. Saved partial transcript to:", output_path)
+    else:
+        print("All chunks transcribed. Saved combined transcript to:", output_path)
+    return output_path, failed
 
 def cleanup_temp(dirpath=TMP_DIR, keep_audio=False, audio_path=AUDIO_FILENAME):
     # remove chunks directory
     if os.path.exists(dirpath):
         shutil.rmtree(dirpath)
-    if not keep_audio and os.path.exists(audio_path):
-        os.remove(audio_path)
+    if not keep_audio:
+        remove_download(audio_path)
     print("Cleaned up temporary files.")
 
+# ---------- Batch mode ----------
+
+def read_batch_sources(source):
+    # [(title, url or local path)]: a file lists one per line (# starts a comment),
+    # playlist URLs are expanded into their videos
+    lines = [source]
+    if os.path.isfile(source) and not source.lower().startswith("http"):
+        with open(source, "r", encoding="utf-8") as f:
+            lines = [line.strip() for line in f]
+    items = []
+    for line in lines:
+        if not line or line.startswith("#"):
+            continue
+        if line.lower().startswith("http"):
+            try:
+                items.extend(list_playlist(line))
+            except Exception as e:
+                print("Could not read", line, "-", e)
+                items.append((line, line))
+        else:
+            items.append((os.path.splitext(os.path.basename(line))[0], line))
+    return items
+
+def batch_item_name(index, title):
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", title).strip("-")[:60] or "video"
+    return f"{index:03d}-{slug}"
+
+def transcribe_batch_item(name, source, audio_path, output_path, downloaded, workers):
+    # Same steps as the interactive mode, for one video of the batch
+    started = time.perf_counter()
+    duration = audio_duration(audio_path)
+    fingerprint = input_fingerprint(audio_path, model=MODEL_NAME, use_vad=USE_VAD, chunk_secs=CHUNK_SECONDS)
+    journal = TranscriptionJournal(output_path + ".journal.jsonl", fingerprint)
+    chunks = split_audio_to_chunks(audio_path, chunk_secs=CHUNK_SECONDS)
+    # Written under its final name only when complete, so a rerun doesn't skip a partial one
+    partial_path = os.path.splitext(output_path)[0] + ".partial.txt"
+    _, failed = transcribe_chunks_with_whisper(chunks, model_name=MODEL_NAME, output_path=partial_path,
+                                               workers=workers, chunk_secs=CHUNK_SECONDS, journal=journal)
+    result = {"name": name, "source": source, "audio_secs": duration, "seconds": time.perf_counter() - started}
+    if failed:
+        # Journal and audio stay for the rerun
+        return {**result, "status": "partial", "output": partial_path, "error": f"{len(failed)} chunks failed"}
+    os.replace(partial_path, output_path)
+    journal.remove()
+    if downloaded:
+        remove_download(audio_path)
+    return {**result, "status": "done", "output": output_path}
+
+def process_batch(source, output_dir=BATCH_OUTPUT_DIR, download_workers=DOWNLOAD_WORKERS,
+                  transcribe_jobs=TRANSCRIBE_JOBS):
+    items = read_batch_sources(source)
+    if not items:
+        print("Nothing to process in", source)
+        return []
+    audio_dir = os.path.join(output_dir, "audio")
+    os.makedirs(audio_dir, exist_ok=True)
+    workers = WORKERS or max(1, default_worker_count() // transcribe_jobs)
+    print(f"Batch of {len(items)} videos: {download_workers} downloads, "
+          f"{transcribe_jobs} transcription job(s) x {workers} worker(s)")
+
+    # Downloads run ahead of transcription, but at most this many videos
+    # wait on disk or transcribe at once
+    ahead = threading.BoundedSemaphore(download_workers + transcribe_jobs)
+    started = time.perf_counter()
+
+    def transcribe(name, item_source, audio_path, output_path, downloaded):
+        try:
+            return transcribe_batch_item(name, item_source, audio_path, output_path, downloaded, workers)
+        except Exception as e:
+            print(f"Transcription of {name} failed:", e)
+            return {"name": name, "source": item_source, "status": "failed", "error": str(e)}
+        finally:
+            ahead.release()
+
+    with ThreadPoolExecutor(download_workers, thread_name_prefix="download") as download_pool, \
+            ThreadPoolExecutor(transcribe_jobs, thread_name_prefix="transcribe") as transcribe_pool:
+
+        def fetch(index, title, item_source):
+            name = batch_item_name(index, title)
+            output_path = os.path.join(output_dir, name + ".txt")
+            if os.path.exists(output_path) and not os.path.exists(output_path + ".journal.jsonl"):
+                print(f"[{name}] already transcribed, skipping")
+                return {"name": name, "source": item_source, "status": "skipped", "output": output_path}
+            ahead.acquire()
+            downloaded = item_source.lower().startswith("http")
+            if downloaded:
+                audio_path = download_audio_from_youtube(item_source, os.path.join(audio_dir, name + ".m4a"),
+                                                         quiet=True)
+            else:
+                audio_path = os.path.abspath(item_source) if os.path.exists(item_source) else None
+            if not audio_path:
+                ahead.release()
+                return {"name": name, "source": item_source, "status": "failed",
+                        "error": "download failed" if downloaded else "file not found"}
+            return transcribe_pool.submit(transcribe, name, item_source, audio_path, output_path, downloaded)
+
+        fetches = [download_pool.submit(fetch, index, title, item_source)
+                   for index, (title, item_source) in enumerate(items, 1)]
+        results = []
+        for future in fetches:
+            result = future.result()
+            results.append(result if isinstance(result, dict) else result.result())
+
+    print_throughput_report(results, time.perf_counter() - started)
+    return results
+
+def print_throughput_report(results, wall_secs):
+    print("\n========== Batch report ==========")
+    for r in results:
+        if r["status"] == "done":
+            audio = f"{r['audio_secs'] / 60:.1f} min audio" if r.get("audio_secs") else "audio length unknown"
+            print(f"{r['name']}: done in {r['seconds']:.0f}s ({audio})")
+        else:
+            print(f"{r['name']}: {r['status']}" + (f" ({r['error']})" if r.get("error") else ""))
+    done = [r for r in results if r["status"] == "done"]
+    audio_secs = sum(r.get("audio_secs") or 0 for r in done)
+    counts = {status: sum(1 for r in results if r["status"] == status)
+              for status in ("done", "partial", "skipped", "failed")}
+    print(f"\n{counts['done']} transcribed, {counts['partial']} partial, {counts['skipped']} skipped, "
+          f"{counts['failed']} failed")
+    print(f"Audio: {audio_secs / 3600:.2f} h in {wall_secs / 3600:.2f} h wall time")
+    if wall_secs > 0:
+        print(f"Throughput: {audio_secs / wall_secs:.2f} hours of audio per hour")
+
+# ---------- Interactive mode ----------
+
 def main():
     print("Enter a YouTube URL (or a local audio/video filename):")
     user = input("→ ").strip()
@@ -90,7 +238,8 @@ def main():
         print("No input given. Exiting.")
         return
     # If user input starts with http treat as URL
-    if user.lower().startswith("http"):
+    downloaded = user.lower().startswith("http")
+    if downloaded:
         audio_path = download_audio_from_youtube(user, outname=AUDIO_FILENAME)
         if not audio_path:
             print("Download failed. Exiting.")
@@ -103,13 +252,37 @@ def main():
         # If local file is video or audio, we will use it directly
         audio_path = os.path.abspath(user)
 
+    # A rerun on the same audio with the same settings resumes from the journal
+    fingerprint = input_fingerprint(audio_path, model=MODEL_NAME, use_vad=USE_VAD, chunk_secs=CHUNK_SECONDS)
+    journal = TranscriptionJournal(JOURNAL_PATH, fingerprint)
     # Split into chunks
     chunks = split_audio_to_chunks(audio_path, chunk_secs=CHUNK_SECONDS)
     # Transcribe chunks with Whisper
-    trans_path = transcribe_chunks_with_whisper(chunks, model_name=MODEL_NAME)
-    # Cleanup chunk files but keep the downloaded audio by default
-    cleanup_temp(TMP_DIR, keep_audio=False, audio_path=audio_path)
+    trans_path, failed = transcribe_chunks_with_whisper(chunks, model_name=MODEL_NAME, chunk_secs=CHUNK_SECONDS,
+                                                        journal=journal)
+    if failed:
+        # Keep the journal and the audio: running again retries only the failed chunks
+        print("\nINCOMPLETE. Run again on the same input to retry the failed chunks.")
+        return 1
+    # Only now is the work safe in the transcript
+    journal.remove()
+    # Remove the downloaded audio (never a local input file)
+    cleanup_temp(TMP_DIR, keep_audio=not downloaded, audio_path=audio_path)
     print("\nDONE. Open", trans_path, "to read the transcript.")
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Transcribe long YouTube videos with Whisper")
+    parser.add_argument("--batch", metavar="SOURCE",
+                        help="playlist URL or file of URLs / local paths; runs without prompts")
+    parser.add_argument("--output-dir", default=BATCH_OUTPUT_DIR, help="where batch transcripts are written")
+    parser.add_argument("--download-workers", type=int, default=DOWNLOAD_WORKERS)
+    parser.add_argument("--transcribe-jobs", type=int, default=TRANSCRIBE_JOBS)
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    if args.batch:
+        results = process_batch(args.batch, args.output_dir, max(1, args.download_workers),
+                                max(1, args.transcribe_jobs))
+        sys.exit(1 if any(r["status"] in ("failed", "partial") for r in results) else 0)
+    sys.exit(main())
@@ -24,12 +24,8 @@ fileInput.addEventListener("change", async (e) => {
           const data = await res.json();
 
           if (data.status === "success") {
-            uploadStatus.innerHTML = `<p style="color: var(--accent); text-align: center; margin-top: 10px;"><i class="fas fa-check-circle"></i> Video processed successfully! Select an analysis option below.</p>`;
-              optionsSection.style.display = "block";
-              optionsSection.classList.add("visible");
-              
-              // Start checking background processing status
-              startBackgroundStatusCheck();
+            localStorage.setItem("videoJobId", data.job_id);
+            whenTranscriptReady(data, "Video processed successfully!");
           } else {
               uploadStatus.innerHTML = `<p style="color: var(--secondary); text-align: center; margin-top: 10px;"> ! ${data.message}</p>`;
               optionsSection.style.display = "none";
@@ -67,12 +63,8 @@ processButton.addEventListener("click", async () => {
       const data = await res.json();
 
       if (data.status === "success") {
-        uploadStatus.innerHTML = `<p style="color: var(--accent); text-align: center; margin-top: 10px;"><i class="fas fa-check-circle"></i> YouTube video processed successfully! Select an analysis option below.</p>`;
-          optionsSection.style.display = "block";
-          optionsSection.classList.add("visible");
-          
-          // Start checking background processing status
-          startBackgroundStatusCheck();
+        localStorage.setItem("videoJobId", data.job_id);
+        whenTranscriptReady(data, "YouTube video processed successfully!");
       } else {
           uploadStatus.innerHTML = `<p style="color: var(--secondary); text-align: center; margin-top: 10px;"> !${data.message}</p>`;
           optionsSection.style.display = "none";
@@ -83,32 +75,97 @@ processButton.addEventListener("click", async () => {
   }
 });
 
-  // ---------------- BACKGROUND PROCESSING STATUS CHECK ----------------
-  function startBackgroundStatusCheck() {
-    let checkCount = 0;
-    const maxChecks = 60; // Check for up to 5 minutes (5 seconds interval)
-    
-    const checkInterval = setInterval(async () => {
-      checkCount++;
-      
-      try {
-        const response = await fetch('/check_processing_status');
-        const data = await response.json();
-        
-        if (data.status === 'completed') {
-          clearInterval(checkInterval);
-          console.log("Background processing completed successfully");
-        }
-        
-        // Stop checking after max attempts
-        if (checkCount >= maxChecks) {
-          clearInterval(checkInterval);
-          console.log("Background processing check timeout");
+  // ---------------- JOB PROGRESS (SERVER-SENT EVENTS) ----------------
+  const STEP_LABELS = {
+    translate: "Translating to English",
+    clean: "Cleaning transcript",
+    chunk: "Chunking transcript",
+    vectorize: "Indexing for Q&A"
+  };
+
+  function showOptions(message) {
+    uploadStatus.innerHTML = `<p style="color: var(--accent); text-align: center; margin-top: 10px;"><i class="fas fa-check-circle"></i> ${message} Select an analysis option below.</p>`;
+    optionsSection.style.display = "block";
+    optionsSection.classList.add("visible");
+  }
+
+  function showJobProgress(label) {
+    uploadStatus.innerHTML = `<p style="color: var(--primary); text-align: center; margin-top: 10px;"><i class="fas fa-sync fa-spin"></i> ${label}...</p>`;
+  }
+
+  function whenTranscriptReady(data, message) {
+    // /process only queues the job; the options need the transcript,
+    // the other features the rest of the pipeline. The server pushes progress.
+    let transcriptReady = false;
+
+    function transcriptDone() {
+      if (!transcriptReady) {
+        transcriptReady = true;
+        showOptions(message);
+      }
+    }
+
+    if (data.transcript_ready) {
+      transcriptDone();
+    } else {
+      showJobProgress("Waiting in queue");
+    }
+
+    const source = new EventSource(`/jobs/${encodeURIComponent(data.job_id)}/events`);
+    const parse = (e) => JSON.parse(e.data);
+
+    source.addEventListener("status", (e) => {
+      const job = parse(e);
+      if (job.transcript_ready) transcriptDone();
+    });
+    source.addEventListener("transcript_ready", transcriptDone);
+    source.addEventListener("queued", () => {
+      if (!transcriptReady) showJobProgress("Waiting in queue");
+    });
+    source.addEventListener("stage_started", (e) => {
+      const event = parse(e);
+      if (!transcriptReady) showJobProgress(event.stage === "download" ? "Fetching video" : "Transcribing audio");
+      console.log(`Stage started: ${event.stage}`);
+    });
+    source.addEventListener("progress", (e) => {
+      const event = parse(e);
+      if (!transcriptReady) {
+        showJobProgress(`Transcribing audio: ${event.done}${event.total ? "/" + event.total : ""} segments`);
+      }
+    });
+    source.addEventListener("step", (e) => {
+      console.log(STEP_LABELS[parse(e).step] || parse(e).step);
+    });
+    source.addEventListener("index_published", (e) => {
+      const event = parse(e);
+      console.log(`Q&A index ${event.final ? "complete" : "updated"}: ${event.chunks} chunks`);
+    });
+    source.addEventListener("completed", () => {
+      source.close();
+      transcriptDone();
+      console.log("Background processing completed successfully");
+    });
+    ["failed", "cancelled"].forEach((type) => {
+      source.addEventListener(type, (e) => {
+        const event = parse(e);
+        source.close();
+        console.log(`Background processing ${type}${event.error ? ": " + event.error : ""}`);
+        if (!transcriptReady) {
+          uploadStatus.innerHTML = `<p style="color: var(--secondary); text-align: center; margin-top: 10px;"> ! Processing ${type}${event.error ? ": " + event.error : ""}</p>`;
         }
-      } catch (error) {
-        console.error('Error checking processing status:', error);
+      });
+    });
+    source.onerror = () => {
+      // The browser reconnects on its own unless the stream is gone for good (e.g. unknown job)
+      if (source.readyState === EventSource.CLOSED) {
+        console.error("Job progress stream closed");
       }
-    }, 5000); // Check every 5 seconds
+    };
+  }
+
+  function statusUrl() {
+    const jobId = localStorage.getItem("videoJobId");
+    return jobId ? `/check_processing_status?job_id=${encodeURIComponent(jobId)}` : '/check_processing_status';
   }
 
 
@@ -127,10 +184,11 @@ optionCards.forEach((card) => {
         
         // For other features, check if background processing is complete
         try {
-            const response = await fetch('/check_processing_status');
+            const response = await fetch(statusUrl());
             const data = await response.json();
             
-            if (data.status === 'completed') {
+            // Q&A works on the partial index published while the rest is still processing
+            if (data.status === 'completed' || (option === "qna" && data.qna_ready)) {
                 // Processing complete, navigate to feature page
                 if (option === "summary") {
                     window.location.href = "/summarize_page";
@@ -139,6 +197,11 @@ optionCards.forEach((card) => {
                 } else if (option === "qna") {
                     window.location.href = "/qna";
                 }
+            } else if (data.status === 'failed' || data.status === 'cancelled') {
+                uploadStatus.innerHTML = `
+                    <p style="color: var(--secondary); text-align: center; margin-top: 10px;">
+                        <i class="fas fa-exclamation-triangle"></i> Processing ${data.status}${data.job && data.job.error ? ": " + data.job.error : ""}. Please process the video again.
+                    </p>`;
             } else {
                 // Processing not complete, show message
                 uploadStatus.innerHTML = `
@@ -34,6 +34,8 @@ document.addEventListener("DOMContentLoaded", () => {
     let structuredNotes = [];
     let totalWordCount = 0;
     let totalKeyPoints = 0;
+    // Notes request in flight, shared by the page-load check and the generate button
+    let pendingNotesRequest = null;
 
     // Initialize the page
     initPage();
@@ -58,17 +60,28 @@ document.addEventListener("DOMContentLoaded", () => {
         shareNotesBtn.addEventListener("click", handleShareNotes);
     }
 
-    async function checkForExistingNotes() {
-        try {
-            // Check if we have notes data from previous processing
-            const response = await fetch('/generate_notes', {
+    function requestNotes() {
+        // Reuse the request already in flight instead of generating the notes twice
+        if (!pendingNotesRequest) {
+            pendingNotesRequest = fetch('/generate_notes', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
-                }
-            });
-            
-            const data = await response.json();
+                },
+                body: JSON.stringify({ job_id: localStorage.getItem('videoJobId') })
+            })
+                .then(response => response.json())
+                .finally(() => {
+                    pendingNotesRequest = null;
+                });
+        }
+        return pendingNotesRequest;
+    }
+
+    async function checkForExistingNotes() {
+        try {
+            // Check if we have notes data from previous processing
+            const data = await requestNotes();
             
             if (data.status === 'success' && data.notes) {
                 currentNotes = data.notes;
@@ -89,14 +102,7 @@ document.addEventListener("DOMContentLoaded", () => {
             showLoadingState();
             startProgressAnimation();
             
-            const response = await fetch('/generate_notes', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                }
-            });
-            
-            const data = await response.json();
+            const data = await requestNotes();
             
             if (data.status === 'success' && data.notes) {
                 currentNotes = data.notes;
@@ -31,6 +31,8 @@ document.addEventListener("DOMContentLoaded", () => {
     let currentSummary = "";
     let currentKeyPoints = [];
     let originalWordCount = 0;
+    // Summary request in flight, shared by the page-load check and the generate button
+    let pendingSummaryRequest = null;
 
     // Initialize the page
     initPage();
@@ -52,17 +54,28 @@ document.addEventListener("DOMContentLoaded", () => {
         generatePlaceholderBtn.addEventListener("click", handleGenerateSummary);
     }
 
-    async function checkForExistingSummary() {
-        try {
-            // Check if we have summary data from previous processing
-            const response = await fetch('/summarize', {
+    function requestSummary() {
+        // Reuse the request already in flight instead of generating the summary twice
+        if (!pendingSummaryRequest) {
+            pendingSummaryRequest = fetch('/summarize', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
-                }
-            });
-            
-            const data = await response.json();
+                },
+                body: JSON.stringify({ job_id: localStorage.getItem('videoJobId') })
+            })
+                .then(response => response.json())
+                .finally(() => {
+                    pendingSummaryRequest = null;
+                });
+        }
+        return pendingSummaryRequest;
+    }
+
+    async function checkForExistingSummary() {
+        try {
+            // Check if we have summary data from previous processing
+            const data = await requestSummary();
             
             if (data.status === 'success' && data.summary) {
                 currentSummary = data.summary;
@@ -84,14 +97,7 @@ document.addEventListener("DOMContentLoaded", () => {
             showLoadingState();
             startProgressAnimation();
             
-            const response = await fetch('/summarize', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                }
-            });
-            
-            const data = await response.json();
+            const data = await requestSummary();
             
             if (data.status === 'success' && data.summary) {
                 currentSummary = data.summary;
@@ -67,7 +67,8 @@ document.addEventListener("DOMContentLoaded", () => {
             showLoadingState('Loading transcript...');
             
             // Check if we have transcript data - FIXED: using correct endpoint
-            const response = await fetch('/get_transcript');
+            const jobId = localStorage.getItem('videoJobId');
+            const response = await fetch(jobId ? `/get_transcript?job_id=${encodeURIComponent(jobId)}` : '/get_transcript');
             const data = await response.json();
             
             if (data.status === 'success' && data.transcript) {
@@ -159,7 +160,7 @@ document.addEventListener("DOMContentLoaded", () => {
                 headers: {
                     'Content-Type': 'application/json',
                 },
-                body: JSON.stringify({ transcript: currentTranscript })
+                body: JSON.stringify({ transcript: currentTranscript, job_id: localStorage.getItem('videoJobId') })
             });
             
             const data = await response.json();
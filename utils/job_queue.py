@@ -0,0 +1,307 @@
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+
+# Worker threads per stage type; transcription is CPU/GPU bound, the others mostly wait on I/O
+STAGE_WORKERS = {
+    "download": int(os.getenv("JOB_WORKERS_DOWNLOAD", "2")),
+    "transcribe": int(os.getenv("JOB_WORKERS_TRANSCRIBE", "1")),
+    "nlp": int(os.getenv("JOB_WORKERS_NLP", "2")),
+}
+# Jobs admitted (queued or running) at once; submit() refuses more
+MAX_PENDING_JOBS = int(os.getenv("JOB_QUEUE_SIZE", "16"))
+# Finished jobs kept for the status API
+FINISHED_JOBS_KEPT = 256
+# Progress events kept per job for late or reconnecting subscribers
+EVENTS_KEPT = 1000
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+
+class QueueFull(Exception):
+    """The scheduler already holds MAX_PENDING_JOBS unfinished jobs."""
+
+
+class JobCancelled(Exception):
+    """Raised inside a stage when its job was cancelled."""
+
+
+class Job:
+    """
+    One video moving through an ordered list of (stage type, function)
+    steps. Each function is called with the job; it may record progress
+    in job.data (returned by the status API) and emit() progress events,
+    skip() later stages it made unnecessary and should call
+    raise_if_cancelled() between long steps.
+    """
+
+    def __init__(self, job_id, steps, data=None):
+        self.job_id = job_id
+        self.steps = list(steps)
+        self.data = dict(data or {})
+        # Objects handed from one stage to the next, not part of the status
+        self.context = {}
+        self._finalizers = []
+        self.status = QUEUED
+        self.stage = None
+        self.completed_stages = []
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self._cancelled = threading.Event()
+        self._skipped = set()
+        self._next_step = 0
+        self._events = deque(maxlen=EVENTS_KEPT)
+        self._event_seq = 0
+        self._event_cond = threading.Condition()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def skip(self, stage):
+        """Don't run the job's (remaining) steps of this stage type."""
+        self._skipped.add(stage)
+
+    def on_finish(self, callback):
+        """Call callback() once the job has finished, however it ended (e.g. to stop helper threads)."""
+        self._finalizers.append(callback)
+
+    def raise_if_cancelled(self):
+        if self._cancelled.is_set():
+            raise JobCancelled(self.job_id)
+
+    @property
+    def finished_state(self):
+        return self.status in FINISHED_STATES
+
+    def emit(self, event_type, **fields):
+        """Record a progress event (stage start/finish, chunk progress, errors) and wake subscribers."""
+        with self._event_cond:
+            self._event_seq += 1
+            event = {"seq": self._event_seq, "type": event_type, "time": time.time(),
+                     "stage": self.stage, **fields}
+            self._events.append(event)
+            self._event_cond.notify_all()
+        return event
+
+    def events_after(self, seq, timeout=None):
+        """
+        Events newer than seq, waiting up to timeout seconds for one to
+        arrive. An empty list means the wait timed out (or the job has
+        finished and every event was already seen).
+        """
+        with self._event_cond:
+            if timeout and not self.finished_state:
+                self._event_cond.wait_for(
+                    lambda: self._event_seq > seq or self.finished_state, timeout)
+            return [event for event in self._events if event["seq"] > seq]
+
+    def to_dict(self):
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "stage": self.stage,
+            "stages": [stage for stage, _ in self.steps],
+            "completed_stages": list(self.completed_stages),
+            "error": self.error,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            **self.data,
+        }
+
+
+class JobScheduler:
+    """
+    In-process job broker: one FIFO queue and a fixed pool of worker
+    threads per stage type, so at most STAGE_WORKERS[stage] jobs run a
+    stage at once and the rest wait their turn instead of oversubscribing
+    the machine. A job is handed to the next stage's queue when a stage
+    finishes. Admission is bounded: submit() raises QueueFull once
+    max_pending jobs are unfinished. Worker threads start on first submit.
+    """
+
+    def __init__(self, workers=None, max_pending=MAX_PENDING_JOBS, keep_finished=FINISHED_JOBS_KEPT):
+        self.workers = dict(workers or STAGE_WORKERS)
+        self.max_pending = max(1, max_pending)
+        self.keep_finished = keep_finished
+        self._queues = {stage: queue.Queue() for stage in self.workers}
+        self._jobs = OrderedDict()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._threads = []
+        self._counts = {COMPLETED: 0, FAILED: 0, CANCELLED: 0, "rejected": 0}
+
+    def _start_workers(self):
+        for stage, count in self.workers.items():
+            for i in range(max(1, count)):
+                thread = threading.Thread(target=self._work, args=(stage,),
+                                          name=f"job-{stage}-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, job_id, steps, data=None, on_finish=()):
+        """
+        Queue a new job and return it; raises QueueFull when the scheduler is at capacity.
+        on_finish callbacks are registered before the job can start, so they run however early it ends.
+        """
+        job = Job(job_id, steps, data)
+        for callback in on_finish:
+            job.on_finish(callback)
+        for stage, _ in job.steps:
+            if stage not in self._queues:
+                raise ValueError(f"Unknown stage type: {stage}")
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._counts["rejected"] += 1
+                raise QueueFull(f"{self._pending} jobs already pending")
+            if not self._threads:
+                self._start_workers()
+            self._jobs[job_id] = job
+            self._pending += 1
+        self._advance(job)
+        return job
+
+    def _advance(self, job):
+        """Hand the job to its next stage's queue, or finish it."""
+        with self._lock:
+            while job._next_step < len(job.steps) and job.steps[job._next_step][0] in job._skipped:
+                job._next_step += 1
+            more = job._next_step < len(job.steps) and not job.cancelled
+            if more:
+                job.status = QUEUED
+                job.stage = None
+        if more:
+            stage = job.steps[job._next_step][0]
+            job.emit("queued", next_stage=stage)
+            self._queues[stage].put(job)
+        else:
+            self._finish(job, CANCELLED if job.cancelled else COMPLETED)
+
+    def _finish(self, job, status, error=None):
+        with self._lock:
+            if job.status in FINISHED_STATES:
+                return
+            stage = job.stage if status != COMPLETED else None  # where it failed or was cancelled
+            job.status = status
+            job.error = error
+            job.stage = None
+            job.finished = time.time()
+            self._pending -= 1
+            self._counts[status] += 1
+            self._prune()
+            # Together with the state change: a subscriber that sees the job finished
+            # (iter_events) must find the outcome event too, however long cleanup takes
+            job.emit(status, stage=stage, error=error)
+        for callback in job._finalizers:
+            try:
+                callback()
+            except Exception as e:
+                print(f"[JOBS ERROR] Cleanup of job {job.job_id} failed: {e}")
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in FINISHED_STATES]
+        for job_id in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job_id]
+
+    def _work(self, stage):
+        while True:
+            job = self._queues[stage].get()
+            with self._lock:
+                skip = job.cancelled
+                if not skip:
+                    job.status = RUNNING
+                    job.stage = stage
+                    job.started = job.started or time.time()
+            if skip:
+                self._finish(job, CANCELLED)
+                continue
+            _, func = job.steps[job._next_step]
+            job.emit("stage_started")
+            started = time.perf_counter()
+            try:
+                func(job)
+            except JobCancelled:
+                print(f"[JOBS] Job {job.job_id} cancelled during {stage}")
+                self._finish(job, CANCELLED)
+                continue
+            except Exception as e:
+                print(f"[JOBS ERROR] Job {job.job_id} failed in {stage}: {e}")
+                self._finish(job, FAILED, str(e))
+                continue
+            job.emit("stage_finished", seconds=round(time.perf_counter() - started, 3))
+            with self._lock:
+                job.completed_stages.append(stage)
+                job._next_step += 1
+            self._advance(job)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def status(self, job_id):
+        """Status dict of the job, or None if it is unknown (or long finished)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def cancel(self, job_id):
+        """
+        Ask the job to stop. A queued job is cancelled at once; a running
+        stage stops at its next raise_if_cancelled(). Returns
+        False if the job is unknown or already finished.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED_STATES:
+                return False
+            job._cancelled.set()
+            queued = job.status == QUEUED
+        if queued:
+            # Frees its slot now; the worker that dequeues it skips it
+            self._finish(job, CANCELLED)
+        return True
+
+    def iter_events(self, job_id, after=0, heartbeat=15):
+        """
+        Yields the job's events after seq `after` as they happen, and None
+        every `heartbeat` seconds without one, until the job has finished.
+        """
+        job = self.get(job_id)
+        if job is None:
+            return
+        while True:
+            events = job.events_after(after, timeout=heartbeat)
+            for event in events:
+                after = event["seq"]
+                yield event
+            if job.finished_state and not job.events_after(after):
+                return
+            if not events:
+                yield None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+                "workers": dict(self.workers),
+                "queued": {stage: q.qsize() for stage, q in self._queues.items()},
+                "running": {stage: sum(1 for job in self._jobs.values()
+                                       if job.status == RUNNING and job.stage == stage)
+                            for stage in self.workers},
+                **self._counts,
+            }
+
+
+# Create global instance
+job_scheduler = JobScheduler()
@@ -0,0 +1,102 @@
+import os
+import re
+import shutil
+import uuid
+
+JOBS_ROOT = os.path.join("data", "jobs")
+
+_JOB_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+class JobWorkspace:
+    """
+    Isolated artifact directory for a single processing job.
+    Every stage of the pipeline reads and writes inside data/jobs/<job_id>/
+    so concurrent videos never share files.
+    """
+
+    def __init__(self, job_id, root=JOBS_ROOT):
+        self.job_id = job_id
+        self.root = os.path.join(root, job_id)
+        self.uploads_dir = os.path.join(self.root, "uploads")
+        self.transcripts_dir = os.path.join(self.root, "transcripts")
+        self.chunks_dir = os.path.join(self.root, "text chunks")
+
+    @property
+    def transcript_path(self):
+        return os.path.join(self.transcripts_dir, "transcript.txt")
+
+    @property
+    def english_path(self):
+        return os.path.join(self.transcripts_dir, "transcript_english.txt")
+
+    @property
+    def cleaned_path(self):
+        return os.path.join(self.transcripts_dir, "transcript_cleaned.txt")
+
+    @property
+    def summary_path(self):
+        return os.path.join(self.transcripts_dir, "summary.txt")
+
+    @property
+    def notes_path(self):
+        return os.path.join(self.transcripts_dir, "detailed_notes.txt")
+
+    @property
+    def chunk_store_path(self):
+        return os.path.join(self.chunks_dir, "chunks.jsonl")
+
+    @property
+    def embeddings_path(self):
+        return os.path.join(self.chunks_dir, "embeddings.npy")
+
+    def audio_download_path(self, filename="downloaded_audio.m4a"):
+        return os.path.join(self.uploads_dir, filename)
+
+    def exists(self):
+        return os.path.isdir(self.root)
+
+    def create(self):
+        for path in (self.uploads_dir, self.transcripts_dir, self.chunks_dir):
+            os.makedirs(path, exist_ok=True)
+        return self
+
+    def remove_uploads(self):
+        """Delete the job's source media (uploads, downloaded audio); later stages only need the transcript."""
+        if os.path.isdir(self.uploads_dir):
+            for name in os.listdir(self.uploads_dir):
+                path = os.path.join(self.uploads_dir, name)
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+
+    def remove(self):
+        if os.path.exists(self.root):
+            shutil.rmtree(self.root)
+
+
+def is_valid_job_id(job_id):
+    """Job IDs are uuid4 hex strings; anything else could escape JOBS_ROOT."""
+    return bool(job_id) and bool(_JOB_ID_RE.match(job_id))
+
+
+def create_job_workspace(root=JOBS_ROOT):
+    """Allocate a new job ID and create its workspace directories."""
+    return JobWorkspace(uuid.uuid4().hex, root=root).create()
+
+
+def get_job_workspace(job_id, root=JOBS_ROOT):
+    """
+    Look up the workspace of an existing job.
+    Raises ValueError for malformed IDs and FileNotFoundError for unknown jobs.
+    """
+    if not is_valid_job_id(job_id):
+        raise ValueError(f"Invalid job ID: {job_id!r}")
+    workspace = JobWorkspace(job_id, root=root)
+    if not workspace.exists():
+        raise FileNotFoundError(f"Unknown job ID: {job_id}")
+    return workspace
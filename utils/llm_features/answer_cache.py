@@ -0,0 +1,162 @@
+# utils/llm_features/answer_cache.py - semantic cache of Q&A answers
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Cosine similarity above which two questions count as the same question
+SIMILARITY_THRESHOLD = float(os.getenv("QNA_CACHE_THRESHOLD", "0.95"))
+TTL_SECONDS = float(os.getenv("QNA_CACHE_TTL", "3600"))
+MAX_BYTES = int(float(os.getenv("QNA_CACHE_MAX_MB", "64")) * 1024 * 1024)
+MAX_ENTRIES_PER_VIDEO = 512
+
+
+def _result_size(vector, result):
+    """Approximate bytes held by an entry (vector plus answer and chunk text)."""
+    size = vector.nbytes + len(result.get("answer") or "")
+    for chunk in result.get("chunks", []):
+        size += len(chunk.get("text", "")) + 128
+    return size
+
+
+class _VideoEntries:
+    """Cached answers of one video, with their question vectors stacked for one matrix-vector lookup."""
+
+    def __init__(self, version):
+        self.version = version
+        self.entries = OrderedDict()  # entry id -> (vector, question, result, created, size)
+        self._matrix = None
+        self._ids = None
+
+    def matrix(self):
+        if self._matrix is None:
+            self._ids = list(self.entries)
+            self._matrix = (np.stack([self.entries[i][0] for i in self._ids])
+                            if self._ids else np.empty((0, 0), dtype=np.float32))
+        return self._ids, self._matrix
+
+    def changed(self):
+        self._matrix = self._ids = None
+
+
+class SemanticAnswerCache:
+    """
+    Per-video cache of Q&A results keyed by the question embedding.
+    A question whose cosine similarity to a cached question reaches the
+    threshold gets the cached answer and chunks back, skipping retrieval
+    and answer extraction. Entries expire after ttl seconds and are
+    evicted least recently used once the cache exceeds max_bytes.
+    A video's entries are dropped when its chunks are regenerated
+    (its version changes) or on invalidate(). Video keys are opaque.
+    """
+
+    def __init__(self, threshold=SIMILARITY_THRESHOLD, ttl=TTL_SECONDS, max_bytes=MAX_BYTES,
+                 max_entries_per_video=MAX_ENTRIES_PER_VIDEO):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_entries_per_video = max_entries_per_video
+        self._videos = {}
+        self._lru = OrderedDict()  # (video, entry id) -> size, least recently used first
+        self._bytes = 0
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _drop(self, video, entry_id):
+        entries = self._videos[video]
+        size = entries.entries.pop(entry_id)[4]
+        entries.changed()
+        self._lru.pop((video, entry_id), None)
+        self._bytes -= size
+        if not entries.entries:
+            del self._videos[video]
+
+    def _drop_video(self, video):
+        for entry_id in list(self._videos[video].entries):
+            self._drop(video, entry_id)
+
+    def _current(self, video, version):
+        """Entries of video, discarding them if they belong to an older version."""
+        entries = self._videos.get(video)
+        if entries is not None and entries.version != version:
+            self._drop_video(video)
+            self.invalidations += 1
+            entries = None
+        return entries
+
+    def lookup(self, video, version, vector):
+        """Cached result for a question vector (unit length), or None."""
+        now = time.monotonic()
+        with self._lock:
+            entries = self._current(video, version)
+            if entries is not None:
+                expired = [i for i, entry in entries.entries.items() if now - entry[3] > self.ttl]
+                for entry_id in expired:
+                    self._drop(video, entry_id)
+                entries = self._videos.get(video)
+            if entries is not None:
+                ids, matrix = entries.matrix()
+                similarities = matrix @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    self.hits += 1
+                    self._lru.move_to_end((video, ids[best]))
+                    return entries.entries[ids[best]][2]
+            self.misses += 1
+            return None
+
+    def put(self, video, version, vector, question, result):
+        vector = np.array(vector, dtype=np.float32)
+        size = _result_size(vector, result)
+        with self._lock:
+            entries = self._current(video, version)
+            if entries is None:
+                entries = self._videos[video] = _VideoEntries(version)
+            entry_id = self._next_id
+            self._next_id += 1
+            entries.entries[entry_id] = (vector, question, result, time.monotonic(), size)
+            entries.changed()
+            self._lru[(video, entry_id)] = size
+            self._bytes += size
+
+            if len(entries.entries) > self.max_entries_per_video:
+                self._drop(video, next(iter(entries.entries)))
+                self.evictions += 1
+            while self._bytes > self.max_bytes and self._lru:
+                old_video, old_id = next(iter(self._lru))
+                self._drop(old_video, old_id)
+                self.evictions += 1
+
+    def invalidate(self, match=None):
+        """Forget the answers of every video key for which match(key) is true (all when None)."""
+        with self._lock:
+            for video in list(self._videos):
+                if match is None or match(video):
+                    self._drop_video(video)
+                    self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "videos": len(self._videos),
+                "entries": len(self._lru),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+# Create global instance
+answer_cache = SemanticAnswerCache()
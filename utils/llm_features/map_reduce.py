@@ -0,0 +1,139 @@
+# utils/llm_features/map_reduce.py - hierarchical summarization of long transcripts
+
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from utils.text_preprocessing.chunker import TOKEN_BUDGETS, iter_token_chunks
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = os.path.join("data", "cache", "chunk_summaries.jsonl")
+
+# Length of each partial (per-chunk) summary, in tokens
+CHUNK_SUMMARY_MAX_TOKENS = 150
+CHUNK_SUMMARY_MIN_TOKENS = 40
+# Chunks summarized per padded model batch
+MAP_BATCH_SIZE = int(os.getenv("SUMMARY_BATCH_SIZE", "4"))
+# Reduce rounds before the rest is cut to one model input
+MAX_REDUCE_LEVELS = 6
+
+
+class SummaryCache:
+    """
+    Summaries of individual chunks keyed by a hash of the model, generation
+    parameters and chunk text, so summary and notes (and repeat runs)
+    share the map step. Kept in memory and appended to a JSONL file.
+    """
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self._entries = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(text, model_name, max_length, min_length):
+        return hashlib.sha256(f"{model_name}\n{max_length}\n{min_length}\n{text}".encode("utf-8")).hexdigest()
+
+    def _load(self):
+        self._entries = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        self._entries[record["key"]] = record["summary"]
+                    except (ValueError, KeyError):
+                        continue  # a torn last line from a crash
+
+    def get(self, key):
+        with self._lock:
+            if self._entries is None:
+                self._load()
+            return self._entries.get(key)
+
+    def put(self, key, summary):
+        with self._lock:
+            if self._entries is None:
+                self._load()
+            if key in self._entries:
+                return
+            self._entries[key] = summary
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"key": key, "summary": summary}, ensure_ascii=False) + "\n")
+
+
+# Create global instance
+summary_cache = SummaryCache()
+
+
+class MapReduceSummarizer:
+    """
+    Summarizes text of any length with a seq2seq summarization pipeline:
+    map - split into chunks that fit the model and summarize them in
+    length-sorted, padded batches; reduce - join the partial summaries and
+    repeat until they fit into one input, which gets the final summary.
+    Each round shrinks the text several times over, so the total work is
+    linear in the transcript length.
+    """
+
+    def __init__(self, summarizer, cache=None, batch_size=MAP_BATCH_SIZE):
+        self.summarizer = summarizer
+        self.tokenizer = summarizer.tokenizer
+        self.model_name = getattr(summarizer.model, "name_or_path", "summarizer")
+        # The loaded checkpoint may take less than distilbart's 1024 (the t5 fallback takes 512);
+        # tokenizers that don't know their limit report a huge sentinel, which min() ignores
+        model_max = getattr(self.tokenizer, "model_max_length", None) or TOKEN_BUDGETS["summarization"][1]
+        self.max_input_tokens = min(TOKEN_BUDGETS["summarization"][1], model_max)
+        self.cache = cache or summary_cache
+        self.batch_size = max(1, batch_size)
+
+    def _chunks(self, text):
+        # The chunker leaves room for the special tokens within max_tokens
+        return list(iter_token_chunks(text, "summarization", max_tokens=self.max_input_tokens,
+                                      tokenizer=self.tokenizer))
+
+    def summarize_chunks(self, chunks, max_length=CHUNK_SUMMARY_MAX_TOKENS, min_length=CHUNK_SUMMARY_MIN_TOKENS):
+        """Summary of each TextChunk, in order; cached ones are not recomputed."""
+        keys = [self.cache.key(chunk.text, self.model_name, max_length, min_length) for chunk in chunks]
+        summaries = [self.cache.get(key) for key in keys]
+        missing = [i for i, summary in enumerate(summaries) if summary is None]
+        logger.info(f"Summarizing {len(missing)} of {len(chunks)} chunks ({len(chunks) - len(missing)} cached)")
+
+        # Similar lengths per batch keep padding small
+        missing.sort(key=lambda i: chunks[i].num_tokens)
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start:start + self.batch_size]
+            shortest = min(chunks[i].num_tokens for i in batch)
+            outputs = self.summarizer(
+                [chunks[i].text for i in batch],
+                batch_size=len(batch),
+                max_length=max_length,
+                # A summary can't be required to be longer than its input
+                min_length=max(1, min(min_length, shortest // 2)),
+                do_sample=False,
+                truncation=True,
+            )
+            for i, output in zip(batch, outputs):
+                summaries[i] = output["summary_text"]
+                self.cache.put(keys[i], summaries[i])
+        return summaries
+
+    def summarize(self, text, max_length, min_length):
+        """Final summary of the whole text with the given length bounds (tokens)."""
+        chunks = self._chunks(text)
+        if not chunks:
+            return ""
+        level = 0
+        while len(chunks) > 1 and level < MAX_REDUCE_LEVELS:
+            partial = self.summarize_chunks(chunks)
+            level += 1
+            logger.info(f"Reduce level {level}: {len(chunks)} chunks -> {len(partial)} partial summaries")
+            chunks = self._chunks(" ".join(partial))
+        # With MAX_REDUCE_LEVELS exhausted the model truncates the remainder
+        final_input = chunks[0] if len(chunks) == 1 else chunks[0]._replace(
+            text=" ".join(chunk.text for chunk in chunks), num_tokens=sum(chunk.num_tokens for chunk in chunks))
+        return self.summarize_chunks([final_input], max_length, min_length)[0]
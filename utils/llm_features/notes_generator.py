@@ -3,32 +3,27 @@
 import os
 import logging
 import re
-from transformers import pipeline
+
+from utils.llm_features.map_reduce import MapReduceSummarizer
+from utils.model_manager import get_summarization_pipeline, summarization_model_name
+from utils.result_cache import ResultCache, result_cache, text_hash
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class NotesGenerator:
-    def __init__(self):
-        self.summarizer = None
-        self._initialize_summarizer()
-    
-    def _initialize_summarizer(self):
-        """Initialize with fast local model"""
+    @property
+    def summarizer(self):
+        """Shared summarization pipeline (same instance as the summary page), loaded on first use"""
         try:
-            self.summarizer = pipeline(
-                "summarization",
-                model="sshleifer/distilbart-cnn-12-6",  # Fast and reliable
-                max_length=1024
-            )
-            logger.info("Fast notes generator initialized")
+            return get_summarization_pipeline()
         except Exception as e:
             logger.error(f"Error initializing: {e}")
-            self.summarizer = None
+            return None
     
-    def _read_transcript(self):
-        transcript_path = "data/transcripts/transcript_cleaned.txt"
+    def _read_transcript(self, transcript_path=None):
+        transcript_path = transcript_path or "data/transcripts/transcript_cleaned.txt"
         with open(transcript_path, 'r', encoding='utf-8') as f:
             return f.read().strip()
     
@@ -58,19 +53,26 @@ class NotesGenerator:
         scored_sentences.sort(reverse=True)
         return [sentence for _, sentence in scored_sentences[:num_points]]
     
-    def _create_structured_notes_local(self, content):
-        """Create structured notes using local processing"""
+    def _create_structured_notes_local(self, content, strict=False):
+        """Create structured notes using local processing
+        strict=True raises instead of falling back to a placeholder summary,
+        so that degraded notes are never cached."""
         # Use summarization for main content
-        if self.summarizer and len(content.split()) > 100:
+        summarizer = self.summarizer
+        if summarizer and len(content.split()) > 100:
             try:
-                summary = self.summarizer(
-                    content[:2000],
+                # Whole transcript, chunk summaries shared with the summary page
+                summary = MapReduceSummarizer(summarizer).summarize(
+                    content,
                     max_length=300,
-                    min_length=150,
-                    do_sample=False
-                )[0]['summary_text']
+                    min_length=150
+                )
             except:
+                if strict:
+                    raise
                 summary = "Key concepts from the educational content."
+        elif strict and len(content.split()) > 100:
+            raise RuntimeError("Summarization model unavailable")
         else:
             summary = "Key concepts from the educational content."
         
@@ -100,19 +102,33 @@ class NotesGenerator:
 """
         return notes
     
-    def generate_detailed_notes(self):
+    def generate_detailed_notes(self, transcript_path=None):
         """Ultra-fast notes generation"""
         try:
-            transcript = self._read_transcript()
+            transcript = self._read_transcript(transcript_path)
             
             if not transcript:
                 return "No transcript available."
             
             logger.info("Generating ultra-fast local notes...")
             
-            notes = self._create_structured_notes_local(transcript)
+            # Same transcript and model -> same notes; concurrent requests share one run.
+            # Keyed on the checkpoint that actually loaded, not the preference list
+            try:
+                model_name = summarization_model_name()
+            except Exception as e:
+                logger.error(f"Error initializing: {e}")
+                model_name = "unavailable"
+            key = ResultCache.key("notes", text_hash(transcript), model_name,
+                                  {"max_length": 300, "min_length": 150})
+            try:
+                notes, cached = result_cache.get_or_compute(
+                    key, lambda: self._create_structured_notes_local(transcript, strict=True))
+            except Exception as e:
+                logger.warning(f"Summarizing for notes failed, using placeholder summary: {e}")
+                notes, cached = self._create_structured_notes_local(transcript), False
             
-            logger.info(f"Local notes generated: {len(notes.split())} words")
+            logger.info(f"Local notes {'from cache' if cached else 'generated'}: {len(notes.split())} words")
             return notes
             
         except Exception as e:
@@ -135,5 +151,5 @@ Educational content extracted and organized for study purposes.
 # Create global instance
 notes_generator_instance = NotesGenerator()
 
-def generate_detailed_notes():
-    return notes_generator_instance.generate_detailed_notes()
\ No newline at end of file
+def generate_detailed_notes(transcript_path=None):
+    return notes_generator_instance.generate_detailed_notes(transcript_path)
\ No newline at end of file
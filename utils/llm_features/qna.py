@@ -1 +1,329 @@
+# utils/llm_features/qna.py - retrieval-based Q&A over vectorized chunks
 
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.llm_features.answer_cache import answer_cache as shared_answer_cache
+from utils.text_preprocessing.chunk_store import ChunkStore
+from utils.text_preprocessing.chunker import iter_sentence_spans
+from utils.text_preprocessing.embedding_store import EmbeddingStore
+from utils.text_preprocessing.lexical_index import BM25Index, search_bm25
+from utils.text_preprocessing.vectorizer import encode_texts
+
+LEGACY_CHUNKS_DIR = os.path.join("data", "text chunks")
+
+DEFAULT_TOP_K = 5
+# Corpora at least this large get the IVF coarse quantizer instead of a flat scan
+IVF_MIN_VECTORS = int(os.getenv("QNA_IVF_MIN_VECTORS", "50000"))
+IVF_NPROBE = int(os.getenv("QNA_IVF_NPROBE", "16"))
+# Loaded indexes kept in memory (one per video or corpus)
+MAX_CACHED_INDEXES = 8
+# Candidates taken from each ranking before fusion, and the RRF damping constant
+FUSION_CANDIDATES = 50
+RRF_K = 60
+# Chunks mined for answer sentences, and sentences in an answer
+ANSWER_CHUNKS = 3
+ANSWER_SENTENCES = 3
+
+
+def normalize_rows(matrix):
+    """Rows scaled to unit length (float32), so dot products are cosines."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def _is_normalized(matrix, sample=64):
+    if not len(matrix):
+        return True
+    norms = np.linalg.norm(np.asarray(matrix[:sample], dtype=np.float32), axis=1)
+    return bool(np.allclose(norms, 1.0, atol=1e-3))
+
+
+def top_k(scores, k):
+    """
+    Best k columns of each row of a (queries, candidates) score matrix,
+    best first. argpartition keeps it O(n) per query instead of a full sort.
+    Returns (indices, scores), both (queries, k).
+    """
+    k = min(k, scores.shape[1])
+    if k == 0:
+        empty = np.empty((scores.shape[0], 0))
+        return empty.astype(np.int64), empty.astype(np.float32)
+    n = scores.shape[1]
+    if k < n:
+        part = np.argpartition(scores, n - k, axis=1)[:, n - k:]
+    else:
+        part = np.broadcast_to(np.arange(k), (scores.shape[0], k))
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(part_scores, order, axis=1)
+
+
+class FlatIndex:
+    """Exact search: one matrix product of all queries against all vectors."""
+
+    def __init__(self, vectors):
+        # The embedding store keeps unit rows; only copy when it doesn't
+        self.vectors = vectors if _is_normalized(vectors) else normalize_rows(vectors)
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def search(self, queries, k=DEFAULT_TOP_K):
+        """queries: (m, d) unit vectors. Returns (ids, scores), both (m, k)."""
+        scores = np.asarray(queries, dtype=np.float32) @ np.asarray(self.vectors).T
+        return top_k(scores, k)
+
+
+class IVFIndex:
+    """
+    Inverted-file index: a spherical k-means coarse quantizer splits the
+    vectors into nlist lists, stored contiguously by list. A query scans only
+    the nprobe lists whose centroids are closest, so large multi-video
+    corpora are searched in a fraction of a flat scan (approximately).
+    """
+
+    def __init__(self, vectors, nlist=None, iterations=10, sample_per_list=64, seed=0):
+        vectors = normalize_rows(vectors)
+        n = len(vectors)
+        self.nlist = max(1, min(n, nlist or int(np.sqrt(n))))
+        rng = np.random.default_rng(seed)
+
+        # Train centroids on a sample
+        sample_size = min(n, self.nlist * sample_per_list)
+        sample = vectors[rng.choice(n, sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, self.nlist, replace=False)]
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            empty = ~sums.any(axis=1)
+            sums[empty] = centroids[empty]  # keep centroids that lost every point
+            centroids = normalize_rows(sums)
+        self.centroids = centroids
+
+        # Assign every vector, then lay the lists out contiguously
+        assign = np.concatenate([
+            np.argmax(vectors[i:i + 65536] @ centroids.T, axis=1) for i in range(0, n, 65536)
+        ]) if n else np.empty(0, dtype=np.int64)
+        self.ids = np.argsort(assign, kind="stable")
+        self.vectors = np.ascontiguousarray(vectors[self.ids])
+        self.offsets = np.searchsorted(assign[self.ids], np.arange(self.nlist + 1))
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def search(self, queries, k=DEFAULT_TOP_K, nprobe=IVF_NPROBE):
+        queries = np.asarray(queries, dtype=np.float32)
+        probes, _ = top_k(queries @ self.centroids.T, min(nprobe, self.nlist))
+        all_ids = np.full((len(queries), k), -1, dtype=np.int64)
+        all_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for row, (query, lists) in enumerate(zip(queries, probes)):
+            spans = [(self.offsets[c], self.offsets[c + 1]) for c in lists]
+            scores = np.concatenate([self.vectors[a:b] @ query for a, b in spans])
+            positions = np.concatenate([np.arange(a, b) for a, b in spans])
+            best, best_scores = top_k(scores[None, :], k)
+            all_ids[row, :best.shape[1]] = self.ids[positions[best[0]]]
+            all_scores[row, :best.shape[1]] = best_scores[0]
+        return all_ids, all_scores
+
+
+def reciprocal_rank_fusion(rankings, k, rrf_k=RRF_K):
+    """
+    Fuse ranked lists of row IDs (best first) by reciprocal rank:
+    score = sum over lists of 1 / (rrf_k + rank). Returns (rows, scores), best first.
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking, start=1):
+            fused[row] = fused.get(row, 0.0) + 1.0 / (rrf_k + rank)
+    best = sorted(fused.items(), key=lambda item: -item[1])[:k]
+    return [row for row, _ in best], [score for _, score in best]
+
+
+def build_index(vectors, use_ivf=None):
+    """Flat index for a lecture, IVF once the corpus reaches IVF_MIN_VECTORS."""
+    if use_ivf is None:
+        use_ivf = len(vectors) >= IVF_MIN_VECTORS
+    return IVFIndex(vectors) if use_ivf else FlatIndex(vectors)
+
+
+class CorpusIndex:
+    """
+    Search index over the chunk stores of one or more videos. Rows of the
+    stacked embedding matrix map back to (video, chunk ID); chunk text and
+    offsets are read from the chunk store by ID. Videos that have a BM25
+    index also get lexical search over the same rows.
+    """
+
+    def __init__(self, chunk_dirs, use_ivf=None):
+        self.chunk_dirs = list(chunk_dirs)
+        self.stores = [ChunkStore.in_dir(d) for d in self.chunk_dirs]
+        matrices, models = [], set()
+        for chunk_dir in self.chunk_dirs:
+            matrix, meta = EmbeddingStore(chunk_dir).load(mmap=True)
+            matrices.append(matrix)
+            models.add(meta["model"])
+        if len(models) > 1:
+            raise ValueError(f"Videos were embedded with different models: {sorted(models)}")
+        self.model_name = models.pop() if models else None
+        # Row where each video's embeddings start in the stacked matrix
+        self.starts = np.cumsum([0] + [len(m) for m in matrices])
+        vectors = matrices[0] if len(matrices) == 1 else np.concatenate(matrices)
+        self.index = build_index(vectors, use_ivf)
+
+        self.lexical = []
+        for chunk_dir, start, matrix in zip(self.chunk_dirs, self.starts, matrices):
+            lexical = BM25Index.in_dir(chunk_dir)
+            # A BM25 file from a newer partial snapshot than the embeddings is left out
+            if lexical is not None and len(lexical) == len(matrix):
+                self.lexical.append((lexical, int(start)))
+
+    def __len__(self):
+        return len(self.index)
+
+    def dense_search(self, query_vectors, k=DEFAULT_TOP_K):
+        """(rows, scores) per query, best first."""
+        ids, scores = self.index.search(query_vectors, k)
+        return [(row_ids[row_ids >= 0], row_scores[row_ids >= 0]) for row_ids, row_scores in zip(ids, scores)]
+
+    def lexical_search(self, question, k=DEFAULT_TOP_K):
+        """BM25 (rows, scores), best first; empty without BM25 indexes."""
+        indexes = [index for index, _ in self.lexical]
+        return search_bm25(indexes, question, k, starts=[start for _, start in self.lexical])
+
+    def hits(self, rows, scores):
+        """Chunk text, score, offsets and time range of each row."""
+        hits = []
+        for row, score in zip(list(rows), list(scores)):
+            row = int(row)
+            video = int(np.searchsorted(self.starts, row, side="right") - 1)
+            chunk = self.stores[video].get(row - int(self.starts[video]))
+            hits.append({
+                "chunk_id": chunk["id"],
+                "score": round(float(score), 4),
+                "text": chunk["text"],
+                "start": chunk["start"],
+                "end": chunk["end"],
+                "t_start": chunk.get("t_start"),
+                "t_end": chunk.get("t_end"),
+                **({"source": self.chunk_dirs[video]} if len(self.stores) > 1 else {}),
+            })
+        return hits
+
+    def search(self, query_vectors, k=DEFAULT_TOP_K):
+        """Per query, the dense top-k hits."""
+        return [self.hits(rows, scores) for rows, scores in self.dense_search(query_vectors, k)]
+
+    def hybrid_search(self, questions, query_vectors, k=DEFAULT_TOP_K):
+        """
+        Per question, dense and BM25 rankings fused by reciprocal rank.
+        Falls back to the dense ranking when there is no lexical index.
+        """
+        results = []
+        dense = self.dense_search(query_vectors, max(k, FUSION_CANDIDATES))
+        for question, (dense_rows, _) in zip(questions, dense):
+            rankings = [dense_rows.tolist()]
+            if self.lexical:
+                rankings.append(self.lexical_search(question, FUSION_CANDIDATES)[0].tolist())
+            rows, scores = reciprocal_rank_fusion(rankings, k)
+            results.append(self.hits(rows, scores))
+        return results
+
+
+class QnAEngine:
+    """
+    Answers questions about processed videos: embeds the question, retrieves
+    the top-k chunks (dense and BM25 rankings fused) and extracts the
+    sentences closest to the question.
+    Indexes are built once per chunk directory and rebuilt when the
+    embeddings change; answers go through the semantic answer cache.
+    """
+
+    def __init__(self, max_indexes=MAX_CACHED_INDEXES, answer_cache=None):
+        self.max_indexes = max_indexes
+        self.answer_cache = answer_cache or shared_answer_cache
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _version(chunk_dirs):
+        return tuple(os.path.getmtime(EmbeddingStore(d).index_path) for d in chunk_dirs)
+
+    def get_index(self, chunk_dirs):
+        chunk_dirs = tuple(chunk_dirs)
+        version = self._version(chunk_dirs)
+        with self._lock:
+            cached = self._indexes.get(chunk_dirs)
+            if cached and cached[0] == version:
+                self._indexes.move_to_end(chunk_dirs)
+                return cached[1]
+        index = CorpusIndex(chunk_dirs)
+        index.version = version
+        with self._lock:
+            self._indexes[chunk_dirs] = (version, index)
+            self._indexes.move_to_end(chunk_dirs)
+            while len(self._indexes) > self.max_indexes:
+                self._indexes.popitem(last=False)
+        return index
+
+    def retrieve(self, questions, chunk_dirs, top_k=DEFAULT_TOP_K):
+        """Top-k hits for each of a batch of questions."""
+        questions = list(questions)
+        index = self.get_index(chunk_dirs)
+        return index.hybrid_search(questions, encode_texts(questions, index.model_name), top_k)
+
+    def answer(self, question, chunk_dirs, top_k=DEFAULT_TOP_K):
+        chunk_dirs = tuple(chunk_dirs)
+        index = self.get_index(chunk_dirs)
+        query = encode_texts([question], index.model_name)
+
+        # A near-identical question about this video was answered already
+        cached = self.answer_cache.lookup((chunk_dirs, top_k), index.version, query[0])
+        if cached is not None:
+            return {**cached, "cached": True}
+
+        hits = index.hybrid_search([question], query, top_k)[0]
+        result = {"answer": self._extract_answer(query[0], hits, index.model_name), "chunks": hits}
+        self.answer_cache.put((chunk_dirs, top_k), index.version, query[0], question, result)
+        return {**result, "cached": False}
+
+    def invalidate(self, chunk_dir):
+        """Drop cached answers and indexes that involve chunk_dir (its chunks were regenerated)."""
+        self.answer_cache.invalidate(lambda key: chunk_dir in key[0])
+        with self._lock:
+            for chunk_dirs in [key for key in self._indexes if chunk_dir in key]:
+                del self._indexes[chunk_dirs]
+
+    @staticmethod
+    def _extract_answer(query, hits, model_name):
+        """The ANSWER_SENTENCES sentences of the top chunks closest to the question, in reading order."""
+        candidates, seen = [], set()
+        for rank, hit in enumerate(hits[:ANSWER_CHUNKS]):
+            text = hit["text"]
+            for start, end in iter_sentence_spans(text):
+                sentence = text[start:end]
+                if sentence not in seen:  # chunks overlap
+                    seen.add(sentence)
+                    candidates.append((rank, start, sentence))
+        # Drop sentence fragments at chunk edges that another chunk holds in full
+        candidates = [c for c in candidates
+                      if not any(c[2] != other and c[2] in other for other in seen)]
+        if not candidates:
+            return None
+        sentence_vectors = encode_texts([sentence for _, _, sentence in candidates], model_name)
+        best, _ = top_k((sentence_vectors @ query)[None, :], ANSWER_SENTENCES)
+        chosen = sorted(candidates[i] for i in best[0].tolist())
+        return " ".join(sentence for _, _, sentence in chosen)
+
+
+# Create global instance
+qna_engine = QnAEngine()
+
+
+def answer_question(question, chunk_dir=None, top_k=DEFAULT_TOP_K):
+    return qna_engine.answer(question, [chunk_dir or LEGACY_CHUNKS_DIR], top_k)
@@ -1,10 +1,13 @@
 # utils/llm_features/summarizer.py - ULTRA FAST VERSION
 
 import os
-from transformers import pipeline
 from dotenv import load_dotenv
 import logging
 
+from utils.llm_features.map_reduce import MapReduceSummarizer
+from utils.model_manager import get_summarization_pipeline, summarization_model_name
+from utils.result_cache import ResultCache, result_cache, text_hash
+
 # Load environment variables
 load_dotenv()
 
@@ -12,51 +15,27 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# "map_reduce" summarizes the whole transcript; "truncate" only its first model input
+SUMMARY_MODE = os.getenv("SUMMARY_MODE", "map_reduce")
+
 class TextSummarizer:
     def __init__(self):
         self.hf_api_token = os.getenv("HF_API_TOKEN")
-        self.summarizer = None
-        self._initialize_summarizer()
-    
-    def _initialize_summarizer(self):
-        """Initialize with the fastest available model"""
-        try:
-            # Use valid model names that exist on HuggingFace
-            model_options = [
-                "sshleifer/distilbart-cnn-12-6",  # Valid and fast
-                "facebook/bart-large-cnn",        # Valid and high quality
-                "Falconsai/text_summarization",   # Fast alternative
-            ]
-            
-            for model_name in model_options:
-                try:
-                    logger.info(f"Trying to load model: {model_name}")
-                    self.summarizer = pipeline(
-                        "summarization",
-                        model=model_name,
-                        token=self.hf_api_token,
-                        framework="pt"
-                    )
-                    logger.info(f"Summarizer initialized with model: {model_name}")
-                    break
-                except Exception as model_error:
-                    logger.warning(f"Failed to load {model_name}: {model_error}")
-                    continue
-            else:
-                # Fallback to any available summarization model
-                logger.warning("All specified models failed, using default summarization")
-                self.summarizer = pipeline(
-                    "summarization",
-                    token=self.hf_api_token
-                )
-            
-        except Exception as e:
-            logger.error(f"Error initializing summarizer: {e}")
-            raise
+
+    @property
+    def summarizer(self):
+        """Shared summarization pipeline, loaded by the model manager on first use"""
+        return get_summarization_pipeline()
     
-    def _read_transcript(self):
+    def _read_transcript(self, transcript_path=None):
         """Read the cleaned transcript directly"""
         try:
+            if transcript_path:
+                with open(transcript_path, 'r', encoding='utf-8') as f:
+                    transcript = f.read().strip()
+                logger.info(f"Read transcript: {len(transcript.split())} words from {transcript_path}")
+                return transcript
+
             # Try multiple possible paths
             possible_paths = [
                 "data/transcripts/transcript_cleaned.txt",
@@ -87,12 +66,14 @@ class TextSummarizer:
             logger.error(f"Error reading transcript: {e}")
             raise
 
-    def generate_summary(self):
+    def generate_summary(self, transcript_path=None, mode=None):
         """
         Ultra-fast summary generation
+        mode "map_reduce" (default) covers the full transcript, "truncate"
+        only what fits into one model input.
         """
         try:
-            transcript = self._read_transcript()
+            transcript = self._read_transcript(transcript_path)
             
             if not transcript:
                 return "No transcript content available for summarization."
@@ -109,19 +90,30 @@ class TextSummarizer:
                 max_len = 120
                 min_len = 60
             
-            logger.info(f"Summarizing {transcript_words} words -> {max_len} words")
+            mode = mode or SUMMARY_MODE
+            
+            def compute():
+                logger.info(f"Summarizing {transcript_words} words -> {max_len} words")
+                if mode == "map_reduce":
+                    return MapReduceSummarizer(self.summarizer).summarize(transcript, max_len, min_len)
+                # Ultra-fast settings
+                return self.summarizer(
+                    transcript,
+                    max_length=max_len,
+                    min_length=min_len,
+                    do_sample=False,
+                    truncation=True,
+                )[0]['summary_text']
             
-            # Ultra-fast settings
-            summary = self.summarizer(
-                transcript,
-                max_length=max_len,
-                min_length=min_len,
-                do_sample=False,
-                truncation=True,
-            )[0]['summary_text']
+            # Same transcript, model and settings -> same summary; concurrent requests share one run.
+            # Keyed on the checkpoint that actually loaded, not the preference list
+            model_name = summarization_model_name()
+            key = ResultCache.key("summary", text_hash(transcript), model_name,
+                                  {"max_length": max_len, "min_length": min_len, "mode": mode})
+            summary, cached = result_cache.get_or_compute(key, compute)
             
             final_word_count = len(summary.split())
-            logger.info(f"Fast summary generated: {final_word_count} words")
+            logger.info(f"Fast summary {'from cache' if cached else 'generated'}: {final_word_count} words")
             return summary
             
         except Exception as e:
@@ -138,5 +130,5 @@ class TextSummarizer:
 # Create global instance
 summarizer_instance = TextSummarizer()
 
-def generate_summary():
-    return summarizer_instance.generate_summary()
\ No newline at end of file
+def generate_summary(transcript_path=None):
+    return summarizer_instance.generate_summary(transcript_path)
\ No newline at end of file
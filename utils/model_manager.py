@@ -0,0 +1,186 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+# Summarization checkpoints in order of preference; the first that loads is used
+SUMMARIZATION_MODELS = (
+    "sshleifer/distilbart-cnn-12-6",  # Valid and fast
+    "facebook/bart-large-cnn",        # Valid and high quality
+    "Falconsai/text_summarization",   # Fast alternative
+)
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+# Which of SUMMARIZATION_MODELS the last load resolved to, so cache keys don't need the model
+RESOLVED_SUMMARIZATION_PATH = os.path.join("data", "cache", "summarization_model.json")
+
+# Comma-separated models to load in the background at startup ("" disables),
+# e.g. "summarization,embedding,whisper"
+PREWARM = os.getenv("MODEL_PREWARM", "")
+
+
+def _load_summarization_pipeline():
+    """The first summarization pipeline in SUMMARIZATION_MODELS that loads."""
+    summarizer = _try_summarization_models()
+    _record_summarization_model(_pipeline_model_name(summarizer))
+    return summarizer
+
+
+def _try_summarization_models():
+    from transformers import pipeline
+    token = os.getenv("HF_API_TOKEN")
+    for model_name in SUMMARIZATION_MODELS:
+        try:
+            print(f"[INFO] Trying to load summarization model: {model_name}")
+            return pipeline("summarization", model=model_name, token=token, framework="pt")
+        except Exception as e:
+            print(f"[WARN] Failed to load {model_name}: {e}")
+    # Fallback to any available summarization model
+    print("[WARN] All specified models failed, using default summarization")
+    return pipeline("summarization", token=token)
+
+
+def _pipeline_model_name(summarizer):
+    return getattr(summarizer.model, "name_or_path", "summarizer")
+
+
+def _record_summarization_model(model_name, path=RESOLVED_SUMMARIZATION_PATH):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"preference": list(SUMMARIZATION_MODELS), "model": model_name}, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"[WARN] Could not record the summarization model: {e}")
+
+
+def _recorded_summarization_model(path=RESOLVED_SUMMARIZATION_PATH):
+    """Model recorded by an earlier load with the same preference list, else None."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if record.get("preference") != list(SUMMARIZATION_MODELS):
+        return None
+    return record.get("model")
+
+
+def load_sentence_encoder(model_name=EMBEDDING_MODEL):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+
+class ModelManager:
+    """
+    Process-wide home of the heavy NLP models. Each model is registered
+    with a loader under a name and loaded on first use, once, however many
+    features or threads ask for it (the summary page and notes share one
+    distilbart). prewarm() loads models in a background thread so the
+    first request doesn't pay for it. Load times and how long callers
+    waited for a model are kept for stats().
+    """
+
+    def __init__(self):
+        self._loaders = {}
+        self._models = {}
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._load_seconds = {}
+        self._first_use_wait = {}
+        self._prewarm_thread = None
+
+    def register(self, name, loader):
+        with self._lock:
+            self._loaders[name] = loader
+
+    def is_registered(self, name):
+        with self._lock:
+            return name in self._loaders
+
+    def is_loaded(self, name):
+        with self._lock:
+            return name in self._models
+
+    def get(self, name):
+        """Return the model registered as name, loading it on first use."""
+        with self._lock:
+            model = self._models.get(name)
+            if model is not None:
+                return model
+            if name not in self._loaders:
+                raise KeyError(f"No model registered as '{name}'")
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        # Only one thread loads a given model; the others wait and reuse it
+        waited = time.perf_counter()
+        with load_lock:
+            with self._lock:
+                model = self._models.get(name)
+            if model is None:
+                print(f"[INFO] Loading model '{name}'...")
+                start = time.perf_counter()
+                model = self._loaders[name]()
+                elapsed = time.perf_counter() - start
+                print(f"[INFO] Model '{name}' loaded in {elapsed:.2f}s")
+                with self._lock:
+                    self._models[name] = model
+                    self._load_seconds[name] = round(elapsed, 3)
+        if threading.current_thread() is not self._prewarm_thread:
+            with self._lock:
+                self._first_use_wait.setdefault(name, round(time.perf_counter() - waited, 3))
+        return model
+
+    def prewarm(self, names, background=True):
+        """Load the named models now, in a daemon thread unless background=False."""
+        names = [name for name in names if name]
+
+        def load_all():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception as e:
+                    print(f"[WARN] Pre-warming '{name}' failed: {e}")
+
+        if not background:
+            load_all()
+            return None
+        self._prewarm_thread = threading.Thread(target=load_all, name="model-prewarm", daemon=True)
+        self._prewarm_thread.start()
+        return self._prewarm_thread
+
+    def stats(self):
+        with self._lock:
+            return {
+                "registered": sorted(self._loaders),
+                "loaded": sorted(self._models),
+                "load_seconds": dict(self._load_seconds),
+                # Time the first (non-prewarm) caller of each model spent waiting for it
+                "first_use_wait_seconds": dict(self._first_use_wait),
+                "prewarming": bool(self._prewarm_thread and self._prewarm_thread.is_alive()),
+            }
+
+
+# Create global instance
+model_manager = ModelManager()
+model_manager.register("summarization", _load_summarization_pipeline)
+model_manager.register("embedding", load_sentence_encoder)
+
+
+def get_summarization_pipeline():
+    return model_manager.get("summarization")
+
+
+def summarization_model_name():
+    """
+    Checkpoint the shared summarization pipeline uses, for cache keys.
+    Before it is loaded, the one an earlier load resolved to, so a cache
+    hit in a fresh process doesn't load the model; the pipeline is only
+    loaded here when no load was ever recorded.
+    """
+    if not model_manager.is_loaded("summarization"):
+        recorded = _recorded_summarization_model()
+        if recorded:
+            return recorded
+    return _pipeline_model_name(get_summarization_pipeline())
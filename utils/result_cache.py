@@ -0,0 +1,114 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+RESULTS_ROOT = os.path.join("data", "cache", "results")
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    """One in-progress computation that later callers wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ResultCache:
+    """
+    Persistent cache of generated outputs (summaries, notes) keyed by the
+    feature, transcript content hash, model and generation parameters.
+    Identical concurrent requests are single-flighted: the first computes,
+    the rest wait for its result instead of running the model again.
+    Failed computations are not cached.
+    """
+
+    def __init__(self, root=RESULTS_ROOT):
+        self.root = root
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0  # callers that waited on another caller's computation
+
+    @staticmethod
+    def key(feature, transcript_hash, model_name, params=None):
+        payload = json.dumps([feature, transcript_hash, model_name, params or {}], sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key + ".json")
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)["value"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, key, value):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"value": value}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def get_or_compute(self, key, compute):
+        """Returns (value, cached); compute() runs at most once per key at a time."""
+        value = self.get(key)
+        if value is not None:
+            with self._lock:
+                self.hits += 1
+            return value, True
+
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                self.misses += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, True
+
+        try:
+            # A previous leader may have finished between our lookup and now
+            value = self.get(key)
+            if value is not None:
+                flight.value = value
+                return value, True
+            flight.value = compute()
+            self.put(key, flight.value)
+            return flight.value, False
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            flight.done.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "shared_inflight": self.shared,
+                "inflight": len(self._inflight),
+            }
+
+
+# Create global instance
+result_cache = ResultCache()
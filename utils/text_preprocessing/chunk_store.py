@@ -0,0 +1,123 @@
+import json
+import os
+from array import array
+from bisect import bisect_right
+
+CHUNKS_FILE = "chunks.jsonl"
+INDEX_SUFFIX = ".idx"
+
+
+class ChunkStore:
+    """
+    All text chunks of a transcript packed into one JSONL file, one record
+    per line: {"id", "start", "end", "t_start", "t_end", "text"}.
+    start/end are character offsets into the cleaned transcript and
+    t_start/t_end the estimated source time range in seconds (None when the
+    transcript has no timing, e.g. YouTube captions).
+
+    A sidecar .idx file holds the byte offset of every line (uint64) so a
+    chunk can be read by ID with a single seek; bulk consumers just read
+    the JSONL front to back.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.index_path = path + INDEX_SUFFIX
+        self._offsets = None
+
+    @classmethod
+    def in_dir(cls, chunk_dir):
+        return cls(os.path.join(chunk_dir, CHUNKS_FILE))
+
+    def exists(self):
+        return os.path.exists(self.path) and os.path.exists(self.index_path)
+
+    def write(self, records):
+        """
+        Replace the store with records (dicts without "id"; IDs are
+        assigned in order). Written to temp files and renamed into place,
+        so a shorter transcript never leaves stale chunks behind.
+        Returns the number of chunks written.
+        """
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        offsets = array("Q")
+        tmp_path, tmp_index = self.path + ".tmp", self.index_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            for chunk_id, record in enumerate(records):
+                offsets.append(f.tell())
+                line = json.dumps({"id": chunk_id, **record}, ensure_ascii=False)
+                f.write(line.encode("utf-8") + b"\n")
+            offsets.append(f.tell())  # end of the last record
+        with open(tmp_index, "wb") as f:
+            offsets.tofile(f)
+        os.replace(tmp_path, self.path)
+        os.replace(tmp_index, self.index_path)
+        self._offsets = offsets
+        return len(offsets) - 1
+
+    def _load_offsets(self):
+        offsets = array("Q")
+        with open(self.index_path, "rb") as f:
+            offsets.frombytes(f.read())
+        self._offsets = offsets
+        return offsets
+
+    def __len__(self):
+        offsets = self._offsets if self._offsets is not None else self._load_offsets()
+        return max(0, len(offsets) - 1)
+
+    def get(self, chunk_id):
+        """Read one chunk record by ID (KeyError if out of range)."""
+        for reload in (False, True):
+            offsets = self._offsets if self._offsets is not None and not reload else self._load_offsets()
+            if not 0 <= chunk_id < len(offsets) - 1:
+                raise KeyError(chunk_id)
+            with open(self.path, "rb") as f:
+                f.seek(offsets[chunk_id])
+                record = json.loads(f.read(offsets[chunk_id + 1] - offsets[chunk_id]))
+            # The store was rewritten since the index was loaded
+            if record["id"] == chunk_id:
+                return record
+        raise KeyError(chunk_id)
+
+    def __iter__(self):
+        """All chunk records in ID order, in one sequential read."""
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def texts(self):
+        return [record["text"] for record in self]
+
+
+def load_time_mapper(segments_path, text_length):
+    """
+    Map character offsets of the cleaned transcript to source seconds using
+    the *_segments.json sidecar written by Whisper transcription.
+    Translation and cleaning change the text, so offsets are mapped
+    proportionally onto the raw segment text. Returns None without segments.
+    """
+    if not segments_path or not text_length or not os.path.exists(segments_path):
+        return None
+    with open(segments_path, "r", encoding="utf-8") as f:
+        segments = json.load(f)
+    if not segments:
+        return None
+
+    # Raw character position where each segment starts ("\n"-joined transcript)
+    starts, pos = [], 0
+    for segment in segments:
+        starts.append(pos)
+        pos += len(segment["text"]) + 1
+    scale = pos / text_length
+
+    def to_seconds(offset):
+        raw_pos = offset * scale
+        i = max(0, bisect_right(starts, raw_pos) - 1)
+        segment = segments[i]
+        span = len(segment["text"]) + 1
+        fraction = min(1.0, (raw_pos - starts[i]) / span)
+        return round(segment["start"] + fraction * (segment["end"] - segment["start"]), 2)
+
+    return to_seconds
@@ -1,6 +1,28 @@
+from collections import deque, namedtuple
+from functools import lru_cache
+from itertools import islice
 import os
 import re
 
+from utils.text_preprocessing.chunk_store import ChunkStore, load_time_mapper
+from utils.text_preprocessing.lexical_index import BM25_FILE, LexicalIndexBuilder
+
+LEGACY_CHUNK_RE = re.compile(r"^chunk_\d+\.txt$")
+
+# Per-consumer token budgets: (tokenizer, max tokens per chunk, overlap tokens)
+TOKEN_BUDGETS = {
+    "embedding": ("sentence-transformers/all-MiniLM-L6-v2", 256, 32),
+    "summarization": ("sshleifer/distilbart-cnn-12-6", 1024, 64),
+}
+# Sentences tokenized per tokenizer call
+TOKENIZE_BATCH = 512
+
+# A sentence: everything up to and including its end punctuation (or the end of text)
+_SENTENCE_RE = re.compile(r"[^.!?\u0964\u0965]+(?:[.!?\u0964\u0965]+|$)|[.!?\u0964\u0965]+")
+
+TextChunk = namedtuple("TextChunk", ["start", "end", "num_tokens", "text"])
+
+
 def find_project_data_dir():
     """
     Finds the main 'data' directory of the project dynamically.
@@ -17,58 +39,221 @@ def find_project_data_dir():
         current_dir = parent_dir
 
 
-def chunk_text(text, max_chars=1000, overlap=100):
+def iter_chunk_spans(text, max_chars=1000, overlap=100):
     """
-    Splits text into chunks with optional overlap.
+    Yields (start, end) character offsets of overlapping chunks of text,
+    preferring to end each chunk on a sentence boundary.
     """
-    text = re.sub(r'\s+', ' ', text).strip()
-    chunks = []
     start = 0
-
     while start < len(text):
         end = start + max_chars
-        chunk = text[start:end]
 
         # Try to end chunk on a sentence boundary
         if end < len(text):
             period_pos = text.rfind('.', start, end)
             if period_pos != -1 and period_pos > start + max_chars * 0.6:
-                chunk = text[start:period_pos + 1]
                 end = period_pos + 1
 
-        chunks.append(chunk.strip())
+        # Offsets of the chunk without surrounding spaces
+        chunk_start, chunk_end = start, min(end, len(text))
+        while chunk_start < chunk_end and text[chunk_start] == ' ':
+            chunk_start += 1
+        while chunk_end > chunk_start and text[chunk_end - 1] == ' ':
+            chunk_end -= 1
+        yield chunk_start, chunk_end
+
         start = end - overlap
 
-    return chunks
 
+def chunk_text(text, max_chars=1000, overlap=100):
+    """
+    Splits text into chunks with optional overlap.
+    """
+    text = re.sub(r'\s+', ' ', text).strip()
+    return [text[start:end] for start, end in iter_chunk_spans(text, max_chars, overlap)]
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer(name):
+    """Shared fast tokenizer by model name (loaded once per process)."""
+    from transformers import AutoTokenizer
+    return AutoTokenizer.from_pretrained(name, use_fast=True)
 
-def chunk_and_save(input_path, max_chars=1000, overlap=100):
+
+def iter_sentence_spans(text):
+    """(start, end) offsets of every sentence, found in one regex pass."""
+    for match in _SENTENCE_RE.finditer(text):
+        start, end = match.span()
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start < end:
+            yield start, end
+
+
+def _iter_token_pieces(text, tokenizer, max_tokens, spans=None):
     """
-    Reads a text file, splits it into chunks, and saves each chunk
-    inside 'data/text chunks'.
+    Yields (start, end, num_tokens) per sentence (spans, by default every
+    sentence of text), tokenizing sentences in batches. A sentence longer
+    than max_tokens is cut at token offsets.
     """
-    data_dir = find_project_data_dir()
-    text_chunk_dir = os.path.join(data_dir, "text chunks")
-    os.makedirs(text_chunk_dir, exist_ok=True)
+    spans = iter_sentence_spans(text) if spans is None else spans
+    while True:
+        batch = list(islice(spans, TOKENIZE_BATCH))
+        if not batch:
+            return
+        encoded = tokenizer([text[start:end] for start, end in batch],
+                            add_special_tokens=False, return_offsets_mapping=True)
+        for (start, end), offsets in zip(batch, encoded["offset_mapping"]):
+            if len(offsets) <= max_tokens:
+                yield start, end, len(offsets)
+                continue
+            for i in range(0, len(offsets), max_tokens):
+                window = offsets[i:i + max_tokens]
+                yield start + window[0][0], start + window[-1][1], len(window)
+        if len(batch) < TOKENIZE_BATCH:
+            return
 
-    # Also ensure 'vectorized file' folder exists for later use
-    os.makedirs(os.path.join(data_dir, "vectorized file"), exist_ok=True)
+
+class StreamingTokenChunker:
+    """
+    Token chunking of text that arrives piece by piece (the streaming
+    pipeline feeds cleaned text as it is produced). chunks() returns the
+    chunks that can no longer change; a sentence still open at the end of
+    the text so far waits for more text or for final=True. The result is
+    the same as chunking the whole text at once.
+    """
+
+    def __init__(self, consumer="embedding", max_tokens=None, overlap_tokens=None, tokenizer=None):
+        tokenizer_name, default_max, default_overlap = TOKEN_BUDGETS[consumer]
+        self.tokenizer = tokenizer or get_tokenizer(tokenizer_name)
+        max_tokens = max_tokens or default_max
+        self.overlap_tokens = default_overlap if overlap_tokens is None else overlap_tokens
+        # Leave room for [CLS]/[SEP] or <s>/</s>
+        self.budget = max(1, max_tokens - self.tokenizer.num_special_tokens_to_add())
+        self.text = ""
+        self._scanned = 0  # text before this offset is split into sentences already
+        self._window = deque()
+        self._window_tokens = 0
+        self._fresh = False  # the window holds text not yielded yet
+
+    def _sentence_spans(self, final):
+        # Sentence matches tile the text, so resuming at the last match end is exact
+        for match in _SENTENCE_RE.finditer(self.text, self._scanned):
+            start, end = match.span()
+            if end == len(self.text) and not final:
+                return  # may still grow with the next piece
+            self._scanned = end
+            while start < end and self.text[start].isspace():
+                start += 1
+            while end > start and self.text[end - 1].isspace():
+                end -= 1
+            if start < end:
+                yield start, end
+
+    def _emit(self):
+        start, end = self._window[0][0], self._window[-1][1]
+        return TextChunk(start, end, self._window_tokens, self.text[start:end])
+
+    def chunks(self, text="", final=False):
+        """Add text and yield every TextChunk it completes (all remaining ones when final)."""
+        self.text += text
+        window = self._window
+        for piece in _iter_token_pieces(self.text, self.tokenizer, self.budget, self._sentence_spans(final)):
+            if window and self._window_tokens + piece[2] > self.budget:
+                yield self._emit()
+                self._fresh = False
+                # Keep the tail that fits in the overlap (and still leaves room for piece)
+                while window and (self._window_tokens > self.overlap_tokens
+                                  or self._window_tokens + piece[2] > self.budget):
+                    self._window_tokens -= window.popleft()[2]
+            window.append(piece)
+            self._window_tokens += piece[2]
+            self._fresh = True
+        if final and self._fresh:
+            yield self._emit()
+            self._fresh = False
+
+
+def iter_token_chunks(text, consumer="embedding", max_tokens=None, overlap_tokens=None, tokenizer=None):
+    """
+    Generator of TextChunk(start, end, num_tokens, text) sized in model
+    tokens for the given consumer (see TOKEN_BUDGETS). Chunks end on
+    sentence boundaries and the next chunk starts with up to
+    overlap_tokens worth of trailing sentences from the previous one.
+    Each sentence is tokenized once and visited at most twice, so the
+    whole pass is O(n).
+    """
+    chunker = StreamingTokenChunker(consumer, max_tokens, overlap_tokens, tokenizer)
+    return chunker.chunks(text, final=True)
+
+
+def chunk_text_tokens(text, consumer="embedding", **kwargs):
+    """List of chunk strings sized in tokens for consumer."""
+    text = re.sub(r'\s+', ' ', text).strip()
+    return [chunk.text for chunk in iter_token_chunks(text, consumer, **kwargs)]
+
+
+def chunk_and_save(input_path, max_chars=1000, overlap=100, output_dir=None, segments_path=None,
+                   consumer=None):
+    """
+    Reads a text file, splits it into chunks, and packs them into a single
+    chunk store (chunks.jsonl + offsets index) inside output_dir
+    (defaults to 'data/text chunks'). With segments_path (the Whisper
+    *_segments.json sidecar) each chunk also gets its source time range.
+    With consumer (a TOKEN_BUDGETS key) chunks are sized in that model's
+    tokens instead of max_chars characters. A BM25 index of the chunks
+    (bm25.npz) is written alongside.
+    """
+    if output_dir:
+        text_chunk_dir = output_dir
+    else:
+        data_dir = find_project_data_dir()
+        text_chunk_dir = os.path.join(data_dir, "text chunks")
+        # Also ensure 'vectorized file' folder exists for later use
+        os.makedirs(os.path.join(data_dir, "vectorized file"), exist_ok=True)
+    os.makedirs(text_chunk_dir, exist_ok=True)
 
     # Read text file
     with open(input_path, "r", encoding="utf-8") as f:
-        text = f.read()
+        text = re.sub(r'\s+', ' ', f.read()).strip()
+
+    to_seconds = load_time_mapper(segments_path, len(text))
+
+    spans = None
+    if consumer:
+        try:
+            get_tokenizer(TOKEN_BUDGETS[consumer][0])
+            spans = ((chunk.start, chunk.end) for chunk in iter_token_chunks(text, consumer))
+        except (ImportError, OSError) as e:
+            print(f"[WARN] Tokenizer unavailable ({e}), chunking by characters")
+    if spans is None:
+        spans = iter_chunk_spans(text, max_chars=max_chars, overlap=overlap)
+
+    # The BM25 index is filled in the same pass that writes the chunk store
+    lexical_index = LexicalIndexBuilder()
+
+    def records():
+        for chunk_id, (start, end) in enumerate(spans):
+            lexical_index.add(chunk_id, text[start:end])
+            yield {
+                "start": start,
+                "end": end,
+                "t_start": to_seconds(start) if to_seconds else None,
+                "t_end": to_seconds(end) if to_seconds else None,
+                "text": text[start:end],
+            }
 
-    # Create chunks
-    chunks = chunk_text(text, max_chars=max_chars, overlap=overlap)
+    count = ChunkStore.in_dir(text_chunk_dir).write(records())
+    lexical_index.save(os.path.join(text_chunk_dir, BM25_FILE))
 
-    # Save chunks
-    for i, chunk in enumerate(chunks, start=1):
-        chunk_filename = f"chunk_{i:03}.txt"
-        chunk_path = os.path.join(text_chunk_dir, chunk_filename)
-        with open(chunk_path, "w", encoding="utf-8") as f:
-            f.write(chunk)
+    # Drop per-chunk files left by older versions
+    for name in os.listdir(text_chunk_dir):
+        if LEGACY_CHUNK_RE.match(name):
+            os.remove(os.path.join(text_chunk_dir, name))
 
-    print(f"[INFO]  {len(chunks)} chunks saved in: {text_chunk_dir}")
+    print(f"[INFO]  {count} chunks saved in: {text_chunk_dir}")
     return text_chunk_dir
 
 
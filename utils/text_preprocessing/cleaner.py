@@ -1,42 +1,168 @@
 import re
 import os
+from concurrent.futures import ProcessPoolExecutor
 
-def clean_and_save_transcript(input_path):
+BLOCK_SIZE = 64 * 1024
+
+# One fused pattern: timestamps like [00:10], (00:10), 00:10, 1:23:45, any
+# character outside normal punctuation / Latin / Hindi letters, and
+# whitespace. Every run of them becomes a single space. Runs of plain
+# symbols/whitespace are consumed by the first branch in one step; an
+# opening bracket is only tried as part of a timestamp before it is
+# treated as a symbol.
+_CLEAN_RE = re.compile(
+    r"(?:[^a-zA-Z0-9\u0900-\u097F.,?!\[(]+"
+    r"|\[?\(?\d{1,2}:\d{2}(?::\d{2})?\)?\]?"
+    r"|[\[(])+"
+)
+# Letters and sentence punctuation never take part in a match. Devanagari
+# digits (U+0966-U+096F) are left out: like any \d they can be part of a timestamp
+_ANCHOR_RE = re.compile(r"[a-zA-Z\u0900-\u0965\u0970-\u097F.,?!]")
+# Longest look-ahead the pattern needs to decide a match ("[(12:34:56)]" + margin)
+_TAIL = 16
+# Carry size after which a buffer without any letters is cut the slow way
+_MAX_CARRY = 1024 * 1024
+
+
+def _clean_buffer_slow(buf):
+    """Match-by-match fallback for long runs without letters (tables of numbers)."""
+    parts, pos = [], 0
+    consumed = None
+    for m in _CLEAN_RE.finditer(buf):
+        # A match this close to the end might still grow with the next block,
+        # and text just before it might still turn out to start a timestamp
+        if m.end() + _TAIL > len(buf):
+            consumed = min(m.start(), max(pos, len(buf) - _TAIL))
+            break
+        parts.append(buf[pos:m.start()])
+        parts.append(" ")
+        pos = m.end()
+    if consumed is None:
+        consumed = max(pos, len(buf) - _TAIL)
+    parts.append(buf[pos:consumed])
+    return "".join(parts), consumed
+
+
+def _clean_buffer(buf, final):
     """
-    Cleans the transcript text (removes timestamps, symbols, and extra spaces)
-    and saves the cleaned version as transcript_cleaned.txt in the same folder.
+    Clean as much of buf as is safe without seeing more input.
+    Returns (cleaned_text, consumed_chars); the rest must be carried over.
     """
-    try:
-        # --- Step 1: Read the transcript file ---
-        with open(input_path, "r", encoding="utf-8") as f:
-            text = f.read()
+    if final:
+        return _CLEAN_RE.sub(" ", buf), len(buf)
+    # Cutting right after a letter can't split a timestamp or a whitespace run
+    cut = len(buf)
+    while cut > 0 and not _ANCHOR_RE.match(buf, cut - 1):
+        cut -= 1
+    if cut == 0:
+        return _clean_buffer_slow(buf) if len(buf) > _MAX_CARRY else ("", 0)
+    return _CLEAN_RE.sub(" ", buf[:cut]), cut
+
+
+def iter_clean_text(blocks):
+    """
+    Single-pass streaming cleaner: takes text blocks of any size and yields
+    cleaned text (timestamps, symbols and extra whitespace removed, leading
+    and trailing space stripped) without holding the whole transcript.
+    """
+    carry = ""
+    started = False        # something has been yielded already
+    space_pending = False  # a separating space is owed before the next text
+
+    def normalize(cleaned):
+        nonlocal started, space_pending
+        core = cleaned.strip(" ")
+        if not core:
+            space_pending = space_pending or bool(cleaned)
+            return ""
+        out = (" " if started and (space_pending or cleaned[0] == " ") else "") + core
+        started = True
+        space_pending = cleaned[-1] == " "
+        return out
+
+    for block in blocks:
+        buf = carry + block
+        cleaned, consumed = _clean_buffer(buf, final=False)
+        carry = buf[consumed:]
+        out = normalize(cleaned)
+        if out:
+            yield out
+    cleaned, _ = _clean_buffer(carry, final=True)
+    out = normalize(cleaned)
+    if out:
+        yield out
 
-        if not text.strip():
-            print(" Transcript file is empty.")
-            return None
 
-        # --- Step 2: Cleaning logic ---
-        cleaned_text = text
+def read_blocks(input_path, block_size=BLOCK_SIZE):
+    """Read a text file in buffered blocks."""
+    with open(input_path, "r", encoding="utf-8") as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            yield block
 
-        # Remove timestamps like [00:10], (00:10), 00:10, 1:23:45
-        cleaned_text = re.sub(r"\[?\(?\d{1,2}:\d{2}(?::\d{2})?\)?\]?", " ", cleaned_text)
 
-        # Remove special characters, keeping normal punctuation and Hindi letters
-        cleaned_text = re.sub(r"[^a-zA-Z0-9\u0900-\u097F\s.,?!]", " ", cleaned_text)
+def stream_clean_file(input_path, block_size=BLOCK_SIZE):
+    """Yield the cleaned text of a transcript file block by block."""
+    return iter_clean_text(read_blocks(input_path, block_size))
 
-        # Remove multiple spaces and newlines
-        cleaned_text = re.sub(r"\s+", " ", cleaned_text).strip()
 
-        # --- Step 3: Save the cleaned transcript ---
-        base_dir = os.path.dirname(input_path)
-        output_path = os.path.join(base_dir, "transcript_cleaned.txt")
+def clean_text(text):
+    """Clean an in-memory string."""
+    return "".join(iter_clean_text([text]))
 
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(cleaned_text)
 
+def clean_and_save_transcript(input_path, output_dir=None, output_name="transcript_cleaned.txt"):
+    """
+    Cleans the transcript text (removes timestamps, symbols, and extra spaces)
+    and saves the cleaned version as transcript_cleaned.txt in output_dir
+    (defaults to the same folder as the input).
+    """
+    try:
+        base_dir = output_dir or os.path.dirname(input_path)
+        os.makedirs(base_dir, exist_ok=True)
+        output_path = os.path.join(base_dir, output_name)
+        tmp_path = output_path + ".tmp"
+
+        # --- Stream: read blocks, clean in one fused pass, write as we go ---
+        written = 0
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for piece in stream_clean_file(input_path):
+                f.write(piece)
+                written += len(piece)
+
+        if not written:
+            os.remove(tmp_path)
+            print(" Transcript file is empty.")
+            return None
+
+        os.replace(tmp_path, output_path)
         print(f" Cleaned transcript saved at: {output_path}")
         return output_path
 
     except Exception as e:
         print(f" Error cleaning transcript: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+def _clean_one(args):
+    input_path, output_dir = args
+    stem = os.path.splitext(os.path.basename(input_path))[0]
+    return clean_and_save_transcript(input_path, output_dir, output_name=f"{stem}_cleaned.txt")
+
+
+def clean_transcripts(input_paths, output_dir=None, workers=None):
+    """
+    Bulk API: clean many transcripts on a process pool.
+    Each input becomes <name>_cleaned.txt; returns output paths in input
+    order (None for files that were empty or failed).
+    """
+    input_paths = list(input_paths)
+    if not input_paths:
+        return []
+    workers = workers or min(len(input_paths), os.cpu_count() or 1)
+    if workers <= 1:
+        return [_clean_one((path, output_dir)) for path in input_paths]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_clean_one, [(path, output_dir) for path in input_paths]))
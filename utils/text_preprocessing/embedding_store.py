@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+EMBEDDINGS_FILE = "embeddings.npy"
+INDEX_FILE = "embeddings_index.json"
+
+
+def content_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Chunk embeddings of one transcript: a float32 .npy matrix with one row
+    per chunk ID, plus a JSON index of the encoder model, chunk IDs and the
+    content hash of every row. The matrix is memory-mapped on load, and
+    rows whose hash is unchanged are reused instead of re-encoded.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.matrix_path = os.path.join(directory, EMBEDDINGS_FILE)
+        self.index_path = os.path.join(directory, INDEX_FILE)
+
+    def exists(self):
+        return os.path.exists(self.matrix_path) and os.path.exists(self.index_path)
+
+    def load_index(self):
+        """The index dict, or None if there is no (readable) store."""
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def load(self, mmap=True):
+        """(matrix, index); the matrix is read-only and paged in lazily when mmap=True."""
+        index = self.load_index()
+        if index is None:
+            raise FileNotFoundError(f"No embedding store in {self.directory}")
+        matrix = np.load(self.matrix_path, mmap_mode="r" if mmap else None)
+        if len(matrix) != len(index["hashes"]):
+            raise ValueError(f"Embedding store in {self.directory} is out of sync with its index")
+        return matrix, index
+
+    def save(self, matrix, hashes, model_name):
+        """Write matrix and index through temp files; the index is replaced last."""
+        os.makedirs(self.directory, exist_ok=True)
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        tmp_matrix, tmp_index = self.matrix_path + ".tmp", self.index_path + ".tmp"
+        with open(tmp_matrix, "wb") as f:
+            np.save(f, matrix)
+        with open(tmp_index, "w", encoding="utf-8") as f:
+            json.dump({
+                "model": model_name,
+                "dim": int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+                "ids": list(range(len(hashes))),
+                "hashes": list(hashes),
+            }, f)
+        os.replace(tmp_matrix, self.matrix_path)
+        os.replace(tmp_index, self.index_path)
+        return self.matrix_path
+
+    def reusable_rows(self, model_name):
+        """{content hash: row} of the stored matrix when it was built with model_name."""
+        index = self.load_index()
+        if not index or index.get("model") != model_name or not os.path.exists(self.matrix_path):
+            return {}, None
+        try:
+            matrix, index = self.load(mmap=True)
+        except (OSError, ValueError):
+            return {}, None
+        return {h: row for row, h in enumerate(index["hashes"])}, matrix
+
+    def update(self, texts, encode, model_name):
+        """
+        Bring the store in line with texts (in chunk ID order), encoding only
+        texts whose content hash has no stored row. encode(list_of_texts)
+        must return a float32 matrix. Returns (matrix_path, encoded_count).
+        """
+        hashes = [content_hash(text) for text in texts]
+        rows, old_matrix = self.reusable_rows(model_name)
+
+        # Each new distinct text is encoded once, even if it repeats
+        missing = {}
+        for text, h in zip(texts, hashes):
+            if h not in rows and h not in missing:
+                missing[h] = text
+        new_vectors = {}
+        if missing:
+            encoded = np.asarray(encode(list(missing.values())), dtype=np.float32)
+            new_vectors = dict(zip(missing, encoded))
+
+        dim = (old_matrix.shape[1] if old_matrix is not None and len(old_matrix)
+               else next(iter(new_vectors.values())).shape[0] if new_vectors else 0)
+        matrix = np.empty((len(texts), dim), dtype=np.float32)
+        for i, h in enumerate(hashes):
+            matrix[i] = old_matrix[rows[h]] if h in rows else new_vectors[h]
+        del old_matrix  # release the memory map before replacing the file
+        return self.save(matrix, hashes, model_name), len(missing)
@@ -0,0 +1,146 @@
+import math
+import os
+import re
+from array import array
+from collections import Counter
+
+import numpy as np
+
+BM25_FILE = "bm25.npz"
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Words, numbers and symbol-free pieces of formulas ("e", "mc2"), any script
+_TERM_RE = re.compile(r"[^\W_]+")
+
+
+def tokenize(text):
+    return _TERM_RE.findall(text.lower())
+
+
+class LexicalIndexBuilder:
+    """
+    Accumulates chunks one at a time (as the chunker produces them) and
+    writes a compact BM25 inverted index: per term, a slice of doc IDs and
+    term frequencies in two flat arrays (CSR layout), plus every chunk's
+    length in terms.
+    """
+
+    def __init__(self):
+        self._vocab = {}
+        self._postings = []  # per term id: array of (doc_id, tf) pairs
+        self._doc_lengths = array("I")
+
+    def add(self, doc_id, text):
+        if doc_id != len(self._doc_lengths):
+            raise ValueError(f"Chunks must be added in ID order (expected {len(self._doc_lengths)}, got {doc_id})")
+        counts = Counter(tokenize(text))
+        self._doc_lengths.append(sum(counts.values()))
+        for term, tf in counts.items():
+            term_id = self._vocab.get(term)
+            if term_id is None:
+                term_id = self._vocab[term] = len(self._postings)
+                self._postings.append(array("I"))
+            self._postings[term_id].extend((doc_id, tf))
+
+    def save(self, path):
+        terms = sorted(self._vocab)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        for i, term in enumerate(terms):
+            offsets[i + 1] = offsets[i] + len(self._postings[self._vocab[term]]) // 2
+        pairs = np.empty((int(offsets[-1]), 2), dtype=np.uint32)
+        for i, term in enumerate(terms):
+            pairs[offsets[i]:offsets[i + 1]] = np.frombuffer(
+                self._postings[self._vocab[term]], dtype=np.uint32).reshape(-1, 2)
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                # Terms never contain newlines, so one joined byte string suffices
+                terms=np.frombuffer("\n".join(terms).encode("utf-8"), dtype=np.uint8),
+                offsets=offsets,
+                doc_ids=pairs[:, 0].copy(),
+                tfs=pairs[:, 1].astype(np.float32),
+                doc_lengths=np.frombuffer(self._doc_lengths, dtype=np.uint32).astype(np.float32),
+            )
+        os.replace(tmp_path, path)
+        return path
+
+
+class BM25Index:
+    """Read side of a LexicalIndexBuilder file: BM25 scoring over one video's chunks."""
+
+    def __init__(self, path, k1=BM25_K1, b=BM25_B):
+        with np.load(path) as data:
+            terms = data["terms"].tobytes().decode("utf-8")
+            self.offsets = data["offsets"]
+            self.doc_ids = data["doc_ids"].astype(np.int64)
+            self.tfs = data["tfs"]
+            self.doc_lengths = data["doc_lengths"]
+        self.vocab = {term: i for i, term in enumerate(terms.split("\n"))} if terms else {}
+        self.k1 = k1
+        self.num_docs = len(self.doc_lengths)
+        avg_length = float(self.doc_lengths.mean()) if self.num_docs else 0.0
+        # Per-document part of the BM25 denominator, computed once
+        self.length_norm = k1 * (1 - b + b * self.doc_lengths / max(avg_length, 1e-9))
+
+    @classmethod
+    def in_dir(cls, chunk_dir):
+        path = os.path.join(chunk_dir, BM25_FILE)
+        return cls(path) if os.path.exists(path) else None
+
+    def __len__(self):
+        return self.num_docs
+
+    def document_frequency(self, term):
+        term_id = self.vocab.get(term)
+        return 0 if term_id is None else int(self.offsets[term_id + 1] - self.offsets[term_id])
+
+    def scores(self, query, num_docs=None, dfs=None):
+        """
+        BM25 score of every chunk for query. num_docs/dfs override the
+        collection statistics when several videos are searched together.
+        """
+        scores = np.zeros(self.num_docs, dtype=np.float32)
+        num_docs = num_docs or self.num_docs
+        for term, qtf in Counter(tokenize(query)).items():
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                continue
+            df = dfs[term] if dfs else self.document_frequency(term)
+            idf = math.log(1 + (num_docs - df + 0.5) / (df + 0.5))
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            docs, tfs = self.doc_ids[start:end], self.tfs[start:end]
+            scores[docs] += qtf * idf * tfs * (self.k1 + 1) / (tfs + self.length_norm[docs])
+        return scores
+
+
+def search_bm25(indexes, query, k, starts=None):
+    """
+    Top-k (row, score) over one or more per-video indexes, scored with
+    corpus-wide statistics. Rows are offset by starts[i] for index i.
+    Returns (rows, scores) arrays, best first; chunks without any query term are left out.
+    """
+    if not indexes:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    starts = starts if starts is not None else [0] * len(indexes)
+    dfs = None
+    num_docs = None
+    if len(indexes) > 1:
+        terms = set(tokenize(query))
+        num_docs = sum(len(index) for index in indexes)
+        dfs = {term: sum(index.document_frequency(term) for index in indexes) for term in terms}
+
+    rows, scores = [], []
+    for index, start in zip(indexes, starts):
+        doc_scores = index.scores(query, num_docs, dfs)
+        hits = np.flatnonzero(doc_scores)
+        rows.append(hits + start)
+        scores.append(doc_scores[hits])
+    rows, scores = np.concatenate(rows), np.concatenate(scores)
+    if len(scores) > k:
+        best = np.argpartition(scores, len(scores) - k)[len(scores) - k:]
+        rows, scores = rows[best], scores[best]
+    order = np.argsort(-scores, kind="stable")
+    return rows[order], scores[order]
@@ -0,0 +1,367 @@
+import os
+import queue
+import threading
+
+import numpy as np
+
+from utils.model_manager import EMBEDDING_MODEL
+from utils.text_preprocessing.chunk_store import ChunkStore, load_time_mapper
+from utils.text_preprocessing.chunker import LEGACY_CHUNK_RE, StreamingTokenChunker, iter_chunk_spans
+from utils.text_preprocessing.cleaner import iter_clean_text
+from utils.text_preprocessing.embedding_store import EmbeddingStore, content_hash
+from utils.text_preprocessing.lexical_index import BM25_FILE, LexicalIndexBuilder
+from utils.text_preprocessing.translation_backends import get_translation_backend
+from utils.text_preprocessing.translator import _SENTENCE_END_RE, looks_english, translate_text
+from utils.text_preprocessing.vectorizer import encode_texts
+
+# Items buffered between two stages before the upstream one waits
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "64"))
+# Transcript characters gathered before deciding whether it needs translation
+LANGUAGE_SAMPLE_CHARS = 2000
+# Backend-sized pieces handed to the translator per call
+TRANSLATE_BATCH_PIECES = 4
+# Chunks encoded per embedding call
+EMBED_BATCH = 64
+# Chunks after which a first partial index is published for Q&A; then each time the count doubles
+FIRST_PUBLISH_CHUNKS = int(os.getenv("PIPELINE_FIRST_PUBLISH", "32"))
+# Pipelines running at once (four stage threads each, embedding and translation
+# models busy); defaults to the nlp job workers
+MAX_LIVE_PIPELINES = int(os.getenv("PIPELINE_MAX_LIVE", os.getenv("JOB_WORKERS_NLP", "2")))
+
+_live_slots = threading.BoundedSemaphore(max(1, MAX_LIVE_PIPELINES))
+
+_DONE = object()
+
+
+class _Aborted(Exception):
+    """Another stage failed; unwinds the stage threads still running."""
+
+
+class StreamingTextPipeline:
+    """
+    Translate -> clean -> chunk -> embed as concurrent stages joined by
+    bounded queues, so text flows on as soon as the first transcript
+    segments exist instead of each step waiting for the whole video.
+    Writes the same artifacts as translate_to_eng, clean_and_save_transcript,
+    chunk_and_save and vectorize_chunks. The chunk store, BM25 index and
+    embeddings are also published part-way (after FIRST_PUBLISH_CHUNKS
+    chunks, then at every doubling), so Q&A works before the rest is done.
+
+    feed() raw transcript text from the producer (e.g. the transcription
+    loop), close() when it is done, then finish() to wait for the result.
+    The first error in any stage stops the others and is raised by
+    feed()/finish(). At most MAX_LIVE_PIPELINES run at once: start() waits
+    for a slot, which is freed when the stage threads exit.
+    on_event(event_type, **fields) receives step and publish events.
+    """
+
+    def __init__(self, output_dir, chunks_dir, segments_path=None, on_event=None,
+                 queue_size=PIPELINE_QUEUE_SIZE, model_name=EMBEDDING_MODEL):
+        self.output_dir = output_dir
+        self.chunks_dir = chunks_dir
+        self.segments_path = segments_path
+        self.english_path = os.path.join(output_dir, "transcript_english.txt")
+        self.cleaned_path = os.path.join(output_dir, "transcript_cleaned.txt")
+        self.model_name = model_name
+        self._on_event = on_event
+        self._incoming = queue.Queue(queue_size)
+        self._cleaning = queue.Queue(queue_size)
+        self._chunking = queue.Queue(queue_size)
+        self._embedding = queue.Queue(queue_size)
+        self._failed = threading.Event()
+        self._error = None
+        self._threads = []
+        self._running = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._cleaned_length = 0
+        self.chunk_count = 0
+
+    # ---- plumbing ----
+
+    def _emit(self, event_type, **fields):
+        if self._on_event:
+            self._on_event(event_type, **fields)
+
+    def _put(self, q, item):
+        while True:
+            if self._failed.is_set():
+                raise _Aborted()
+            try:
+                q.put(item, timeout=0.2)
+                return
+            except queue.Full:
+                continue
+
+    def _iter(self, q):
+        while True:
+            if self._failed.is_set():
+                raise _Aborted()
+            try:
+                item = q.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            if item is _DONE:
+                return
+            yield item
+
+    def _run(self, name, stage):
+        try:
+            stage()
+        except _Aborted:
+            pass
+        except BaseException as e:
+            print(f"[PIPELINE ERROR] {name} failed: {e}")
+            self.abort(e)
+        finally:
+            with self._lock:
+                self._running -= 1
+                last = self._running == 0
+            if last:
+                _live_slots.release()
+
+    def start(self, wait=True, check=None):
+        """
+        Start the stage threads once a pipeline slot is free. With
+        wait=False returns None instead of waiting; check() is called while
+        waiting and may raise (e.g. a cancelled job).
+        """
+        while not _live_slots.acquire(timeout=0.5 if wait else 0):
+            if not wait:
+                return None
+            if check:
+                check()
+        os.makedirs(self.output_dir, exist_ok=True)
+        os.makedirs(self.chunks_dir, exist_ok=True)
+        self._running = 4
+        for name, stage in (("translate", self._translate_stage), ("clean", self._clean_stage),
+                            ("chunk", self._chunk_stage), ("vectorize", self._embed_stage)):
+            thread = threading.Thread(target=self._run, args=(name, stage), name=f"pipeline-{name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def abort(self, error=None):
+        """Stop every stage; finish() raises error (first one wins)."""
+        if self._error is None:
+            self._error = error or RuntimeError("Pipeline aborted")
+        self._failed.set()
+
+    def feed(self, text):
+        """Add raw transcript text; waits while the pipeline is a full queue behind."""
+        try:
+            self._put(self._incoming, text)
+        except _Aborted:
+            raise self._error
+
+    def close(self):
+        """No more input: the stages drain on their own (and free the slot) without waiting for finish()."""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._put(self._incoming, _DONE)
+        except _Aborted:
+            pass
+
+    def finish(self, check=None):
+        """
+        Close the input and wait for every stage. check() is called while
+        waiting; an exception from it (e.g. a cancelled job) aborts the
+        pipeline. Returns the chunks directory.
+        """
+        self.close()
+        try:
+            for thread in self._threads:
+                while thread.is_alive():
+                    thread.join(0.5)
+                    if check:
+                        check()
+        except BaseException as e:
+            self.abort(e)
+            for thread in self._threads:
+                thread.join()
+        if self._error is not None:
+            raise self._error
+        return self.chunks_dir
+
+    def run(self, blocks, check=None):
+        """Whole pipeline over an iterable of text blocks (e.g. read_blocks of a transcript)."""
+        self.start(check=check)
+        try:
+            for block in blocks:
+                self.feed(block)
+        except BaseException as e:
+            self.abort(e)
+        return self.finish(check)
+
+    # ---- stages ----
+
+    def _translate(self, text, backend):
+        try:
+            return translate_text(text, backend=backend, detect=False)
+        except Exception as e:
+            print(f" Error during translation: {e}")
+            return text  # fallback
+
+    def _translate_stage(self):
+        english = None
+        backend = None
+        pending = ""
+        tmp_path = self.english_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as out:
+
+            def forward(text):
+                if text:
+                    out.write(text)
+                    self._put(self._cleaning, text)
+
+            for text in self._iter(self._incoming):
+                pending += text
+                if english is None:
+                    if len(pending) < LANGUAGE_SAMPLE_CHARS:
+                        continue
+                    english = looks_english(pending)
+                    self._emit("step", step="translate", skipped=english)
+                if english:
+                    forward(pending)
+                    pending = ""
+                    continue
+                backend = backend or get_translation_backend()
+                if len(pending) < TRANSLATE_BATCH_PIECES * backend.max_chars:
+                    continue
+                # Translate whole sentences only; the open one waits for the next segment
+                cut = 0
+                for match in _SENTENCE_END_RE.finditer(pending):
+                    cut = match.end()
+                if cut == 0 and len(pending) < 2 * TRANSLATE_BATCH_PIECES * backend.max_chars:
+                    continue
+                head, pending = (pending[:cut], pending[cut:]) if cut else (pending, "")
+                forward(self._translate(head, backend) + "\n")
+
+            if english is None:
+                english = looks_english(pending)
+                self._emit("step", step="translate", skipped=english)
+            if english:
+                forward(pending)
+            elif pending.strip():
+                forward(self._translate(pending, backend or get_translation_backend()))
+        os.replace(tmp_path, self.english_path)
+        print(f"[INFO]  English transcript saved at: {self.english_path}")
+        self._put(self._cleaning, _DONE)
+
+    def _clean_stage(self):
+        tmp_path = self.cleaned_path + ".tmp"
+        written = 0
+        with open(tmp_path, "w", encoding="utf-8") as out:
+            for piece in iter_clean_text(self._iter(self._cleaning)):
+                if not written:
+                    self._emit("step", step="clean")
+                out.write(piece)
+                written += len(piece)
+                self._put(self._chunking, piece)
+        if not written:
+            os.remove(tmp_path)
+            raise ValueError("Transcript is empty after cleaning")
+        os.replace(tmp_path, self.cleaned_path)
+        print(f" Cleaned transcript saved at: {self.cleaned_path}")
+        self._put(self._chunking, _DONE)
+
+    def _chunk_stage(self):
+        try:
+            chunker = StreamingTokenChunker("embedding")
+        except (ImportError, OSError) as e:
+            print(f"[WARN] Tokenizer unavailable ({e}), chunking by characters")
+            chunker = None
+
+        text = []
+        started = False
+        for piece in self._iter(self._chunking):
+            if not started:
+                self._emit("step", step="chunk")
+                started = True
+            if chunker is None:
+                text.append(piece)
+                continue
+            for chunk in chunker.chunks(piece):
+                self._put(self._embedding, (chunk.start, chunk.end, chunk.text))
+
+        if chunker is None:
+            # Character spans need the whole text
+            text = "".join(text)
+            self._cleaned_length = len(text)
+            for start, end in iter_chunk_spans(text):
+                self._put(self._embedding, (start, end, text[start:end]))
+        else:
+            for chunk in chunker.chunks(final=True):
+                self._put(self._embedding, (chunk.start, chunk.end, chunk.text))
+            self._cleaned_length = len(chunker.text)
+        self._put(self._embedding, _DONE)
+
+    def _embed_stage(self):
+        # Rows of a previous run of this video are reused by content hash
+        rows, old_matrix = EmbeddingStore(self.chunks_dir).reusable_rows(self.model_name)
+        reused = {h: np.array(old_matrix[row]) for h, row in rows.items()} if rows else {}
+        del old_matrix
+
+        spans, texts, hashes, vectors, missing = [], [], [], [], []
+        lexical_index = LexicalIndexBuilder()
+        next_publish = FIRST_PUBLISH_CHUNKS
+
+        def encode_missing():
+            if missing:
+                encoded = encode_texts([texts[i] for i in missing], self.model_name)
+                for i, vector in zip(missing, encoded):
+                    vectors[i] = vector
+                missing.clear()
+
+        for start, end, text in self._iter(self._embedding):
+            if not texts:
+                self._emit("step", step="vectorize")
+            chunk_id = len(texts)
+            spans.append((start, end))
+            texts.append(text)
+            hashes.append(content_hash(text))
+            vectors.append(reused.get(hashes[-1]))
+            lexical_index.add(chunk_id, text)
+            if vectors[-1] is None:
+                missing.append(chunk_id)
+            if len(missing) >= EMBED_BATCH:
+                encode_missing()
+            if len(texts) >= next_publish:
+                encode_missing()
+                self._publish(spans, texts, hashes, vectors, lexical_index, final=False)
+                next_publish *= 2
+
+        if not texts:
+            raise ValueError("No text chunks were produced")
+        encode_missing()
+        self._publish(spans, texts, hashes, vectors, lexical_index, final=True)
+
+    def _publish(self, spans, texts, hashes, vectors, lexical_index, final):
+        """Write chunk store, BM25 index and embeddings for the chunks so far (embeddings last)."""
+        # Source times need the final text length; partial snapshots go without
+        to_seconds = load_time_mapper(self.segments_path, self._cleaned_length) if final else None
+
+        def records():
+            for (start, end), text in zip(spans, texts):
+                yield {
+                    "start": start,
+                    "end": end,
+                    "t_start": to_seconds(start) if to_seconds else None,
+                    "t_end": to_seconds(end) if to_seconds else None,
+                    "text": text,
+                }
+
+        ChunkStore.in_dir(self.chunks_dir).write(records())
+        lexical_index.save(os.path.join(self.chunks_dir, BM25_FILE))
+        EmbeddingStore(self.chunks_dir).save(np.stack(vectors), hashes, self.model_name)
+        self.chunk_count = len(texts)
+
+        if final:
+            # Files left by older versions
+            for name in os.listdir(self.chunks_dir):
+                if LEGACY_CHUNK_RE.match(name) or name == "embeddings.pkl":
+                    os.remove(os.path.join(self.chunks_dir, name))
+            print(f"[INFO]  {len(texts)} chunks saved and embedded in: {self.chunks_dir}")
+        self._emit("index_published", chunks=len(texts), final=final)
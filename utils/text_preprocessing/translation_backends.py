@@ -0,0 +1,173 @@
+from concurrent.futures import ThreadPoolExecutor
+import os
+import random
+import threading
+import time
+
+try:
+    from googletrans import Translator
+except ImportError:  # optional: air-gapped workers run without it
+    Translator = None
+
+MAX_CONCURRENCY = int(os.getenv("TRANSLATE_CONCURRENCY", "4"))
+RATE_PER_SECOND = float(os.getenv("TRANSLATE_RATE", "3"))   # sustained requests/second
+RATE_BURST = int(os.getenv("TRANSLATE_BURST", "4"))
+MAX_RETRIES = 3
+
+MARIAN_MODEL = os.getenv("MARIAN_MODEL", "Helsinki-NLP/opus-mt-mul-en")
+MARIAN_BATCH_SIZE = int(os.getenv("MARIAN_BATCH_SIZE", "16"))
+MARIAN_MAX_TOKENS = 512
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate=RATE_PER_SECOND, capacity=RATE_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class TranslationBackend:
+    """
+    A translation engine. translate_batch returns one result per input text,
+    in order, with None for texts that could not be translated.
+    max_chars is the largest piece the backend should be given.
+    """
+
+    name = "base"
+    max_chars = 4000
+
+    def translate_batch(self, texts, dest="en"):
+        raise NotImplementedError
+
+
+class GoogleTransBackend(TranslationBackend):
+    """googletrans web API: concurrent requests under a shared rate limit."""
+
+    name = "googletrans"
+    max_chars = 4000  # googletrans request size limit
+
+    def __init__(self, max_workers=MAX_CONCURRENCY, rate_limiter=None):
+        if Translator is None:
+            raise RuntimeError("googletrans is not installed")
+        self.max_workers = max_workers
+        self.rate_limiter = rate_limiter or TokenBucket()
+        self._local = threading.local()
+
+    def _translator(self):
+        """One client per worker thread (its HTTP session isn't thread-safe)."""
+        if not hasattr(self._local, "translator"):
+            self._local.translator = Translator()
+        return self._local.translator
+
+    def _translate_one(self, text, index, total, dest):
+        for attempt in range(MAX_RETRIES):
+            self.rate_limiter.acquire()
+            try:
+                translated = self._translator().translate(text, dest=dest).text
+                print(f"[INFO]  Translated chunk {index + 1}/{total}")
+                return translated
+            except Exception as e:
+                print(f"[WARN] Chunk {index + 1} retry {attempt + 1}/{MAX_RETRIES} failed: {e}")
+                # Exponential backoff with jitter so workers don't retry in lockstep
+                time.sleep((2 ** attempt) * 0.5 + random.random() * 0.5)
+        return None
+
+    def translate_batch(self, texts, dest="en"):
+        total = len(texts)
+        if not total:
+            return []
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, total))) as pool:
+            return list(pool.map(self._translate_one, texts, range(total), [total] * total, [dest] * total))
+
+
+class MarianBackend(TranslationBackend):
+    """
+    Local MarianMT seq2seq model (transformers), no network needed.
+    Inputs are sorted by length and cut into batches so each padded batch
+    holds similarly sized sentences, then decoded greedily on CPU.
+    """
+
+    name = "marian"
+    max_chars = 400  # about a sentence or two, well under the 512-token limit
+
+    def __init__(self, model_name=MARIAN_MODEL, batch_size=MARIAN_BATCH_SIZE):
+        self.model_name = model_name
+        self.batch_size = max(1, batch_size)
+        self._model = None
+        self._tokenizer = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._model is None:
+                from transformers import MarianMTModel, MarianTokenizer
+                print(f"[INFO] Loading translation model '{self.model_name}'...")
+                self._tokenizer = MarianTokenizer.from_pretrained(self.model_name)
+                self._model = MarianMTModel.from_pretrained(self.model_name).eval()
+        return self._model, self._tokenizer
+
+    def translate_batch(self, texts, dest="en"):
+        if dest != "en":
+            raise ValueError(f"{self.model_name} only translates to English")
+        if not texts:
+            return []
+        import torch
+        model, tokenizer = self._load()
+
+        # Length-sorted bucketing keeps padding (wasted compute) per batch small
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        results = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            idxs = order[start:start + self.batch_size]
+            batch = [texts[i] for i in idxs]
+            try:
+                inputs = tokenizer(batch, return_tensors="pt", padding=True,
+                                   truncation=True, max_length=MARIAN_MAX_TOKENS)
+                with torch.inference_mode():
+                    outputs = model.generate(**inputs, num_beams=1, max_new_tokens=MARIAN_MAX_TOKENS)
+                decoded = tokenizer.batch_decode(outputs, skip_special_tokens=True)
+                for i, text in zip(idxs, decoded):
+                    results[i] = text
+            except Exception as e:
+                print(f"[WARN] Translation batch failed: {e}")
+        return results
+
+
+_BACKENDS = {
+    GoogleTransBackend.name: GoogleTransBackend,
+    MarianBackend.name: MarianBackend,
+}
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def default_backend_name():
+    """TRANSLATION_BACKEND, else googletrans when installed, else the local model."""
+    return os.getenv("TRANSLATION_BACKEND") or ("googletrans" if Translator is not None else "marian")
+
+
+def get_translation_backend(name=None):
+    """Shared backend instance by name (models are loaded once per process)."""
+    name = name or default_backend_name()
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown translation backend: {name}")
+    with _instances_lock:
+        if name not in _instances:
+            _instances[name] = _BACKENDS[name]()
+        return _instances[name]
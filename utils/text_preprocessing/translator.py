@@ -1,44 +1,182 @@
-from googletrans import Translator
+import hashlib
+import json
 import os
-import time
+import re
+import threading
 
-def translate_to_eng(transcript_path):
+from utils.text_preprocessing.translation_backends import get_translation_backend
+
+# Backend retried for pieces the primary backend could not translate ("" disables)
+FALLBACK_BACKEND = os.getenv("TRANSLATION_FALLBACK", "marian")
+CACHE_PATH = os.path.join("data", "cache", "translations.jsonl")
+
+# Sentence ends: Latin punctuation plus the Devanagari danda
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?।॥])\s+")
+_WORD_RE = re.compile(r"[A-Za-z']+")
+_ENGLISH_STOPWORDS = frozenset(
+    "the a an and or but of to in on at for with is are was were be been it this that "
+    "these those you we they he she i not as by from so if what which who how".split()
+)
+
+
+class TranslationCache:
+    """
+    Per-chunk translations keyed by a hash of the backend, target language and source text.
+    Kept in memory and appended to a JSONL file so they survive restarts.
+    """
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self._entries = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(text, dest, backend_name):
+        return hashlib.sha256(f"{backend_name}\n{dest}\n{text}".encode("utf-8")).hexdigest()
+
+    def _load(self):
+        self._entries = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        self._entries[record["key"]] = record["text"]
+                    except (ValueError, KeyError):
+                        continue  # a torn last line from a crash
+
+    def get(self, key):
+        with self._lock:
+            if self._entries is None:
+                self._load()
+            return self._entries.get(key)
+
+    def put(self, key, text):
+        with self._lock:
+            if self._entries is None:
+                self._load()
+            if key in self._entries:
+                return
+            self._entries[key] = text
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"key": key, "text": text}, ensure_ascii=False) + "\n")
+
+
+# Create global instance
+translation_cache = TranslationCache()
+
+
+def looks_english(text, sample_chars=5000):
+    """
+    Cheap local language check: mostly ASCII letters and a healthy share of
+    common English function words. Avoids a detection request per transcript.
+    """
+    sample = text[:sample_chars]
+    letters = [c for c in sample if c.isalpha()]
+    if not letters:
+        return True
+    ascii_ratio = sum(c.isascii() for c in letters) / len(letters)
+    words = [w.lower() for w in _WORD_RE.findall(sample)]
+    if ascii_ratio < 0.9 or not words:
+        return False
+    return sum(w in _ENGLISH_STOPWORDS for w in words) / len(words) >= 0.15
+
+
+def split_sentences(text, max_chars=4000):
+    """
+    Split text into pieces of at most max_chars that end on sentence
+    boundaries; an over-long sentence is cut at the last space that fits.
+    """
+    pieces, current = [], ""
+    for sentence in _SENTENCE_END_RE.split(text):
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(sentence[:cut])
+            sentence = sentence[cut:].lstrip()
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _translate_pieces(pieces, dest, backend):
+    """Translate pieces through the cache; returns None for pieces that failed."""
+    keys = [translation_cache.key(piece, dest, backend.name) for piece in pieces]
+    results = [translation_cache.get(key) for key in keys]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        translated = backend.translate_batch([pieces[i] for i in missing], dest=dest)
+        for i, text in zip(missing, translated):
+            if text is not None:
+                translation_cache.put(keys[i], text)
+                results[i] = text
+    return results
+
+
+def translate_text(text, dest="en", backend=None, detect=True):
+    """
+    Translate text to `dest` with the configured backend, sentence-aligned
+    and cached per piece. Pieces the backend fails on are retried with the
+    fallback backend and only left untranslated if that fails too.
+    detect=False skips the already-English check (the caller decided).
+    """
+    if detect and dest == "en" and looks_english(text):
+        print("[INFO] Text is already English, skipping translation.")
+        return text
+
+    backend = backend or get_translation_backend()
+    pieces = split_sentences(text, backend.max_chars)
+    print(f"[INFO] Detected {len(pieces)} chunks for translation ({backend.name}).")
+    if not pieces:
+        return text
+
+    results = _translate_pieces(pieces, dest, backend)
+
+    failed = [i for i, result in enumerate(results) if result is None]
+    if failed and FALLBACK_BACKEND and FALLBACK_BACKEND != backend.name:
+        print(f"[WARN] {len(failed)} chunks failed, retrying with {FALLBACK_BACKEND}")
+        try:
+            fallback = get_translation_backend(FALLBACK_BACKEND)
+            for i in failed:
+                sub_pieces = split_sentences(pieces[i], fallback.max_chars)
+                sub_results = _translate_pieces(sub_pieces, dest, fallback)
+                if all(r is not None for r in sub_results):
+                    results[i] = " ".join(sub_results)
+        except Exception as e:
+            print(f"[WARN] Fallback translation unavailable: {e}")
+
+    for i, result in enumerate(results):
+        if result is None:
+            print(f"[WARN] Chunk {i + 1} left untranslated")
+            results[i] = pieces[i]
+    return "\n".join(results)
+
+
+def translate_to_eng(transcript_path, output_dir=None):
     """
     Translates a transcript (any language) to English.
-    Creates a new file transcript_english.txt in the same folder.
+    Creates a new file transcript_english.txt in output_dir
+    (defaults to the folder of the transcript).
     """
     try:
-        # Initialize translator
-        translator = Translator()
-
         # Read transcript
         with open(transcript_path, "r", encoding="utf-8") as f:
             text = f.read().strip()
 
-        # --- Split long text into safe chunks ---
-        def split_text(text, max_chars=4000):
-            return [text[i:i+max_chars] for i in range(0, len(text), max_chars)]
-
-        chunks = split_text(text)
-        print(f"[INFO] Detected {len(chunks)} chunks for translation.")
-
-        translated_chunks = []
-        for i, chunk in enumerate(chunks):
-            for attempt in range(3):  # retry up to 3 times per chunk
-                try:
-                    translated = translator.translate(chunk, dest='en')
-                    translated_chunks.append(translated.text)
-                    print(f"[INFO]  Translated chunk {i+1}/{len(chunks)}")
-                    break
-                except Exception as e:
-                    print(f"[WARN] Chunk {i+1} retry {attempt+1}/3 failed: {e}")
-                    time.sleep(2)
-            time.sleep(1)  # prevent hitting rate limits
-
-        english_text = "\n".join(translated_chunks)
+        english_text = translate_text(text)
 
         # Save new file
-        base_dir = os.path.dirname(transcript_path)
+        base_dir = output_dir or os.path.dirname(transcript_path)
+        os.makedirs(base_dir, exist_ok=True)
         output_path = os.path.join(base_dir, "transcript_english.txt")
         with open(output_path, "w", encoding="utf-8") as f:
             f.write(english_text)
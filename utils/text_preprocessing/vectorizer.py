@@ -1,46 +1,95 @@
 # utils/llm_features/vectorizer.py
 
 import os
-import pickle
-from sentence_transformers import SentenceTransformer
 
-def vectorize_chunks(chunk_dir):
+from utils.model_manager import EMBEDDING_MODEL, load_sentence_encoder, model_manager
+from utils.text_preprocessing.chunk_store import ChunkStore
+from utils.text_preprocessing.embedding_store import EmbeddingStore
+
+# Fixed batch size override; unset means pick one from the chunk lengths
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "0"))
+# Padded tokens per encoder batch the auto batch size aims for
+TOKENS_PER_BATCH = 16384
+
+
+def get_encoder(model_name=EMBEDDING_MODEL):
+    """Shared SentenceTransformer per model name (loaded once by the model manager)."""
+    if model_name == EMBEDDING_MODEL:
+        return model_manager.get("embedding")
+    name = f"embedding:{model_name}"
+    if not model_manager.is_registered(name):
+        model_manager.register(name, lambda: load_sentence_encoder(model_name))
+    return model_manager.get(name)
+
+
+def auto_batch_size(model, texts):
     """
-    Vectorizes all text chunks from the given chunk_dir using SentenceTransformer.
-    Saves a single embeddings.pkl file in the same folder and PRESERVES text chunks.
+    Batch size that keeps about TOKENS_PER_BATCH padded tokens per batch:
+    many short chunks get big batches, long chunks small ones.
+    Estimates ~4 characters per token, capped at the model's max length.
     """
-    # Load embedding model
-    model = SentenceTransformer('all-MiniLM-L6-v2')
+    if EMBED_BATCH_SIZE:
+        return EMBED_BATCH_SIZE
+    if not texts:
+        return 1
+    max_tokens = getattr(model, "max_seq_length", None) or 512
+    avg_tokens = min(max_tokens, max(1, sum(len(text) for text in texts) // (4 * len(texts))))
+    batch_size = TOKENS_PER_BATCH // avg_tokens
+    return max(8, min(256, 1 << (batch_size.bit_length() - 1)))
+
+
+def encode_texts(texts, model_name=EMBEDDING_MODEL, show_progress_bar=False):
+    """Unit-length float32 embeddings of texts with the shared encoder."""
+    model = get_encoder(model_name)
+    return model.encode(
+        texts,
+        batch_size=auto_batch_size(model, texts),
+        show_progress_bar=show_progress_bar,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+    ).astype("float32", copy=False)
 
-    # Collect all text chunks
-    txt_files = [f for f in os.listdir(chunk_dir) if f.endswith(".txt")]
-    if not txt_files:
+
+def vectorize_chunks(chunk_dir):
+    """
+    Vectorizes all text chunks from the chunk store in chunk_dir using SentenceTransformer.
+    Saves embeddings.npy (float32, one row per chunk ID) and its ID/hash index
+    in the same folder, re-encoding only chunks whose text changed,
+    and PRESERVES the chunk store.
+    """
+    store = ChunkStore.in_dir(chunk_dir)
+    if not store.exists():
         print("No text chunks found in folder.")
         return None
 
-    print(f"Loaded {len(txt_files)} text chunks for vectorization...")
+    # One sequential read, in chunk ID order
+    chunks = store.texts()
+    if not chunks:
+        print("No text chunks found in folder.")
+        return None
 
-    chunks = []
-    for filename in txt_files:
-        file_path = os.path.join(chunk_dir, filename)
-        with open(file_path, "r", encoding="utf-8") as f:
-            chunks.append(f.read())
+    print(f"Loaded {len(chunks)} text chunks for vectorization...")
 
-    # Generate embeddings
-    embeddings = model.encode(chunks, show_progress_bar=True, batch_size=8)
+    # Generate embeddings for new or changed chunks only
+    output_path, encoded = EmbeddingStore(chunk_dir).update(
+        chunks,
+        lambda texts: encode_texts(texts, show_progress_bar=True),
+        EMBEDDING_MODEL,
+    )
+    print(f"Encoded {encoded} new or changed chunks out of {len(chunks)}")
 
-    # Save embeddings.pkl in the same directory
-    output_path = os.path.join(chunk_dir, "embeddings.pkl")
-    with open(output_path, "wb") as f:
-        pickle.dump(embeddings, f)
+    # Embeddings from older versions
+    legacy_path = os.path.join(chunk_dir, "embeddings.pkl")
+    if os.path.exists(legacy_path):
+        os.remove(legacy_path)
 
     print(f"Embeddings saved successfully to: {output_path}")
 
     # ✅ PRESERVING text chunk files (commented out deletion)
-    # Text chunks are kept for summarization, notes generation, etc.
+    # The chunk store is kept for summarization, notes generation, etc.
     print("Text chunks preserved for summarization and other features.")
-    
+
     return output_path
 
 # Example usage:
-# vectorize_chunks("data/text_chunks")
\ No newline at end of file
+# vectorize_chunks("data/text_chunks")
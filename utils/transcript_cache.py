@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+CACHE_ROOT = os.path.join("data", "cache")
+
+# Read/hash block size for uploads
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# Per-video artifacts worth keeping, relative to the job's transcripts folder
+TRANSCRIPT_FILES = (
+    "transcript.txt",
+    "transcript_segments.json",
+    "transcript_english.txt",
+    "transcript_cleaned.txt",
+)
+# The Whisper or caption output itself, final as soon as transcription is done
+RAW_TRANSCRIPT_FILES = TRANSCRIPT_FILES[:2]
+
+
+def youtube_cache_key(video_id, model_name):
+    return _cache_key("youtube", video_id, model_name)
+
+
+def upload_cache_key(sha256_hex, model_name):
+    return _cache_key("upload", sha256_hex, model_name)
+
+
+def _cache_key(kind, source_id, model_name):
+    return hashlib.sha256(f"{kind}:{source_id}:{model_name}".encode("utf-8")).hexdigest()
+
+
+def save_and_hash_upload(stream, dest_path, block_size=HASH_BLOCK_SIZE):
+    """
+    Copy an uploaded file stream to dest_path while computing its SHA-256,
+    so the bytes are read only once. Returns the hex digest.
+    """
+    digest = hashlib.sha256()
+    with open(dest_path, "wb") as out:
+        while True:
+            block = stream.read(block_size)
+            if not block:
+                break
+            digest.update(block)
+            out.write(block)
+    return digest.hexdigest()
+
+
+def _atomic_copy(src, dst):
+    """Copy src to dst through a temp file so readers never see a partial file."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(dst), prefix=".tmp-")
+    os.close(fd)
+    try:
+        shutil.copy2(src, tmp_path)
+        os.replace(tmp_path, dst)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class TranscriptCache:
+    """
+    Persistent, content-addressed store of per-video pipeline outputs.
+    Entries are keyed by YouTube video ID or upload SHA-256 plus the Whisper
+    model name and mirror a job workspace: transcripts/ holds the raw,
+    English and cleaned transcripts, "text chunks"/ the chunks and embeddings.
+    """
+
+    def __init__(self, root=CACHE_ROOT):
+        self.root = root
+
+    def _entry_dir(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def _meta_path(self, key):
+        return os.path.join(self._entry_dir(key), "meta.json")
+
+    def lookup(self, key):
+        """Metadata of a cache entry, or None on a miss."""
+        try:
+            with open(self._meta_path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def store(self, key, workspace, source=None, transcript_only=False):
+        """
+        Copy what the job has produced into the cache entry. Call it only
+        once the text pipeline has finished, or with transcript_only=True
+        while it may still be writing: then just the raw transcript is
+        kept and the entry stays incomplete.
+        """
+        entry = self._entry_dir(key)
+        transcripts_dir = os.path.join(entry, "transcripts")
+        chunks_dir = os.path.join(entry, "text chunks")
+        os.makedirs(transcripts_dir, exist_ok=True)
+
+        stored = []
+        for name in RAW_TRANSCRIPT_FILES if transcript_only else TRANSCRIPT_FILES:
+            src = os.path.join(workspace.transcripts_dir, name)
+            if os.path.exists(src):
+                _atomic_copy(src, os.path.join(transcripts_dir, name))
+                stored.append(name)
+
+        complete = not transcript_only and os.path.exists(workspace.embeddings_path)
+        if complete:
+            os.makedirs(chunks_dir, exist_ok=True)
+            for name in os.listdir(workspace.chunks_dir):
+                src = os.path.join(workspace.chunks_dir, name)
+                # Leftovers of an interrupted write are not artifacts
+                if os.path.isfile(src) and not name.endswith(".tmp"):
+                    _atomic_copy(src, os.path.join(chunks_dir, name))
+
+        meta = self.lookup(key) or {"created": time.time(), "source": source}
+        meta.update({"files": stored, "complete": complete, "updated": time.time()})
+        fd, tmp_path = tempfile.mkstemp(dir=entry, prefix=".tmp-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._meta_path(key))
+        print(f"[INFO] Cached {len(stored)} transcript files for {key[:12]} (complete={complete})")
+        return meta
+
+    def restore(self, key, workspace):
+        """
+        Populate a fresh workspace from the cache.
+        Returns the entry metadata, or None if there is no usable entry.
+        """
+        meta = self.lookup(key)
+        if not meta or "transcript.txt" not in meta.get("files", []):
+            return None
+        entry = self._entry_dir(key)
+        workspace.create()
+        for name in meta["files"]:
+            # Copies, not links: later stages rewrite these files in place
+            shutil.copy2(os.path.join(entry, "transcripts", name),
+                         os.path.join(workspace.transcripts_dir, name))
+        if meta.get("complete"):
+            chunks_dir = os.path.join(entry, "text chunks")
+            for name in os.listdir(chunks_dir):
+                shutil.copy2(os.path.join(chunks_dir, name), os.path.join(workspace.chunks_dir, name))
+        print(f"[INFO] Restored job {workspace.job_id} from cache {key[:12]}")
+        return meta
+
+    def invalidate(self, key):
+        entry = self._entry_dir(key)
+        if os.path.exists(entry):
+            shutil.rmtree(entry)
+
+
+# Create global instance
+transcript_cache = TranscriptCache()
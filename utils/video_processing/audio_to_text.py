@@ -1,23 +1,31 @@
 import os
+import json
 import shutil
-import whisper
 import re
 from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound
 
+from utils.video_processing.parallel_transcriber import transcribe_chunks_parallel
+from utils.video_processing.batched_transcriber import BATCH_SIZE
+
 OUTPUT_TRANSCRIPT = "data/transcripts/transcript.txt"
 
 
+def extract_youtube_video_id(youtube_url):
+    """11-character video ID of a YouTube URL, or None if there is none."""
+    match = re.search(r"(?:v=|\/)([0-9A-Za-z_-]{11}).*", youtube_url)
+    return match.group(1) if match else None
+
+
 def get_youtube_transcript(youtube_url):
     """Fetch YouTube transcript in any available language.
     Auto-translate to English if possible, else return original language text.
     """
     try:
         # Extract video ID
-        match = re.search(r"(?:v=|\/)([0-9A-Za-z_-]{11}).*", youtube_url)
-        if not match:
+        video_id = extract_youtube_video_id(youtube_url)
+        if not video_id:
             raise ValueError("Invalid YouTube URL")
 
-        video_id = match.group(1)
         ytt_api = YouTubeTranscriptApi()
 
         # List all available transcripts
@@ -56,22 +64,38 @@ def get_youtube_transcript(youtube_url):
 
 
 
-def transcribe_audio_to_text(chunks, model_name="tiny", output_path=OUTPUT_TRANSCRIPT):
-    """Transcribe audio chunks using Whisper (fallback method)."""
-    model = whisper.load_model(model_name)
-    recognitions = []
+def segments_path_for(transcript_path):
+    """Sidecar file holding per-segment start/end offsets of a transcript."""
+    base, _ = os.path.splitext(transcript_path)
+    return base + "_segments.json"
 
-    for chunk_file in chunks:
-        print(f"[INFO] Transcribing chunk: {chunk_file}")
-        result = model.transcribe(chunk_file)
-        text = result.get("text", "").strip()
-        if text:
-            recognitions.append(text)
+
+def transcribe_audio_to_text(chunks, model_name="tiny", output_path=OUTPUT_TRANSCRIPT, workers=None,
+                             batch_size=BATCH_SIZE, on_progress=None, on_segment=None, journal=None):
+    """Transcribe audio chunks using Whisper (fallback method).
+    Chunks are spread over a process pool (workers=1 transcribes in-process)
+    and decoded batch_size at a time; on_progress, on_segment and the
+    checkpoint journal are passed through to transcribe_chunks_parallel.
+    """
+    results = transcribe_chunks_parallel(chunks, model_name=model_name, workers=workers, batch_size=batch_size,
+                                         on_progress=on_progress, on_segment=on_segment, journal=journal)
+    recognitions = [text for _, text, _, _ in results if text]
+    if results and all(error for _, _, error, _ in results):
+        raise RuntimeError("Whisper failed on every audio chunk")
 
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     with open(output_path, "w", encoding="utf-8") as f:
         f.write("\n".join(recognitions))
 
+    # Keep source offsets of speech segments next to the transcript
+    segments = [
+        {"index": idx, "start": span[0], "end": span[1], "text": text}
+        for idx, text, _, span in results if span and text
+    ]
+    if segments:
+        with open(segments_path_for(output_path), "w", encoding="utf-8") as f:
+            json.dump(segments, f, ensure_ascii=False)
+
     print("[INFO] Whisper transcription completed.")
     return output_path
 
@@ -0,0 +1,100 @@
+import os
+
+import numpy as np
+import torch
+import whisper
+from whisper.audio import N_SAMPLES
+
+from utils.video_processing.model_registry import get_whisper_model
+
+# How many 30-second windows are decoded together
+BATCH_SIZE = int(os.getenv("WHISPER_BATCH_SIZE", "8"))
+
+
+def _as_waveform(chunk):
+    """Waveform of a chunk given as file path, numpy array or speech segment."""
+    if hasattr(chunk, "samples"):
+        chunk = chunk.samples
+    if isinstance(chunk, str):
+        return whisper.load_audio(chunk)
+    return np.asarray(chunk, dtype=np.float32)
+
+
+def _split_windows(waveform):
+    """Cut a waveform into Whisper's 30-second input windows."""
+    if len(waveform) <= N_SAMPLES:
+        return [waveform]
+    return [waveform[i:i + N_SAMPLES] for i in range(0, len(waveform), N_SAMPLES)]
+
+
+class BatchedWhisperTranscriber:
+    """
+    Decodes several 30-second windows in one forward pass.
+    Log-mel spectrograms are stacked into a (batch, n_mels, frames) tensor
+    and handed to whisper.decode, which runs the encoder and the greedy
+    decoder over the whole batch at once.
+    """
+
+    def __init__(self, model_name="tiny", batch_size=BATCH_SIZE, language=None, model=None):
+        self.model = model if model is not None else get_whisper_model(model_name)
+        self.batch_size = max(1, batch_size)
+        self.options = whisper.DecodingOptions(
+            language=language,
+            without_timestamps=True,
+            fp16=self.model.device.type == "cuda",
+        )
+
+    def _mel(self, window):
+        audio = whisper.pad_or_trim(torch.from_numpy(window))
+        return whisper.log_mel_spectrogram(audio, n_mels=self.model.dims.n_mels)
+
+    def decode_windows(self, windows):
+        """Decode a list of <=30 s waveforms; returns (text, error) per window."""
+        outputs = []
+        for start in range(0, len(windows), self.batch_size):
+            batch = windows[start:start + self.batch_size]
+            try:
+                mels = torch.stack([self._mel(w) for w in batch]).to(self.model.device)
+                results = whisper.decode(self.model, mels, self.options)
+                outputs.extend((r.text.strip(), None) for r in results)
+            except Exception:
+                # Retry one by one so a single bad window doesn't sink the batch
+                for window in batch:
+                    try:
+                        mel = self._mel(window).to(self.model.device)
+                        result = whisper.decode(self.model, mel, self.options)
+                        outputs.append((result.text.strip(), None))
+                    except Exception as e:
+                        outputs.append(("", str(e)))
+        return outputs
+
+    def transcribe(self, chunks):
+        """
+        Transcribe chunks in batches; chunks longer than 30 s are split into
+        several windows and their texts joined again.
+        Returns a list of (text, error) in chunk order.
+        """
+        windows, owners = [], []
+        for idx, chunk in enumerate(chunks):
+            try:
+                pieces = _split_windows(_as_waveform(chunk))
+            except Exception as e:
+                owners.append((idx, str(e)))
+                continue
+            for piece in pieces:
+                windows.append(piece)
+                owners.append((idx, None))
+
+        decoded = iter(self.decode_windows(windows))
+        texts = [[] for _ in chunks]
+        errors = [None] * len(chunks)
+        for idx, load_error in owners:
+            if load_error:
+                errors[idx] = load_error
+                continue
+            text, error = next(decoded)
+            if text:
+                texts[idx].append(text)
+            if error:
+                errors[idx] = error
+        return [(" ".join(parts), error) for parts, error in zip(texts, errors)]
@@ -0,0 +1,114 @@
+import hashlib
+import json
+import os
+import threading
+
+# Read block size when fingerprinting media files
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_sha256(path, block_size=HASH_BLOCK_SIZE):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def input_fingerprint(audio_path, **settings):
+    """
+    Identity of a transcription run: the media content plus every setting
+    that changes how it is cut into segments or decoded (model, VAD, ...).
+    A journal is only resumed by a run with the same fingerprint.
+    """
+    payload = json.dumps({"sha256": file_sha256(audio_path), **settings}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TranscriptionJournal:
+    """
+    Append-only JSONL checkpoint of a transcription run: a header with the
+    input fingerprint, then one line per finished segment (index, start/end
+    seconds, text). Each line is flushed and fsynced as the segment
+    finishes, so a crash loses at most the segments still being decoded.
+    A torn last line is ignored; a journal of a different input is
+    discarded. Segments that failed are not recorded and run again.
+    """
+
+    def __init__(self, path, fingerprint):
+        self.path = path
+        self.fingerprint = fingerprint
+        self._lock = threading.Lock()
+        self._completed = None
+
+    def completed(self):
+        """{index: (text, span)} of the segments finished by earlier runs."""
+        if self._completed is None:
+            self._completed = self._load()
+        return dict(self._completed)
+
+    def _load(self):
+        completed = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return completed
+        try:
+            header = json.loads(lines[0]) if lines else {}
+        except ValueError:
+            header = {}
+        if header.get("fingerprint") != self.fingerprint:
+            if lines:
+                print(f"[INFO] Checkpoint {self.path} belongs to another input, starting over")
+            os.remove(self.path)
+            return completed
+        if not lines[-1].endswith("\n"):
+            # Cut the torn line so the next record starts on a line of its own
+            lines.pop()
+            with open(self.path, "r+", encoding="utf-8") as f:
+                f.truncate(len("".join(lines).encode("utf-8")))
+        for line in lines[1:]:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # a torn last line from a crash
+            span = (record["start"], record["end"]) if record.get("start") is not None else None
+            completed[record["index"]] = (record["text"], span)
+        if completed:
+            print(f"[INFO] Resuming from checkpoint: {len(completed)} segments already transcribed")
+        return completed
+
+    def _append(self, record):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            if f.tell() == 0:
+                f.write(json.dumps({"fingerprint": self.fingerprint}) + "\n")
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def record(self, index, text, error=None, span=None):
+        """Checkpoint one finished segment (failed ones are left to be retried)."""
+        if error:
+            return
+        with self._lock:
+            if self._completed is None:
+                self._completed = self._load()
+            self._completed[index] = (text, span)
+            self._append({
+                "index": index,
+                "start": span[0] if span else None,
+                "end": span[1] if span else None,
+                "text": text,
+            })
+
+    def remove(self):
+        """Drop the journal once the transcript it protects has been saved."""
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self._completed = {}
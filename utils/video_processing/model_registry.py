@@ -0,0 +1,89 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import whisper
+
+# How many Whisper models may stay resident at once (least recently used is evicted)
+MAX_RESIDENT_MODELS = int(os.getenv("WHISPER_MAX_MODELS", "2"))
+
+
+class WhisperModelRegistry:
+    """
+    Process-wide cache of loaded Whisper models keyed by model name.
+    Models are loaded lazily on first use, shared by every caller and
+    evicted least-recently-used once more than max_models are resident.
+    """
+
+    def __init__(self, max_models=MAX_RESIDENT_MODELS, loader=None):
+        self.max_models = max(1, max_models)
+        self._loader = loader or whisper.load_model
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "load_seconds": {}}
+
+    def get(self, model_name):
+        """Return the resident model, loading it once if needed."""
+        with self._lock:
+            model = self._models.get(model_name)
+            if model is not None:
+                self._models.move_to_end(model_name)
+                self._stats["hits"] += 1
+                return model
+            load_lock = self._load_locks.setdefault(model_name, threading.Lock())
+
+        # Only one thread loads a given model; the others wait and reuse it
+        with load_lock:
+            with self._lock:
+                model = self._models.get(model_name)
+                if model is not None:
+                    self._models.move_to_end(model_name)
+                    self._stats["hits"] += 1
+                    return model
+
+            print(f"[INFO] Loading Whisper model '{model_name}'...")
+            start = time.perf_counter()
+            model = self._loader(model_name)
+            elapsed = time.perf_counter() - start
+            print(f"[INFO] Whisper model '{model_name}' loaded in {elapsed:.2f}s")
+
+            with self._lock:
+                self._stats["misses"] += 1
+                self._stats["load_seconds"][model_name] = round(elapsed, 3)
+                self._models[model_name] = model
+                self._models.move_to_end(model_name)
+                while len(self._models) > self.max_models:
+                    evicted, _ = self._models.popitem(last=False)
+                    self._stats["evictions"] += 1
+                    print(f"[INFO] Evicted Whisper model '{evicted}' from registry")
+            return model
+
+    def evict(self, model_name):
+        with self._lock:
+            return self._models.pop(model_name, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+    def stats(self):
+        """Snapshot of resident models, hit/miss counters and load times."""
+        with self._lock:
+            return {
+                "resident": list(self._models.keys()),
+                "max_models": self.max_models,
+                "hits": self._stats["hits"],
+                "misses": self._stats["misses"],
+                "evictions": self._stats["evictions"],
+                "load_seconds": dict(self._stats["load_seconds"]),
+            }
+
+
+# Create global instance
+whisper_registry = WhisperModelRegistry()
+
+
+def get_whisper_model(model_name):
+    return whisper_registry.get(model_name)
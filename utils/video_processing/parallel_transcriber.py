@@ -0,0 +1,279 @@
+import atexit
+import os
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from utils.video_processing.model_registry import get_whisper_model
+from utils.video_processing.batched_transcriber import BATCH_SIZE, BatchedWhisperTranscriber
+
+# Worker processes for chunk transcription (each keeps its own resident model)
+MAX_WORKERS = int(os.getenv("WHISPER_WORKERS", "4"))
+# Torch threads per worker, so N workers don't oversubscribe the CPU
+THREADS_PER_WORKER = int(os.getenv("WHISPER_THREADS_PER_WORKER", "2"))
+# Times a call replaces a broken worker pool before giving up on its remaining chunks
+MAX_POOL_RESTARTS = 3
+# A unit of chunks in flight during this many pool crashes is marked failed instead of resubmitted
+MAX_UNIT_ATTEMPTS = 2
+
+_worker_model_name = None
+
+# (model name, workers, threads per worker) -> [pool, calls using it]; kept warm between calls
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def default_worker_count(num_chunks=None, threads_per_worker=THREADS_PER_WORKER):
+    """Workers that fit on this machine without oversubscribing cores."""
+    cpus = os.cpu_count() or 1
+    workers = min(MAX_WORKERS, cpus // max(1, threads_per_worker))
+    if num_chunks is not None:
+        workers = min(workers, num_chunks)
+    return max(1, workers)
+
+
+def _init_worker(model_name, threads_per_worker):
+    """Runs once per worker process: bound threads and load the model."""
+    global _worker_model_name
+    os.environ["OMP_NUM_THREADS"] = str(threads_per_worker)
+    os.environ["MKL_NUM_THREADS"] = str(threads_per_worker)
+    import torch
+    torch.set_num_threads(threads_per_worker)
+    _worker_model_name = model_name
+    get_whisper_model(model_name)
+
+
+def _chunk_span(chunk):
+    """(start, end) offsets in seconds for speech segments, else None."""
+    if hasattr(chunk, "start") and hasattr(chunk, "end"):
+        return (round(chunk.start, 3), round(chunk.end, 3))
+    return None
+
+
+def _transcribe_one(index, audio, model_name=None):
+    """Transcribe a single chunk (file path, waveform or speech segment) and never raise."""
+    try:
+        model = get_whisper_model(model_name or _worker_model_name)
+        if hasattr(audio, "samples"):
+            audio = audio.samples
+        result = model.transcribe(audio)
+        return index, result.get("text", "").strip(), None
+    except Exception as e:
+        return index, "", str(e)
+
+
+def _transcribe_unit(items, model_name=None, batch_size=BATCH_SIZE):
+    """Transcribe a list of (index, chunk) items, batching them when allowed."""
+    if batch_size <= 1 or len(items) == 1:
+        return [_transcribe_one(idx, chunk, model_name) for idx, chunk in items]
+    try:
+        transcriber = BatchedWhisperTranscriber(model_name or _worker_model_name, batch_size=batch_size)
+        outputs = transcriber.transcribe([chunk for _, chunk in items])
+    except Exception as e:
+        outputs = [("", str(e))] * len(items)
+    return [(idx, text, error) for (idx, _), (text, error) in zip(items, outputs)]
+
+
+def _units(chunks, batch_size, skip=()):
+    """Group the chunk stream into lists of (index, chunk) of up to batch_size, leaving out indices in skip."""
+    unit = []
+    for idx, chunk in enumerate(chunks):
+        if idx in skip:
+            continue
+        unit.append((idx, chunk))
+        if len(unit) >= max(1, batch_size):
+            yield unit
+            unit = []
+    if unit:
+        yield unit
+
+
+def _acquire_pool(key):
+    """Shared worker pool for key, started (and its models loaded) only the first time."""
+    with _pools_lock:
+        entry = _pools.get(key)
+        if entry is None:
+            # Idle pools of another model or size each hold their own models; let them go
+            for other, (pool, users) in list(_pools.items()):
+                if not users:
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    del _pools[other]
+            model_name, workers, threads_per_worker = key
+            # spawn keeps torch's thread pools out of forked children
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                       initializer=_init_worker, initargs=(model_name, threads_per_worker))
+            entry = _pools[key] = [pool, 0]
+        entry[1] += 1
+        return entry[0]
+
+
+def _release_pool(key, pool, broken=False):
+    """Done with pool; a broken one is shut down so the next caller starts a fresh pool."""
+    with _pools_lock:
+        entry = _pools.get(key)
+        if entry and entry[0] is pool:
+            entry[1] -= 1
+            if broken:
+                del _pools[key]
+    if broken:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_worker_pools():
+    with _pools_lock:
+        pools = [pool for pool, _ in _pools.values()]
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+atexit.register(shutdown_worker_pools)
+
+
+def transcribe_chunks_parallel(chunks, model_name="tiny", workers=None,
+                               threads_per_worker=THREADS_PER_WORKER, batch_size=BATCH_SIZE,
+                               on_progress=None, on_segment=None, journal=None):
+    """
+    Transcribe audio chunks (file paths, waveforms or speech segments) across a
+    pool of worker processes. chunks may be any iterable, including a streaming
+    generator: at most two batches per worker are pulled ahead of the results.
+    With batch_size > 1 each worker decodes its chunks as one batch
+    (see BatchedWhisperTranscriber); batch_size=1 uses model.transcribe per chunk.
+    Returns a list of (index, text, error, span) tuples in the original chunk
+    order, where span is the segment's (start, end) in seconds when known;
+    a failing chunk yields empty text and its error message instead of
+    aborting the whole job.
+    on_progress(done, total, index, error) is called as each chunk finishes;
+    total is None while chunks is a generator. on_segment(index, text,
+    error, span) gets every result in chunk order as soon as all earlier
+    chunks are done, for consumers that stream the transcript onwards.
+    With a journal (TranscriptionJournal) every finished chunk is
+    checkpointed, and chunks it already holds are not transcribed again.
+    The worker pool (and the models loaded in it) is reused by later calls
+    with the same model and sizes. If a worker process dies the pool is
+    replaced and the chunks in flight are resubmitted, up to
+    MAX_POOL_RESTARTS times; chunks that can't be transcribed come back
+    with an error.
+    """
+    total = len(chunks) if hasattr(chunks, "__len__") else None
+    if workers is None:
+        workers = default_worker_count(total, threads_per_worker)
+
+    results = {}
+    spans = {}
+    next_in_order = 0
+
+    def release_in_order():
+        nonlocal next_in_order
+        while on_segment and next_in_order in results:
+            _, text, error = results[next_in_order]
+            on_segment(next_in_order, text, error, spans.get(next_in_order))
+            next_in_order += 1
+
+    def record(outputs):
+        for idx, text, error in outputs:
+            results[idx] = (idx, text, error)
+            if journal:
+                journal.record(idx, text, error, spans.get(idx))
+            print(f"[INFO] Transcribed chunk {idx + 1}")
+            if on_progress:
+                on_progress(len(results), total, idx, error)
+        release_in_order()
+
+    # Chunks finished by an earlier, interrupted run
+    completed = journal.completed() if journal else {}
+    for idx, (text, span) in completed.items():
+        results[idx] = (idx, text, None)
+        spans[idx] = span
+    release_in_order()
+
+    if workers <= 1:
+        # Single worker: stay in-process and reuse the registry's warm model
+        for unit in _units(chunks, batch_size, completed):
+            for idx, chunk in unit:
+                spans[idx] = _chunk_span(chunk)
+            record(_transcribe_unit(unit, model_name, batch_size))
+    else:
+        print(f"[INFO] Transcribing on {workers} workers ({threads_per_worker} threads each, "
+              f"batch size {batch_size})")
+        max_in_flight = workers * 2
+        key = (model_name, workers, threads_per_worker)
+        pool = _acquire_pool(key)
+        pending = {}   # future -> unit
+        attempts = {}  # first index of a unit -> pool crashes it was in flight for
+        restarts = 0
+
+        def fail(unit, error):
+            record([(idx, "", error) for idx, _ in unit])
+
+        def submit(unit):
+            while pool is not None:
+                try:
+                    pending[pool.submit(_transcribe_unit, unit, None, batch_size)] = unit
+                    return
+                except BrokenProcessPool as e:
+                    replace_pool(e)
+            fail(unit, "Whisper worker pool unavailable")
+
+        def replace_pool(error):
+            # A dead worker breaks the whole pool: every pending future fails with it
+            nonlocal pool, restarts
+            in_flight = list(pending.values())
+            pending.clear()
+            _release_pool(key, pool, broken=True)
+            restarts += 1
+            pool = _acquire_pool(key) if restarts <= MAX_POOL_RESTARTS else None
+            print(f"[WARN] Whisper worker pool crashed ({error}); "
+                  + ("restarted" if pool else "giving up on the remaining chunks"))
+            for unit in in_flight:
+                tries = attempts[unit[0][0]] = attempts.get(unit[0][0], 0) + 1
+                if pool is None or tries >= MAX_UNIT_ATTEMPTS:
+                    fail(unit, f"Whisper worker crashed: {error}")
+                else:
+                    submit(unit)
+
+        def collect(done_futures):
+            broken = None
+            for future in done_futures:
+                unit = pending.pop(future, None)
+                if unit is None:
+                    continue  # from a pool replaced meanwhile
+                try:
+                    outputs = future.result()
+                except BrokenProcessPool as e:
+                    pending[future] = unit
+                    broken = e
+                    continue
+                except Exception as e:
+                    outputs = [(idx, "", str(e)) for idx, _ in unit]
+                record(outputs)
+            if broken:
+                replace_pool(broken)
+
+        try:
+            for unit in _units(chunks, batch_size, completed):
+                # Backpressure: don't decode further ahead than the pool can absorb
+                if len(pending) >= max_in_flight:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                for idx, chunk in unit:
+                    spans[idx] = _chunk_span(chunk)
+                submit(unit)
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+        finally:
+            # e.g. a cancelled job: drop its queued work, keep the pool warm for the next call
+            for future in pending:
+                future.cancel()
+            if pool is not None:
+                _release_pool(key, pool)
+
+    ordered = []
+    for idx in sorted(results):
+        _, text, error = results[idx]
+        if error:
+            print(f"[WARN] Whisper error on chunk {idx + 1}: {error}")
+        ordered.append((idx, text, error, spans.get(idx)))
+    return ordered
@@ -0,0 +1,184 @@
+from collections import deque, namedtuple
+
+import numpy as np
+
+from utils.video_processing.video_to_audio import SAMPLE_RATE, stream_audio_windows
+
+# Whisper decodes 30-second windows, so never hand it more than that
+MAX_SEGMENT_SECONDS = 30
+FRAME_MS = 30
+MIN_SPEECH_MS = 250          # shorter bursts are clicks/noise
+MIN_SILENCE_MS = 400         # shorter gaps are pauses inside a phrase
+PAD_MS = 150                 # context kept around each segment
+ENERGY_FLOOR_DB = -45.0      # absolute floor for speech, in dBFS
+NOISE_MARGIN_DB = 10.0       # speech must be this far above the noise estimate
+NOISE_RISE_DB = 0.005        # per-frame drift of the noise floor towards louder input
+SPLIT_LOOKBACK_SECONDS = 5   # where to look for a pause when a phrase runs too long
+
+SpeechSegment = namedtuple("SpeechSegment", ["index", "start", "end", "samples"])
+SpeechSegment.__doc__ = "A run of speech with its offsets (seconds) in the source audio."
+
+
+def frame_energies_db(samples, frame_len):
+    """RMS energy of each complete frame in dBFS."""
+    n_frames = len(samples) // frame_len
+    if n_frames == 0:
+        return np.empty(0, dtype=np.float32)
+    frames = samples[:n_frames * frame_len].reshape(n_frames, frame_len)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+    return 20.0 * np.log10(np.maximum(rms, 1e-10))
+
+
+class _AudioBuffer:
+    """Recent samples addressed by absolute sample index, trimmed as segments are emitted."""
+
+    def __init__(self):
+        self._blocks = deque()
+        self.start = 0
+        self.end = 0
+
+    def append(self, samples):
+        self._blocks.append((self.end, samples))
+        self.end += len(samples)
+
+    def slice(self, lo, hi):
+        lo, hi = max(lo, self.start), min(hi, self.end)
+        parts = []
+        for block_start, block in self._blocks:
+            block_end = block_start + len(block)
+            if block_end <= lo or block_start >= hi:
+                continue
+            parts.append(block[max(lo - block_start, 0):min(hi, block_end) - block_start])
+        if not parts:
+            return np.empty(0, dtype=np.float32)
+        return np.concatenate(parts) if len(parts) > 1 else parts[0].copy()
+
+    def trim(self, keep_from):
+        while self._blocks:
+            block_start, block = self._blocks[0]
+            if block_start + len(block) > keep_from:
+                break
+            self._blocks.popleft()
+            self.start = block_start + len(block)
+
+
+def segment_speech(windows, sample_rate=SAMPLE_RATE, max_segment_secs=MAX_SEGMENT_SECONDS):
+    """
+    Split a stream of waveform windows into speech segments.
+    Frames are classified by energy against an adaptive noise floor,
+    non-speech is dropped and speech regions within max_segment_secs of
+    each other are packed into one segment: their padded audio is joined
+    without the pauses between them. A phrase cut because it ran too long
+    gets no padding at the cut, so neighbouring segments don't overlap.
+    Yields SpeechSegment tuples (start and end span the source audio
+    covered); memory stays bounded by one segment plus one input window.
+    """
+    frame_len = sample_rate * FRAME_MS // 1000
+    segment_frames = int(max_segment_secs * 1000 / FRAME_MS)
+    # Leave room for the padding so padded segments still fit one Whisper window
+    max_frames = segment_frames - 2 * (PAD_MS // FRAME_MS)
+    min_speech = MIN_SPEECH_MS // FRAME_MS
+    min_silence = MIN_SILENCE_MS // FRAME_MS
+    pad = PAD_MS // FRAME_MS
+    lookback = int(SPLIT_LOOKBACK_SECONDS * 1000 / FRAME_MS)
+
+    audio = _AudioBuffer()
+    leftover = np.empty(0, dtype=np.float32)
+    frame = 0                       # absolute index of the next frame
+    noise_db = ENERGY_FLOOR_DB - NOISE_MARGIN_DB
+    recent = deque(maxlen=lookback)  # (frame, energy) for pause search
+
+    region_start = None             # current speech region
+    region_cut = False              # it starts where a too long phrase was cut
+    last_speech = None
+    pending = None                  # padded [start_frame, end_frame) regions of the segment being packed
+    index = 0
+
+    def emit(regions):
+        nonlocal index
+        bounds = [(lo * frame_len, min(hi * frame_len, audio.end)) for lo, hi in regions]
+        parts = [audio.slice(lo, hi) for lo, hi in bounds]
+        samples = np.concatenate(parts) if len(parts) > 1 else parts[0]
+        segment = SpeechSegment(index, bounds[0][0] / sample_rate, bounds[-1][1] / sample_rate, samples)
+        index += 1
+        return segment
+
+    def add_region(start, end, cut_start=False, cut_end=False):
+        """Pack a finished speech region; returns a segment when one is complete."""
+        nonlocal pending
+        if end - start < min_speech:
+            return None
+        # Pauses get padding on both sides, cuts none
+        lo = max(start - (0 if cut_start else pad), 0)
+        hi = end + (0 if cut_end else pad)
+        if pending is not None and hi - pending[0][0] <= segment_frames:
+            pending.append((max(lo, pending[-1][1]), hi))
+            return None
+        done, pending = pending, [(lo, hi)]
+        return emit(done) if done else None
+
+    for window in windows:
+        samples = np.concatenate([leftover, window]) if len(leftover) else window
+        energies = frame_energies_db(samples, frame_len)
+        leftover = samples[len(energies) * frame_len:]
+        audio.append(samples[:len(energies) * frame_len])
+        if len(energies) == 0:
+            continue
+
+        for energy in energies:
+            # Minimum-tracking noise floor: drops at once, creeps up slowly
+            noise_db = energy if energy < noise_db else noise_db + NOISE_RISE_DB
+            is_speech = energy > max(ENERGY_FLOOR_DB, noise_db + NOISE_MARGIN_DB)
+            recent.append((frame, energy))
+            if is_speech:
+                if region_start is None:
+                    region_start, region_cut = frame, False
+                last_speech = frame
+            elif region_start is not None and frame - last_speech > min_silence:
+                segment = add_region(region_start, last_speech + 1, cut_start=region_cut)
+                region_start = None
+                if segment is not None:
+                    yield segment
+
+            # A phrase that never pauses long enough: cut at the quietest recent frame
+            if region_start is not None and frame + 1 - region_start >= max_frames:
+                candidates = [(e, f) for f, e in recent if f > region_start + max_frames // 2]
+                cut = min(candidates)[1] + 1 if candidates else frame + 1
+                segment = add_region(region_start, cut, cut_start=region_cut, cut_end=True)
+                if segment is not None:
+                    yield segment
+                # Flush so the next piece starts a fresh segment
+                if pending is not None:
+                    yield emit(pending)
+                    pending = None
+                region_start = cut if cut <= frame else None
+                region_cut = True
+                if region_start is not None:
+                    last_speech = frame
+
+            frame += 1
+
+        # Nothing else can join the pending segment once it is max_frames old
+        if pending is not None and frame - pending[0][0] > max_frames and region_start is None:
+            yield emit(pending)
+            pending = None
+
+        # Keep only the samples a future segment may still need
+        keep = frame - pad - min_silence
+        if region_start is not None:
+            keep = min(keep, region_start - pad)
+        if pending:
+            keep = min(keep, pending[0][0])
+        audio.trim(max(keep, 0) * frame_len)
+
+    if region_start is not None:
+        segment = add_region(region_start, (last_speech or region_start) + 1, cut_start=region_cut)
+        if segment is not None:
+            yield segment
+    if pending is not None:
+        yield emit(pending)
+
+
+def split_audio_to_speech_segments(audio_path, max_segment_secs=MAX_SEGMENT_SECONDS):
+    """Stream an audio/video file and yield its speech segments."""
+    return segment_speech(stream_audio_windows(audio_path), max_segment_secs=max_segment_secs)
@@ -1,26 +1,142 @@
+import json
 import os
+import subprocess
 import yt_dlp
-from pydub import AudioSegment
-import math
+import numpy as np
+
+from utils.video_processing.checkpoint import file_sha256
 
 CHUNK_SECONDS = 60
-TMP_DIR = "data/uploads/chunks"
+SAMPLE_RATE = 16000          # Whisper's native input rate
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+FFPROBE_BINARY = os.getenv("FFPROBE_BINARY", "ffprobe")
+
+def _download_manifest_path(outname):
+    return outname + ".download.json"
+
+
+def verified_download(url, outname):
+    """
+    True when outname holds a complete earlier download of url: its
+    manifest (written only after the download finished) names the same URL
+    and the file still has the recorded size and SHA-256.
+    """
+    try:
+        with open(_download_manifest_path(outname), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("url") != url or os.path.getsize(outname) != manifest.get("size"):
+            return False
+        return file_sha256(outname) == manifest.get("sha256")
+    except (OSError, ValueError):
+        return False
+
 
 def download_audio_from_youtube(url, outname="data/uploads/downloaded_audio.m4a"):
-    opts = {"format": "bestaudio/best", "outtmpl": outname, "quiet": True, "no_warnings": True}
+    """Download the audio track, or reuse outname if it already holds a verified download of url."""
+    if verified_download(url, outname):
+        print(f"[INFO] Reusing downloaded audio: {outname}")
+        return os.path.abspath(outname)
+
+    opts = {"format": "bestaudio/best", "outtmpl": outname, "quiet": True, "no_warnings": True,
+            "overwrites": True}
     with yt_dlp.YoutubeDL(opts) as ydl:
         ydl.download([url])
+    record_download(url, outname)
     return os.path.abspath(outname)
 
-def split_audio_to_chunks(audio_path, chunk_secs=CHUNK_SECONDS, out_dir=TMP_DIR):
-    os.makedirs(out_dir, exist_ok=True)
-    audio = AudioSegment.from_file(audio_path)
-    total_ms = len(audio)
-    chunk_ms = chunk_secs * 1000
-    chunks = []
-    for i in range(0, total_ms, chunk_ms):
-        idx = i // chunk_ms
-        filename = os.path.join(out_dir, f"chunk_{idx:04d}.wav")
-        audio[i:i+chunk_ms].export(filename, format="wav")
-        chunks.append(filename)
-    return chunks
+
+def record_download(url, outname):
+    """Write the manifest that lets verified_download() trust a finished download."""
+    manifest = {"url": url, "size": os.path.getsize(outname), "sha256": file_sha256(outname)}
+    tmp_path = _download_manifest_path(outname) + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, _download_manifest_path(outname))
+
+
+def list_playlist(url):
+    """
+    [(title, url)] of the videos of a YouTube playlist (or channel) URL,
+    without downloading them; a plain video URL gives itself.
+    """
+    opts = {"quiet": True, "no_warnings": True, "extract_flat": "in_playlist"}
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        info = ydl.extract_info(url, download=False)
+    if info.get("_type") != "playlist":
+        return [(info.get("title") or info.get("id") or url, url)]
+    videos = []
+    for entry in info.get("entries") or []:
+        if not entry:
+            continue
+        video_url = entry.get("url") or entry.get("webpage_url")
+        if video_url and not video_url.startswith("http"):
+            video_url = f"https://www.youtube.com/watch?v={entry.get('id') or video_url}"
+        if video_url:
+            videos.append((entry.get("title") or entry.get("id") or video_url, video_url))
+    return videos
+
+
+def audio_duration(audio_path):
+    """Length of the media file in seconds (ffprobe), or None if it can't be read."""
+    cmd = [
+        FFPROBE_BINARY, "-v", "error", "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1", audio_path,
+    ]
+    try:
+        out = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+        return float(out.strip())
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return None
+
+
+def remove_download(outname):
+    """Delete a downloaded audio file and its manifest."""
+    for path in (outname, _download_manifest_path(outname)):
+        if os.path.exists(path):
+            os.remove(path)
+
+def stream_audio_windows(audio_path, window_secs=CHUNK_SECONDS, sample_rate=SAMPLE_RATE):
+    """
+    Decode audio through an ffmpeg pipe as 16 kHz mono float32 and yield
+    fixed-size numpy windows. Only one window is held in memory at a time
+    and nothing is written to disk.
+    """
+    cmd = [
+        FFMPEG_BINARY, "-nostdin", "-loglevel", "error", "-threads", "0",
+        "-i", audio_path,
+        "-f", "f32le", "-ac", "1", "-ar", str(sample_rate), "-",
+    ]
+    window_bytes = int(window_secs * sample_rate) * 4
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        while True:
+            buf = bytearray(window_bytes)
+            view = memoryview(buf)
+            filled = 0
+            # A pipe read can return short, so keep reading until the window is full
+            while filled < window_bytes:
+                n = proc.stdout.readinto(view[filled:])
+                if not n:
+                    break
+                filled += n
+            # Drop a trailing partial sample, if any
+            filled -= filled % 4
+            if filled == 0:
+                break
+            yield np.frombuffer(buf, dtype=np.float32, count=filled // 4)
+            if filled < window_bytes:
+                break
+        proc.stdout.close()
+        if proc.wait() != 0:
+            err = proc.stderr.read().decode("utf-8", errors="replace").strip()
+            raise RuntimeError(f"ffmpeg failed to decode {audio_path}: {err}")
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+        proc.stderr.close()
+
+def split_audio_to_chunks(audio_path, chunk_secs=CHUNK_SECONDS):
+    """Yield chunk_secs-long waveforms of the audio, ready for Whisper."""
+    return stream_audio_windows(audio_path, window_secs=chunk_secs)